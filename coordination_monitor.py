@@ -5,6 +5,9 @@ import time
 from typing import Any, Dict, List
 
 from src.pheromone_handler import PheromoneHandler, PheromoneHandlerError
+from src.pheromone_store import open_pheromone_store
+from src.signal_index import SignalIndex
+from src.signal_optimizer import effective_strength
 from src.traffic_controller import analyze_signal
 
 
@@ -48,16 +51,17 @@ class CoordinationMonitor:
     """Monitor pheromone file and maintain coordination health."""
 
     def __init__(self, path: str, stall_min: int, expiry_min: int) -> None:
-        self.handler = PheromoneHandler(path)
+        self.path = path
+        self.handler = open_pheromone_store(path)
+        self.index: SignalIndex | None = None
         self.stall_sec = stall_min * 60
         self.expiry_sec = expiry_min * 60
 
     async def load_signals(self) -> List[Dict[str, Any]]:
-        data = await self.handler.read_safe()
+        data = await self.handler.read_view()
         return data.get("signals", []) if data else []
 
     async def reset_deadlock(self) -> None:
-        await self.handler.clear_signals_by_category("coordinate")
         signal = {
             "id": f"reset-{int(time.time())}",
             "signalType": "auto_recovery",
@@ -67,16 +71,32 @@ class CoordinationMonitor:
             "message": "Deadlock detected - routing to orchestrator",
             "timestamp": int(time.time()),
         }
-        await self.handler.add_signal(signal)
+        async with self.handler.transaction() as data:
+            data["signals"] = [s for s in data["signals"] if s.get("category") != "coordinate"]
+            data["signals"].append(signal)
+
+    async def refresh_index(self, signals: List[Dict[str, Any]]) -> SignalIndex:
+        """Return the store's live index, or keep a local one in step with ``signals``."""
+        if isinstance(self.handler, PheromoneHandler):
+            # The handler updates its index on every write and reloads the saved one.
+            self.index = await self.handler.signal_index()
+        elif self.index is None:
+            self.index = SignalIndex.build(signals)
+        else:
+            self.index.sync(signals)
+        return self.index
 
-    async def display_dashboard(self, signals: List[Dict[str, Any]]) -> None:
-        by_cat: Dict[str, int] = {}
-        for s in signals:
-            by_cat[s.get("category", "unknown")] = by_cat.get(s.get("category", "unknown"), 0) + 1
+    async def display_dashboard(self, signals: List[Dict[str, Any]], index: SignalIndex | None = None) -> None:
+        if index is None:
+            index = await self.refresh_index(signals)
+        by_cat = index.counts("category")
         handoffs = [s for s in signals if s.get("category") == "coordinate"][-5:]
         state = suggest_next_action(signals)
+        now = time.time()
+        strongest = index.top_k(3, now=now)
         print("Active signals:", by_cat)
         print("Recent handoffs:", [h.get("target") for h in handoffs])
+        print("Strongest signals:", [(s.get("id"), round(effective_strength(s, now), 2)) for s in strongest])
         print("Suggested next action:", state)
 
     async def check_once(self) -> None:
@@ -93,7 +113,7 @@ class CoordinationMonitor:
         cleaned = cleanup_expired_signals(signals, self.expiry_sec)
         if len(cleaned) != len(signals):
             await self.handler.write_safe({"signals": cleaned})
-        await self.display_dashboard(cleaned)
+        await self.display_dashboard(cleaned, await self.refresh_index(cleaned))
 
     async def monitor_loop(self) -> None:
         while True:
@@ -6,18 +6,25 @@ from typing import Tuple
 
 import aiofiles
 
+from src.pheromone_codec import CodecError, decode, is_compact
+from src.pheromone_helpers import PheromoneError, migrate_merged_messages
+
 
 class DiagnosticError(Exception):
     """Raised when pheromone diagnostics fail."""
 
 
-async def read_pheromone(path: Path) -> Tuple[str, str, int]:
-    """Return file text, encoding, and size."""
+async def read_bytes(path: Path) -> bytes:
+    """Return the raw file contents."""
     try:
         async with aiofiles.open(path, 'rb') as f:
-            data = await f.read()
+            return await f.read()
     except OSError as exc:
         raise DiagnosticError(f"Cannot read {path}") from exc
+
+
+def decode_text(data: bytes) -> Tuple[str, str, int]:
+    """Return file text, encoding, and size for raw contents."""
     size = len(data)
     try:
         text = data.decode('utf-8')
@@ -28,6 +35,19 @@ async def read_pheromone(path: Path) -> Tuple[str, str, int]:
     return text, encoding, size
 
 
+async def read_pheromone(path: Path) -> Tuple[str, str, int]:
+    """Return file text, encoding, and size."""
+    return decode_text(await read_bytes(path))
+
+
+async def validate_compact(data: bytes) -> None:
+    """Validate a compact pheromone payload and raise DiagnosticError if corrupt."""
+    try:
+        decode(data)
+    except CodecError as exc:
+        raise DiagnosticError(f"Compact format error: {exc}") from exc
+
+
 async def validate_json(text: str) -> None:
     """Validate JSON and raise DiagnosticError if invalid."""
     try:
@@ -41,7 +61,14 @@ async def diagnose(path: Path) -> None:
     """Run diagnostics on the pheromone file."""
     if not path.exists():
         raise DiagnosticError(f"{path} does not exist")
-    text, encoding, size = await read_pheromone(path)
+    data = await read_bytes(path)
+    if is_compact(data):
+        await validate_compact(data)
+        print("File format: compact")
+        print(f"File size: {len(data)} bytes")
+        print("Compact structure valid")
+        return
+    text, encoding, size = decode_text(data)
     await validate_json(text)
     print(f"File encoding: {encoding}")
     print(f"File size: {size} bytes")
@@ -51,10 +78,18 @@ async def diagnose(path: Path) -> None:
 def main() -> None:
     parser = argparse.ArgumentParser(description="Diagnose pheromone file")
     parser.add_argument("path", nargs="?", default=".pheromone")
+    parser.add_argument(
+        "--compact-messages",
+        action="store_true",
+        help="rewrite legacy '; '-joined messages as bounded merge records",
+    )
     args = parser.parse_args()
     try:
         asyncio.run(diagnose(Path(args.path)))
-    except DiagnosticError as exc:
+        if args.compact_messages:
+            changed = asyncio.run(migrate_merged_messages(args.path))
+            print(f"Compacted {changed} merged messages")
+    except (DiagnosticError, PheromoneError) as exc:
         print(f"Error: {exc}")
 
 
@@ -5,7 +5,7 @@ import time
 from pathlib import Path
 from typing import Optional
 
-from src.pheromone_handler import PheromoneHandler
+from src.pheromone_store import open_pheromone_store
 from validate_system_health import (
     check_config_files,
     check_roomodes,
@@ -28,7 +28,7 @@ async def backup_state(path: Path) -> Optional[Path]:
 
 
 async def reset_pheromone(path: Path) -> None:
-    handler = PheromoneHandler(str(path))
+    handler = open_pheromone_store(str(path))
     data = {"signals": [], "metadata": {"created": int(time.time())}}
     await handler.write_safe(data)
 
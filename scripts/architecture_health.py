@@ -3,6 +3,7 @@ import re
 from pathlib import Path
 from typing import Dict
 
+from src.file_pool import FILE_POOL
 from src.pheromone_helpers import (
     update_pheromone,
     calculate_strength,
@@ -16,7 +17,7 @@ class HealthError(Exception):
 
 async def _safe_read(path: Path) -> str:
     try:
-        return await asyncio.to_thread(path.read_text)
+        return await FILE_POOL.read(str(path))
     except OSError as exc:
         raise HealthError(f"Unable to read {path}") from exc
 
@@ -0,0 +1,64 @@
+import argparse
+import copy
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.signal_optimizer import evaporate_scalar, evaporate_vectorized, np
+
+RATES = {"compass": 0.01, "state": 0.05, "need": 0.1, "block": 0.02, "coordinate": 0.08}
+
+
+def generate_signals(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "category": rng.choice(list(RATES) + ["unknown"]),
+            "strength": round(rng.uniform(0, 10), rng.choice([0, 1, 2, 3])),
+            "context": {"urgency": rng.choice([0, 0.1, 0.25, rng.random()])},
+        }
+        for _ in range(count)
+    ]
+
+
+def _best_of(fn: Callable[[List[Dict[str, Any]]], Any], signals: List[Dict[str, Any]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        batch = copy.deepcopy(signals)
+        start = time.perf_counter()
+        fn(batch)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: Sequence[int], repeat: int = 3) -> List[Dict[str, float]]:
+    """Time scalar and vectorized evaporation and check their outputs agree."""
+    results = []
+    for size in sizes:
+        signals = generate_signals(size)
+        scalar = lambda batch: evaporate_scalar(batch, RATES, 0.05, 1, 0.1)  # noqa: E731
+        vector = lambda batch: evaporate_vectorized(batch, RATES, 0.05, 1, 0.1)  # noqa: E731
+        if vector(copy.deepcopy(signals)) != scalar(copy.deepcopy(signals)):
+            raise AssertionError(f"vectorized output differs at {size} signals")
+        t_scalar = _best_of(scalar, signals, repeat)
+        t_vector = _best_of(vector, signals, repeat)
+        results.append({"signals": size, "scalar": t_scalar, "vectorized": t_vector, "speedup": t_scalar / t_vector})
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs NumPy adaptive evaporation")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    if np is None:
+        print("numpy is not installed; only the scalar path is available")
+        return 1
+    print(f"{'signals':>10} {'scalar s':>10} {'numpy s':>10} {'speedup':>8}")
+    for row in run(args.sizes, args.repeat):
+        print(f"{row['signals']:>10} {row['scalar']:>10.4f} {row['vectorized']:>10.4f} {row['speedup']:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
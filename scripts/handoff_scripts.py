@@ -1,19 +1,21 @@
 import asyncio
 from typing import Any
 
-from src.pheromone_handler import PheromoneHandler
+from src.pheromone_store import open_pheromone_store
 from src.handoff_templates import task_completion, work_request
+from src.traffic_controller import record_completions
 
 
 async def _execute_signals(path: str, *signals: Any) -> None:
-    handler = PheromoneHandler(path)
-    for sig in signals:
-        await handler.add_signal(sig)
+    handler = open_pheromone_store(path)
+    await handler.update(lambda data: data["signals"].extend(signals))
+    # Completions release the finishing agent's load as they are written.
+    await asyncio.to_thread(record_completions, signals)
 
 
 async def blueprint_complete_handoff(path: str = ".pheromone") -> None:
     """Route blueprint completion to the architect."""
-    done = task_completion("Blueprint finalized")
+    done = task_completion("Blueprint finalized", source="concept-to-blueprint-translator")
     request = work_request(
         "architecture design required",
         "architect-highlevel-module",
@@ -24,7 +26,7 @@ async def blueprint_complete_handoff(path: str = ".pheromone") -> None:
 
 async def architecture_complete_handoff(path: str = ".pheromone") -> None:
     """Route architecture completion to the coder."""
-    done = task_completion("Architecture documented")
+    done = task_completion("Architecture documented", source="architect-highlevel-module")
     request = work_request(
         "coding implementation needed",
         "coder-test-driven",
@@ -35,14 +37,14 @@ async def architecture_complete_handoff(path: str = ".pheromone") -> None:
 
 async def code_complete_handoff(path: str = ".pheromone") -> None:
     """Route code completion to the tester."""
-    done = task_completion("Code implemented")
+    done = task_completion("Code implemented", source="coder-test-driven")
     request = work_request("run tests", "tester-tdd-master", strength=7.2)
     await _execute_signals(path, done, request)
 
 
 async def test_complete_handoff(path: str = ".pheromone") -> None:
     """Notify orchestrator that testing finished."""
-    done = task_completion("Testing complete")
+    done = task_completion("Testing complete", source="tester-tdd-master")
     request = work_request(
         "review results",
         "orchestrator-pheromone-scribe",
@@ -53,7 +55,7 @@ async def test_complete_handoff(path: str = ".pheromone") -> None:
 
 async def debug_complete_handoff(target: str, path: str = ".pheromone") -> None:
     """Return debugging results to the requested agent."""
-    done = task_completion("Bug resolved")
+    done = task_completion("Bug resolved", source="debugger-targeted")
     request = work_request("retest fix", target, strength=7.4)
     await _execute_signals(path, done, request)
 
@@ -1,8 +1,9 @@
 import asyncio
 import json
-from pathlib import Path
 from typing import Any, Dict, List, Set
 
+from src.file_pool import FILE_POOL
+
 ALLOWED_GROUPS: Set[str] = {"read", "edit", "command", "mcp"}
 DISALLOWED_TOOLS: Set[str] = {"rm", "sudo"}
 
@@ -11,9 +12,8 @@ class ValidationError(Exception):
 
 async def load_json(path: str) -> Dict[str, Any]:
     try:
-        text = await asyncio.to_thread(Path(path).read_text)
-        return json.loads(text)
-    except (OSError, json.JSONDecodeError) as exc:
+        return json.loads(await FILE_POOL.read_bytes(path))
+    except (OSError, ValueError) as exc:
         raise ValidationError(f"Unable to load {path}") from exc
 
 
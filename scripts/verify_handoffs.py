@@ -2,33 +2,33 @@ import asyncio
 import tempfile
 from pathlib import Path
 
-from src.pheromone_handler import PheromoneHandler
+from src.pheromone_store import open_pheromone_store
 from scripts.handoff_scripts import (
     blueprint_complete_handoff,
     architecture_complete_handoff,
     code_complete_handoff,
     test_complete_handoff,
 )
-from src.traffic_controller import determine_route
+from src.traffic_controller import route_store
 
 
 async def verify_chain() -> bool:
     path = Path(tempfile.mktemp())
-    handler = PheromoneHandler(str(path))
+    handler = open_pheromone_store(str(path))
     await blueprint_complete_handoff(str(path))
-    route = await determine_route(await handler.read_safe() or {}, handler)
+    route = await route_store(handler)
     if route != "architect-highlevel-module":
         return False
     await architecture_complete_handoff(str(path))
-    route = await determine_route(await handler.read_safe() or {}, handler)
+    route = await route_store(handler)
     if route != "coder-test-driven":
         return False
     await code_complete_handoff(str(path))
-    route = await determine_route(await handler.read_safe() or {}, handler)
+    route = await route_store(handler)
     if route != "tester-tdd-master":
         return False
     await test_complete_handoff(str(path))
-    route = await determine_route(await handler.read_safe() or {}, handler)
+    route = await route_store(handler)
     return route == "coder-test-driven"
 
 
@@ -1,9 +1,15 @@
 import asyncio
-import json
 import os
 from pathlib import Path
 from typing import Any, Dict, List
 
+try:
+    from src.file_pool import FILE_POOL
+    from src.pheromone_codec import CodecError, loads as decode_pheromone
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from file_pool import FILE_POOL
+    from pheromone_codec import CodecError, loads as decode_pheromone
+
 
 class DiagramError(Exception):
     """Raised on diagram generation failures."""
@@ -22,10 +28,9 @@ async def load_signals(path: str = PHEROMONE_FILE) -> List[Dict[str, Any]]:
     """Load signals from a pheromone file."""
     _validate_path(path)
     try:
-        text = await asyncio.to_thread(Path(path).read_text)
-        data = json.loads(text)
+        data = decode_pheromone(await FILE_POOL.read_bytes(path))
         return data.get("signals", [])
-    except (OSError, json.JSONDecodeError) as exc:
+    except (OSError, ValueError, CodecError) as exc:
         raise DiagramError("Unable to read pheromone") from exc
 
 
@@ -64,8 +69,7 @@ async def write_diagrams(directory: str = "docs/architecture") -> List[str]:
     deps = create_dependency_graph(signals)
     flow_path = Path(directory) / "signal_flow.mmd"
     dep_path = Path(directory) / "file_dependencies.mmd"
-    await asyncio.to_thread(flow_path.write_text, flow)
-    await asyncio.to_thread(dep_path.write_text, deps)
+    await asyncio.gather(FILE_POOL.write(str(flow_path), flow), FILE_POOL.write(str(dep_path), deps))
     return [str(flow_path), str(dep_path)]
 
 
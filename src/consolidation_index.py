@@ -0,0 +1,126 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .file_pool import FILE_POOL
+from .signal_optimizer import duplicate_key, merge_duplicate, merge_messages
+
+
+def _stat_id(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _files(sig: Dict[str, Any]) -> Any:
+    return sig.get("context", {}).get("modified_files")
+
+
+class ConsolidationIndex:
+    """Persistent merge state that lets update_pheromone fold a signal in O(1)."""
+
+    # Mirrors consolidate_signals -> consolidate_duplicates -> normalize_strengths
+    # and is only exact while no two neighbours share modified files (``stable``).
+    # Stamped with the file's (inode, size, mtime_ns); rebuilt when that changes.
+    VERSION = 1
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.index_path = path + ".consolidation"
+        self.positions: Dict[str, int] = {}
+        self.tail_files: Any = None
+        self.tail_pos = -1
+        self.max_strength = 0.0
+        self.count = 0
+        self.stable = False
+        self.stamp: Optional[List[int]] = None
+
+    @staticmethod
+    def key_for(sig: Dict[str, Any]) -> str:
+        return json.dumps(duplicate_key(sig), default=str)
+
+    @classmethod
+    async def load(cls, path: str) -> "ConsolidationIndex":
+        index = cls(path)
+        try:
+            state = json.loads(await FILE_POOL.read_bytes(index.index_path))
+            if state.get("version") != cls.VERSION:
+                return index
+            index.positions = state["positions"]
+            index.max_strength = state["max_strength"]
+            index.count = state["count"]
+            index.stable = state["stable"]
+            index.stamp = state["stamp"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls(path)
+        return index
+
+    def matches(self, signals: List[Dict[str, Any]]) -> bool:
+        """Return True when the index describes the pheromone file as it is now."""
+        return (
+            self.stable
+            and self.stamp is not None
+            and self.stamp == _stat_id(self.path)
+            and self.count == len(signals)
+        )
+
+    def rebuild(self, signals: List[Dict[str, Any]]) -> None:
+        """Index an already consolidated signal list."""
+        self.positions = {}
+        for pos, sig in enumerate(signals):
+            self.positions.setdefault(self.key_for(sig), pos)
+        self.max_strength = max((sig.get("strength", 0) for sig in signals), default=0.0)
+        self.count = len(signals)
+        self.stable = all(_files(a) != _files(b) for a, b in zip(signals, signals[1:]))
+        self.begin(signals)
+
+    def begin(self, signals: List[Dict[str, Any]]) -> None:
+        """Reset the consecutive-merge tail to the last stored signal."""
+        self.tail_pos = len(signals) - 1
+        self.tail_files = _files(signals[-1]) if signals else None
+
+    def add(self, signals: List[Dict[str, Any]], sig: Dict[str, Any]) -> None:
+        """Merge or append sig into signals exactly as the full pipeline would."""
+        files = _files(sig)
+        if self.tail_pos >= 0 and files == self.tail_files:
+            merge_messages(signals[self.tail_pos], sig)
+            return
+        key = self.key_for(sig)
+        pos = self.positions.get(key)
+        if pos is None:
+            if signals and _files(signals[-1]) == files:
+                self.stable = False
+            pos = self.positions[key] = len(signals)
+            signals.append(sig)
+        else:
+            merge_duplicate(signals[pos], sig)
+        self.tail_files = files
+        self.tail_pos = pos
+        self.max_strength = max(self.max_strength, signals[pos].get("strength", 0))
+        self.count = len(signals)
+
+    def normalize(self, signals: List[Dict[str, Any]]) -> None:
+        """Rescale to 0-10 only when the running maximum exceeds 10."""
+        if self.max_strength <= 10:
+            return
+        scale = self.max_strength
+        for sig in signals:
+            sig["strength"] = round((sig.get("strength", 0) / scale) * 10, 2)
+            if "decay" in sig:
+                sig["decay"]["initial"] = sig["strength"]
+        self.max_strength = max((sig.get("strength", 0) for sig in signals), default=0.0)
+
+    async def save(self) -> None:
+        """Persist the index stamped with the pheromone file's current identity."""
+        self.stamp = _stat_id(self.path)
+        state = {
+            "version": self.VERSION,
+            "stamp": self.stamp,
+            "count": self.count,
+            "stable": self.stable,
+            "max_strength": self.max_strength,
+            "positions": self.positions,
+        }
+        await FILE_POOL.write(self.index_path, json.dumps(state, separators=(",", ":")))
@@ -3,6 +3,9 @@ import json
 from typing import Any, Dict, List
 
 
+FILE_RX = re.compile(r'^[\w./-]+$')
+
+
 class ContextError(Exception):
     """Custom exception for context management issues."""
 
@@ -33,9 +36,8 @@ def compress_context(context: Dict[str, Any], max_tokens: int = 500) -> Dict[str
 def validate_files(files: List[str]) -> List[str]:
     """Validate and format file references."""
     valid = []
-    pattern = re.compile(r'^[\w./-]+$')
     for f in files:
-        if pattern.match(f) and ".." not in f and " " not in f:
+        if FILE_RX.match(f) and ".." not in f and " " not in f:
             valid.append(f"@{f}")
     return valid
 
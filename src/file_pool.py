@@ -0,0 +1,196 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class _Handle:
+    __slots__ = ("fd", "ino", "dev", "refs", "evicted")
+
+    def __init__(self, fd: int, st: os.stat_result) -> None:
+        self.fd = fd
+        self.ino = st.st_ino
+        self.dev = st.st_dev
+        self.refs = 0
+        self.evicted = False
+
+
+class FilePool:
+    """Async file I/O pool: bounded executor, reused read handles and coalesced reads."""
+
+    def __init__(self, max_workers: Optional[int] = None, max_handles: Optional[int] = None) -> None:
+        self.max_workers = max_workers or int(os.getenv("FILE_POOL_WORKERS", "4"))
+        self.max_handles = max_handles or int(os.getenv("FILE_POOL_HANDLES", "32"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._handles: "OrderedDict[str, _Handle]" = OrderedDict()
+        self._handle_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._reads: Dict[str, "asyncio.Future[bytes]"] = {}
+        self._in_flight = 0
+        self._queued = 0
+        self._stats: Dict[str, float] = {
+            "reads": 0,
+            "writes": 0,
+            "coalesced": 0,
+            "bytes_read": 0,
+            "bytes_written": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+        }
+
+    def _bind(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._reads = {}
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="file-pool")
+        return self._slots
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        slots = self._bind()
+        start = time.perf_counter()
+        self._queued += 1
+        started = False
+        try:
+            async with slots:
+                self._queued -= 1
+                started = True
+                self._in_flight += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+                finally:
+                    self._in_flight -= 1
+        finally:
+            if not started:
+                self._queued -= 1
+            elapsed = time.perf_counter() - start
+            self._stats["latency_total"] += elapsed
+            self._stats["latency_max"] = max(self._stats["latency_max"], elapsed)
+
+    def _acquire(self, key: str) -> _Handle:
+        st = os.stat(key)
+        with self._handle_lock:
+            handle = self._handles.get(key)
+            if handle is not None and (handle.ino, handle.dev) != (st.st_ino, st.st_dev):
+                self._evict(key)
+                handle = None
+            if handle is None:
+                fd = os.open(key, os.O_RDONLY)
+                handle = _Handle(fd, os.fstat(fd))
+                self._handles[key] = handle
+                while len(self._handles) > self.max_handles:
+                    self._evict(next(iter(self._handles)))
+            else:
+                self._handles.move_to_end(key)
+            handle.refs += 1
+            return handle
+
+    def _release(self, handle: _Handle) -> None:
+        with self._handle_lock:
+            handle.refs -= 1
+            if handle.evicted and handle.refs == 0:
+                os.close(handle.fd)
+
+    def _evict(self, key: str) -> None:
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            handle.evicted = True
+            if handle.refs == 0:
+                os.close(handle.fd)
+
+    def _read_sync(self, key: str) -> bytes:
+        handle = self._acquire(key)
+        try:
+            chunks = []
+            offset = 0
+            size = max(os.fstat(handle.fd).st_size, 65536)
+            while True:
+                chunk = os.pread(handle.fd, size, offset)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                offset += len(chunk)
+            return b"".join(chunks)
+        finally:
+            self._release(handle)
+
+    def _write_sync(self, key: str, payload: bytes) -> None:
+        directory = os.path.dirname(key)
+        try:
+            mode = os.stat(key).st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fchmod(fd, mode)
+        except BaseException:
+            os.close(fd)
+            os.unlink(tmp)
+            raise
+        os.close(fd)
+        os.replace(tmp, key)
+        with self._handle_lock:
+            self._evict(key)
+
+    async def read_bytes(self, path: str) -> bytes:
+        """Read a whole file; concurrent reads of one path share a single read."""
+        key = os.path.abspath(path)
+        self._bind()
+        task = self._reads.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(self._read_sync, key))
+            self._reads[key] = task
+            task.add_done_callback(lambda t: self._reads.pop(key) if self._reads.get(key) is t else None)
+            self._stats["reads"] += 1
+            data = await asyncio.shield(task)
+            self._stats["bytes_read"] += len(data)
+            return data
+        self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def write_bytes(self, path: str, payload: bytes) -> None:
+        """Atomically replace a file and invalidate its cached read handle."""
+        key = os.path.abspath(path)
+        self._bind()
+        self._reads.pop(key, None)
+        await self._run(self._write_sync, key, payload)
+        self._stats["writes"] += 1
+        self._stats["bytes_written"] += len(payload)
+
+    async def read(self, path: str) -> str:
+        return (await self.read_bytes(path)).decode("utf-8")
+
+    async def write(self, path: str, text: str) -> None:
+        await self.write_bytes(path, text.encode("utf-8"))
+
+    def stats(self) -> Dict[str, float]:
+        ops = self._stats["reads"] + self._stats["writes"]
+        out = dict(self._stats)
+        out["in_flight"] = self._in_flight
+        out["queued"] = self._queued
+        out["open_handles"] = len(self._handles)
+        out["latency_avg"] = out["latency_total"] / ops if ops else 0.0
+        return out
+
+    def close(self) -> None:
+        with self._handle_lock:
+            for key in list(self._handles):
+                self._evict(key)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+FILE_POOL = FilePool()
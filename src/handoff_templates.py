@@ -1,14 +1,19 @@
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 DEFAULT_TARGET = "orchestrator-pheromone-scribe"
 
 
 def _build(
-    signal_type: str, category: str, target: str, message: str, strength: float
+    signal_type: str,
+    category: str,
+    target: str,
+    message: str,
+    strength: float,
+    source: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Return a fully structured pheromone signal."""
-    return {
+    signal = {
         "id": f"{signal_type}-{int(time.time()*1000)}",
         "signalType": signal_type,
         "category": category,
@@ -17,15 +22,19 @@ def _build(
         "message": message,
         "timestamp": int(time.time()),
     }
+    if source:
+        signal["source"] = source
+    return signal
 
 
 def task_completion(
     message: str,
     target: str = DEFAULT_TARGET,
     strength: float = 7.5,
+    source: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Template for announcing task completion."""
-    return _build("task_completed", "state", target, message, strength)
+    """Template for announcing task completion; source names the agent that finished."""
+    return _build("task_completed", "state", target, message, strength, source)
 
 
 def work_request(
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import random
+import re
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .signal_optimizer import effective_strength, merge_duplicate
+
+_MERSENNE = (1 << 61) - 1
+_WORD_RX = re.compile(r"\w+")
+
+# Signatures are memoised by content so repeated passes over a mostly unchanged
+# pheromone only hash the signals that are new or were edited.
+SIGNATURE_CACHE = int(os.getenv("NEAR_DUP_SIGNATURE_CACHE", "16384"))
+_SIGNATURES: "OrderedDict[Tuple[Any, ...], Optional[Tuple[int, ...]]]" = OrderedDict()
+
+
+class NearDuplicateError(Exception):
+    """Raised when near-duplicate detection is misconfigured."""
+
+
+@dataclass
+class NearDuplicateConfig:
+    """Tuning knobs for MinHash/LSH near-duplicate detection."""
+
+    num_perm: int = 64
+    bands: int = 16
+    shingle_size: int = 3
+    threshold: float = 0.6
+    message_weight: float = 0.6
+    # Only compare signals sharing category, signalType and target.
+    same_category: bool = True
+    policy: str = "strongest"
+    seed: int = 1
+
+    @classmethod
+    def from_env(cls) -> "NearDuplicateConfig":
+        return cls(
+            threshold=float(os.getenv("NEAR_DUP_THRESHOLD", str(cls.threshold))),
+            message_weight=float(os.getenv("NEAR_DUP_MESSAGE_WEIGHT", str(cls.message_weight))),
+            policy=os.getenv("NEAR_DUP_POLICY", cls.policy),
+        )
+
+
+def _hash(token: str) -> int:
+    # blake2b rather than hash() so signatures are stable across processes.
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Return word n-gram shingles; short texts fall back to their words."""
+    words = _WORD_RX.findall(text.lower())
+    if len(words) < size:
+        return set(words) or ({text} if text else set())
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from a fixed-seed family of (a*x + b) mod p permutations."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)]
+
+    def signature(self, tokens: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        hashes = [_hash(token) for token in tokens]
+        if not hashes:
+            return None
+        return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in self.perms)
+
+
+@lru_cache(maxsize=8)
+def _hasher(num_perm: int, seed: int) -> MinHasher:
+    return MinHasher(num_perm, seed)
+
+
+def _signature(config: NearDuplicateConfig, kind: str, value: Any) -> Optional[Tuple[int, ...]]:
+    """Return the MinHash of a message or file tuple, reusing it across calls."""
+    key = (config.num_perm, config.seed, config.shingle_size, kind, value)
+    if key in _SIGNATURES:
+        _SIGNATURES.move_to_end(key)
+        return _SIGNATURES[key]
+    tokens = shingles(value, config.shingle_size) if kind == "m" else value
+    signature = _hasher(config.num_perm, config.seed).signature(tokens)
+    _SIGNATURES[key] = signature
+    if len(_SIGNATURES) > SIGNATURE_CACHE:
+        _SIGNATURES.popitem(last=False)
+    return signature
+
+
+def estimate_similarity(left: Optional[Sequence[int]], right: Optional[Sequence[int]]) -> Optional[float]:
+    """Estimate Jaccard similarity from two signatures; None when either side is empty."""
+    if left is None or right is None:
+        return None
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, left: int, right: int) -> None:
+        a, b = self.find(left), self.find(right)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def _files(sig: Dict[str, Any]) -> List[str]:
+    files = sig.get("context", {}).get("modified_files") or []
+    return [str(f) for f in files]
+
+
+def find_near_duplicates(
+    signals: List[Dict[str, Any]],
+    config: Optional[NearDuplicateConfig] = None,
+) -> List[List[int]]:
+    """Return clusters (lists of indices, each sorted) of near-duplicate signals."""
+    config = config or NearDuplicateConfig()
+    if config.num_perm % config.bands:
+        raise NearDuplicateError("num_perm must be a multiple of bands")
+    rows = config.num_perm // config.bands
+    messages = [_signature(config, "m", sig.get("message", "")) for sig in signals]
+    files = [_signature(config, "f", tuple(_files(sig))) for sig in signals]
+
+    # LSH banding: signatures agreeing on every row of any band share a bucket,
+    # so only bucket mates are compared instead of all n^2 pairs.
+    buckets: Dict[Tuple[Any, ...], List[int]] = defaultdict(list)
+    for idx, sig in enumerate(signals):
+        scope = (sig.get("category"), sig.get("signalType"), sig.get("target")) if config.same_category else None
+        for kind, signature in (("m", messages[idx]), ("f", files[idx])):
+            if signature is None:
+                continue
+            for band in range(config.bands):
+                chunk = signature[band * rows:(band + 1) * rows]
+                buckets[(scope, kind, band, chunk)].append(idx)
+
+    groups = _UnionFind(len(signals))
+    checked: Set[Tuple[int, int]] = set()
+    for members in buckets.values():
+        for pos, left in enumerate(members):
+            for right in members[pos + 1:]:
+                pair = (left, right)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if _score(messages, files, left, right, config.message_weight) >= config.threshold:
+                    groups.union(left, right)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for idx in range(len(signals)):
+        clusters[groups.find(idx)].append(idx)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def _score(messages: List[Any], files: List[Any], left: int, right: int, weight: float) -> float:
+    msg = estimate_similarity(messages[left], messages[right])
+    fil = estimate_similarity(files[left], files[right])
+    if msg is None and fil is None:
+        return 0.0
+    if fil is None:
+        return msg or 0.0
+    if msg is None:
+        return fil
+    return weight * msg + (1 - weight) * fil
+
+
+def _pick_base(signals: List[Dict[str, Any]], members: List[int], policy: str, now: float) -> int:
+    if policy == "first":
+        return members[0]
+    if policy == "latest":
+        return max(members, key=lambda i: (signals[i].get("timestamp") or 0, i))
+    if policy == "strongest":
+        return max(members, key=lambda i: (effective_strength(signals[i], now), -i))
+    raise NearDuplicateError(f"Unknown merge policy {policy}")
+
+
+def merge_near_duplicates(
+    signals: List[Dict[str, Any]],
+    config: Optional[NearDuplicateConfig] = None,
+) -> List[Dict[str, Any]]:
+    """Fold each near-duplicate cluster into one signal chosen by the merge policy."""
+    config = config or NearDuplicateConfig()
+    drop: Set[int] = set()
+    now = time.time()
+    for members in find_near_duplicates(signals, config):
+        base = _pick_base(signals, members, config.policy, now)
+        for idx in members:
+            if idx != base:
+                merge_duplicate(signals[base], signals[idx], now)
+                drop.add(idx)
+        files = {f: None for idx in members for f in _files(signals[idx])}
+        if files:
+            signals[base].setdefault("context", {})["modified_files"] = list(files)
+    return [sig for idx, sig in enumerate(signals) if idx not in drop]
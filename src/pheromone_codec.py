@@ -0,0 +1,74 @@
+import argparse
+import json
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+# Compact pheromone layout:
+#   MAGIC | zlib-compressed JSON without whitespace
+# Parsing stays in the C json module, so a compact file decodes faster than
+# indented JSON while being an order of magnitude smaller on disk.
+MAGIC = b"PHRB\x02"
+LEVEL = 6
+
+
+class CodecError(Exception):
+    """Raised when a pheromone payload cannot be encoded or decoded."""
+
+
+def is_compact(raw: bytes) -> bool:
+    """Return True when raw starts with the compact format magic header."""
+    return raw[: len(MAGIC)] == MAGIC
+
+
+def encode(data: Any) -> bytes:
+    """Encode a JSON-compatible value in the compact pheromone format."""
+    try:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except (TypeError, ValueError) as exc:
+        raise CodecError(str(exc)) from exc
+    return MAGIC + zlib.compress(payload, LEVEL)
+
+
+def decode(raw: bytes) -> Any:
+    """Decode a payload produced by encode()."""
+    if not is_compact(raw):
+        raise CodecError("Missing compact pheromone header")
+    try:
+        return json.loads(zlib.decompress(memoryview(raw)[len(MAGIC):]))
+    except (zlib.error, ValueError) as exc:
+        raise CodecError("Truncated or corrupt compact payload") from exc
+
+
+def loads(raw: bytes) -> Any:
+    """Decode a pheromone payload, detecting compact or JSON by its header."""
+    if is_compact(raw):
+        return decode(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def dumps(data: Any, compact: bool = False) -> bytes:
+    """Serialize pheromone data as compact binary or indented JSON."""
+    if compact:
+        return encode(data)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert pheromone files between JSON and compact binary")
+    parser.add_argument("direction", choices=["to-binary", "to-json"])
+    parser.add_argument("source")
+    parser.add_argument("dest")
+    args = parser.parse_args(argv)
+    try:
+        data = loads(Path(args.source).read_bytes())
+        Path(args.dest).write_bytes(dumps(data, compact=args.direction == "to-binary"))
+    except (OSError, ValueError, CodecError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
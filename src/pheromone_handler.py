@@ -2,35 +2,329 @@ import asyncio
 import json
 import os
 import shutil
+import struct
 import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, AsyncGenerator
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, AsyncGenerator, Tuple
 import fcntl
 
+try:
+    from src.pheromone_codec import CodecError, dumps as encode_pheromone, loads as decode_pheromone
+    from src.shared_cache import SharedCacheError, SharedSnapshotCache
+    from src.signal_index import Router, SignalIndex, attach_index, attached_index
+    from src.workload_ledger import WorkloadError, completions, release_completions
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from pheromone_codec import CodecError, dumps as encode_pheromone, loads as decode_pheromone
+    from shared_cache import SharedCacheError, SharedSnapshotCache
+    from signal_index import Router, SignalIndex, attach_index, attached_index
+    from workload_ledger import WorkloadError, completions, release_completions
+
+
+# Log frames are a big-endian (payload length, crc32) header followed by a
+# compact JSON payload. The first frame of every log names the snapshot it
+# extends so records already folded by a checkpoint are never replayed twice.
+_FRAME = struct.Struct(">II")
+
 
 class PheromoneHandlerError(Exception):
     """Custom exception for pheromone handler failures."""
 
 
+class _RepairNeeded(Exception):
+    """Raised by a shared-lock load that found a snapshot needing backup restore."""
+
+
+class _LockGate:
+    """Reader/writer gate for one event loop, backed by a flock on its own fd."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._cond = asyncio.Condition()
+
+    def __del__(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+
+    async def _flock(self, mode: int) -> None:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fd = self._fd
+        try:
+            fcntl.flock(fd, mode | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            pass
+        acquire = asyncio.ensure_future(asyncio.to_thread(fcntl.flock, fd, mode))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The worker thread may still take the lock after we give up: let
+            # it keep the fd and close it when the call returns, which drops
+            # whatever it acquired. The next acquire opens a fresh fd.
+            self._fd = None
+            acquire.add_done_callback(lambda _: os.close(fd))
+            raise
+
+    def _unlock(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def shared(self) -> AsyncGenerator[None, None]:
+        cond = self._cond
+        async with cond:
+            await cond.wait_for(lambda: not self._writer and not self._waiting_writers)
+            if self._readers == 0:
+                await self._flock(fcntl.LOCK_SH)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._unlock()
+                    cond.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncGenerator[None, None]:
+        cond = self._cond
+        async with cond:
+            self._waiting_writers += 1
+            try:
+                await cond.wait_for(lambda: not self._writer and self._readers == 0)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+            try:
+                await self._flock(fcntl.LOCK_EX)
+            except BaseException:
+                self._writer = False
+                cond.notify_all()
+                raise
+        try:
+            yield
+        finally:
+            async with cond:
+                self._unlock()
+                self._writer = False
+                cond.notify_all()
+
+
+class _FileLock:
+    """Reader/writer lock on a lock file, with one gate and fd per event loop."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # flock only excludes other open file descriptions, so each loop needs its own fd.
+        self._gates: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LockGate]" = weakref.WeakKeyDictionary()
+        self._mutex = threading.Lock()
+
+    def _gate(self) -> _LockGate:
+        loop = asyncio.get_running_loop()
+        with self._mutex:
+            gate = self._gates.get(loop)
+            if gate is None:
+                gate = self._gates[loop] = _LockGate(self.path)
+        return gate
+
+    def shared(self) -> AsyncContextManager[None]:
+        return self._gate().shared()
+
+    def exclusive(self) -> AsyncContextManager[None]:
+        return self._gate().exclusive()
+
+
+class _SnapshotCache:
+    """Least-recently-used map of resolved snapshot path to (stamp, frozen document)."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[Any, Optional[Dict[str, Any]]]]:
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def __setitem__(self, key: str, entry: Tuple[Any, Optional[Dict[str, Any]]]) -> None:
+        with self._mutex:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.limit:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._mutex:
+            return self._entries.pop(key, default)
+
+    def clear(self) -> None:
+        with self._mutex:
+            self._entries.clear()
+
+
+class _GroupCommit:
+    """Mutations queued for one pheromone path on one event loop."""
+
+    def __init__(self) -> None:
+        self.pending: List[Tuple["PheromoneHandler", str, Any, "asyncio.Future[None]"]] = []
+        self.flusher: Optional["asyncio.Task[None]"] = None
+        self.batch_full = asyncio.Event()
+
+
+_LOCKS: Dict[str, _FileLock] = {}
+# Group commit queues keyed by resolved snapshot path, so every handler opened
+# on the same file batches together; futures are loop-bound, hence one queue
+# per running loop.
+_BATCHES: Dict[str, "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _GroupCommit]"] = {}
+# Parsed, validated and frozen documents keyed by resolved snapshot path,
+# each stamped with the (inode, size, mtime_ns) of the snapshot and its log.
+# Bounded, so a process that touches many pheromone files (shards, temp
+# files) keeps only the most recently used ones.
+_SNAPSHOTS = _SnapshotCache(int(os.getenv("PHEROMONE_SNAPSHOT_LIMIT", "64")))
+
+
+def _readonly(*_args: Any, **_kwargs: Any) -> None:
+    raise TypeError("Pheromone snapshot views are read-only")
+
+
+class _FrozenDict(dict):
+    """Read-only dict shared by every reader of a cached snapshot."""
+
+    __setitem__ = __delitem__ = __ior__ = _readonly  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _readonly  # type: ignore[assignment]
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return _thaw(self)
+
+    def __reduce__(self) -> Any:
+        return (dict, (_thaw(self),))
+
+
+class _FrozenList(list):
+    """Read-only list shared by every reader of a cached snapshot."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly  # type: ignore[assignment]
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly  # type: ignore[assignment]
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[Any]:
+        return _thaw(self)
+
+    def __reduce__(self) -> Any:
+        return (list, (_thaw(self),))
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (_FrozenDict, _FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return _FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return _FrozenList(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _stat_id(path: Path) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _file_lock(path: Path) -> _FileLock:
+    key = str(path.resolve())
+    lock = _LOCKS.get(key)
+    if lock is None:
+        lock = _LOCKS[key] = _FileLock(path)
+    return lock
+
+
+REQUIRED_SIGNAL_KEYS = frozenset({"id", "signalType", "category", "strength", "message", "timestamp"})
+
+
+def validate_structure(data: Dict[str, Any]) -> None:
+    """Raise PheromoneHandlerError unless data is a well-formed pheromone document."""
+    if not isinstance(data, dict) or "signals" not in data:
+        raise PheromoneHandlerError("Invalid structure")
+    if not isinstance(data["signals"], list):
+        raise PheromoneHandlerError("Signals must be a list")
+    for sig in data["signals"]:
+        if not isinstance(sig, dict) or not REQUIRED_SIGNAL_KEYS.issubset(sig):
+            raise PheromoneHandlerError("Malformed signal")
+
+
 class PheromoneHandler:
     """Safe handler for pheromone file operations."""
 
-    def __init__(self, path: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        wal: Optional[bool] = None,
+        checkpoint_bytes: Optional[int] = None,
+        group_commit: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        batch_delay: Optional[float] = None,
+        compact: Optional[bool] = None,
+        shared_cache: Optional[bool] = None,
+    ) -> None:
         env_path = os.getenv("PHEROMONE_FILE", ".pheromone")
         self.path = Path(path or env_path)
         self.backup_path = self.path.with_name(self.path.name + ".backup")
+        self.wal_path = self.path.with_name(self.path.name + ".wal")
+        self.wal = wal if wal is not None else os.getenv("PHEROMONE_WAL", "0") == "1"
+        # Stat of the log as this handler last left it; any other state is re-verified.
+        self._log_id: Optional[List[int]] = None
+        self.checkpoint_bytes = checkpoint_bytes or int(os.getenv("PHEROMONE_CHECKPOINT_BYTES", "262144"))
+        if group_commit is None:
+            group_commit = os.getenv("PHEROMONE_GROUP_COMMIT", "0") == "1"
+        self.group_commit = group_commit
+        self.batch_size = batch_size or int(os.getenv("PHEROMONE_BATCH_SIZE", "64"))
+        if batch_delay is None:
+            batch_delay = float(os.getenv("PHEROMONE_BATCH_DELAY", "0.005"))
+        self.batch_delay = batch_delay
+        self.compact = compact if compact is not None else os.getenv("PHEROMONE_COMPACT", "0") == "1"
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Lock a sibling file: the snapshot itself is swapped by os.replace,
+        # so a lock held on its old inode would not exclude later openers.
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._file_lock = _file_lock(self.lock_path)
+        self._cache_key = str(self.path.resolve())
+        if shared_cache is None:
+            shared_cache = os.getenv("PHEROMONE_SHARED_CACHE", "0") == "1"
+        # Keeps the live signal index of this path alive; every handler on the
+        # path shares it and writes keep it in step with the document.
+        self._index: Optional[SignalIndex] = None
+        self._shared: Optional[SharedSnapshotCache] = None
+        if shared_cache:
+            default_dir = self.path.parent / ".swarm" / "cache"
+            self._shared = SharedSnapshotCache(os.getenv("PHEROMONE_SHARED_CACHE_DIR") or str(default_dir))
 
-    @asynccontextmanager
-    async def _lock(self) -> AsyncGenerator[None, None]:
-        handle = await asyncio.to_thread(open, self.path, "a+")
-        try:
-            await asyncio.to_thread(fcntl.flock, handle, fcntl.LOCK_EX)
-            yield
-        finally:
-            await asyncio.to_thread(fcntl.flock, handle, fcntl.LOCK_UN)
-            handle.close()
+    def _lock(self, shared: bool = False) -> AsyncContextManager[None]:
+        return self._file_lock.shared() if shared else self._file_lock.exclusive()
 
     async def _backup(self) -> None:
         if self.path.exists():
@@ -40,65 +334,347 @@ class PheromoneHandler:
         if self.backup_path.exists():
             await asyncio.to_thread(shutil.copy2, self.backup_path, self.path)
 
-    async def _atomic_write(self, text: str) -> None:
+    async def _atomic_write(self, payload: bytes) -> None:
         fd, tmp = tempfile.mkstemp(dir=str(self.path.parent))
         try:
-            os.write(fd, text.encode("utf-8"))
+            os.write(fd, payload)
             os.fsync(fd)
         finally:
             os.close(fd)
         await asyncio.to_thread(os.replace, tmp, self.path)
 
-    def validate_structure(self, data: Dict[str, Any]) -> None:
-        if not isinstance(data, dict) or "signals" not in data:
-            raise PheromoneHandlerError("Invalid structure")
-        if not isinstance(data["signals"], list):
-            raise PheromoneHandlerError("Signals must be a list")
-        required = {"id", "signalType", "category", "strength", "message", "timestamp"}
-        for sig in data["signals"]:
-            if not isinstance(sig, dict) or not required.issubset(sig):
-                raise PheromoneHandlerError("Malformed signal")
+    def _snapshot_id(self) -> Optional[List[int]]:
+        return _stat_id(self.path)
 
-    async def read_safe(self) -> Optional[Dict[str, Any]]:
-        async with self._lock():
+    def _stamp(self) -> Tuple[Optional[List[int]], Optional[List[int]]]:
+        return _stat_id(self.path), _stat_id(self.wal_path)
+
+    def _remember(self, data: Optional[Dict[str, Any]]) -> Any:
+        stamp = self._stamp()
+        _SNAPSHOTS[self._cache_key] = (stamp, _freeze(data))
+        return stamp
+
+    def _publish(self, stamp: Any, data: Optional[Dict[str, Any]]) -> None:
+        if self._shared is None or data is None:
+            return
+        try:
+            self._shared.store(self._cache_key, stamp, _thaw(data))
+        except SharedCacheError:
+            pass  # the shared tier is an optimisation; readers fall back to parsing
+
+    @staticmethod
+    def _frame(record: Dict[str, Any]) -> bytes:
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+    @staticmethod
+    def _scan_log(raw: bytes, parse: bool = True) -> Tuple[List[Dict[str, Any]], int]:
+        """Return decoded records and the length of the intact log prefix."""
+        records: List[Dict[str, Any]] = []
+        offset = 0
+        while offset + _FRAME.size <= len(raw):
+            length, crc = _FRAME.unpack_from(raw, offset)
+            start = offset + _FRAME.size
+            payload = raw[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            if parse or not records:
+                try:
+                    records.append(json.loads(payload))
+                except ValueError:
+                    break
+            offset = start + length
+        return records, offset
+
+    def _parse(self, raw: bytes) -> Dict[str, Any]:
+        data = decode_pheromone(raw)
+        self.validate_structure(data)
+        return data
+
+    def _serialize(self, data: Dict[str, Any]) -> bytes:
+        return encode_pheromone(data, compact=self.compact)
+
+    def _load(self, repair: bool = True) -> Optional[Dict[str, Any]]:
+        """Return the frozen document, reusing the cached parse when files are unchanged."""
+        stamp = self._stamp()
+        cached = _SNAPSHOTS.get(self._cache_key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if self._shared is not None:
+            shared = self._shared.load(self._cache_key, stamp)
+            if shared is not None:
+                data = _freeze(shared)
+                _SNAPSHOTS[self._cache_key] = (stamp, data)
+                return data
+        try:
+            raw: Optional[bytes] = self.path.read_bytes()
+        except FileNotFoundError:
+            raw = None
+        except OSError as exc:
+            raise PheromoneHandlerError("Read error") from exc
+        data = None
+        if raw is not None:
             try:
-                text = await asyncio.to_thread(self.path.read_text, encoding="utf-8")
-            except FileNotFoundError:
-                return None
-            except OSError as exc:
-                raise PheromoneHandlerError("Read error") from exc
+                data = self._parse(raw)
+            except (ValueError, CodecError, PheromoneHandlerError):
+                if not repair:
+                    raise _RepairNeeded()
+                if self.backup_path.exists():
+                    shutil.copy2(self.backup_path, self.path)
+                try:
+                    data = self._parse(self.path.read_bytes())
+                except Exception:
+                    data = None
+        data = _freeze(self._replay(data))
+        if self._stamp() == stamp:
+            _SNAPSHOTS[self._cache_key] = (stamp, data)
+            self._publish(stamp, data)
+        return data
+
+    def _replay(self, data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         try:
-            data = json.loads(text)
-            self.validate_structure(data)
+            raw = self.wal_path.read_bytes()
+        except FileNotFoundError:
             return data
-        except (json.JSONDecodeError, PheromoneHandlerError):
+        records, _ = self._scan_log(raw)
+        if len(records) < 2 or records[0].get("base") != self._snapshot_id():
+            return data
+        data = data or {"signals": []}
+        for rec in records[1:]:
+            if rec.get("op") == "add":
+                data.setdefault("signals", []).append(rec["signal"])
+        return data
+
+    def _append_log(self, signals: List[Dict[str, Any]]) -> Tuple[int, Any, Any]:
+        """Append signals to the log; return its size and the stamps around the cached document."""
+        before = self._stamp()
+        base, log_id = before
+        with open(self.wal_path, "a+b") as log:
+            frames = []
+            if log_id is None or log_id != self._log_id:
+                # Opened, discarded or written by someone else since our last
+                # append: check its base and cut a torn tail once, then only append.
+                log.seek(0)
+                raw = log.read()
+                records, valid = self._scan_log(raw, parse=False)
+                if not records or records[0].get("base") != base:
+                    log.truncate(0)
+                    frames.append(self._frame({"base": base}))
+                elif valid < len(raw):
+                    log.truncate(valid)
+            frames.extend(self._frame({"op": "add", "signal": sig}) for sig in signals)
+            log.write(b"".join(frames))
+            log.flush()
+            os.fsync(log.fileno())
+            size = log.tell()
+        self._log_id = _stat_id(self.wal_path)
+        after = None
+        cached = _SNAPSHOTS.get(self._cache_key)
+        if cached is not None and cached[0] == before:
+            doc = cached[1] or {"signals": []}
+            frozen = _FrozenList(doc["signals"])
+            list.extend(frozen, (_freeze(sig) for sig in signals))
+            after = self._remember(_FrozenDict(doc, signals=frozen))
+        return size, before, after
+
+    async def _append(self, signals: List[Dict[str, Any]]) -> int:
+        """Append under the held lock and extend the live index with the new rows."""
+        try:
+            size, before, after = await asyncio.to_thread(self._append_log, signals)
+        except OSError as exc:
+            raise PheromoneHandlerError("Log append failed") from exc
+        index = attached_index(self._cache_key)
+        cached = _SNAPSHOTS.get(self._cache_key)
+        if index is not None and after is not None and index.stamp == before and cached is not None and cached[0] == after:
+            rows = cached[1]["signals"]
+            index.extend(rows[len(rows) - len(signals):])
+            index.stamp = after
+        return size
+
+    def _discard_log(self) -> None:
+        try:
+            os.unlink(self.wal_path)
+        except FileNotFoundError:
+            pass
+
+    def validate_structure(self, data: Dict[str, Any]) -> None:
+        validate_structure(data)
+
+    async def read_view(self) -> Optional[Dict[str, Any]]:
+        """Return the cached document as a shared read-only view."""
+        try:
+            async with self._lock(shared=True):
+                return await asyncio.to_thread(self._load, False)
+        except _RepairNeeded:
+            async with self._lock():
+                return await asyncio.to_thread(self._load)
+
+    async def read_safe(self) -> Optional[Dict[str, Any]]:
+        return _thaw(await self.read_view())
+
+    async def _write_locked(self, payload: bytes, data: Dict[str, Any]) -> None:
+        await self._backup()
+        try:
+            await self._atomic_write(payload)
+            await asyncio.to_thread(self._discard_log)
+            await self._backup()
+        except Exception as exc:
+            _SNAPSHOTS.pop(self._cache_key, None)
             await self._restore_backup()
-            try:
-                text = await asyncio.to_thread(self.path.read_text, encoding="utf-8")
-                data = json.loads(text)
-                self.validate_structure(data)
-                return data
-            except Exception:
-                return None
+            raise PheromoneHandlerError("Write failed") from exc
+        self._remember(data)
+        # Thawing, encoding and writing the shared copy is file work; keep it off the loop.
+        await asyncio.to_thread(self._publish, self._stamp(), data)
+        await self._reindex()
+
+    async def _reindex(self) -> None:
+        """Sync the live index with the cached document and save it next to the snapshot."""
+        index = attached_index(self._cache_key)
+        cached = _SNAPSHOTS.get(self._cache_key)
+        if index is None or cached is None:
+            return
+        index.sync(cached[1]["signals"] if cached[1] else [])
+        index.stamp = cached[0]
+        await index.save(str(self.path))
+
+    async def signal_index(self, router: Optional[Router] = None) -> SignalIndex:
+        """Return the live index over the document, restoring the saved one on first use."""
+        data = await self.read_view()
+        cached = _SNAPSHOTS.get(self._cache_key)
+        stamp = cached[0] if cached is not None and cached[1] is data else None
+        signals = data.get("signals", []) if data else []
+        index = attached_index(self._cache_key)
+        if index is None:
+            index = await SignalIndex.load(str(self.path), signals, router)
+            rebuilt = index.stamp is None
+            index.stamp = stamp
+            if rebuilt and stamp is not None:
+                await index.save(str(self.path))
+            attach_index(self._cache_key, index)
+        else:
+            if router is not None and router is not index.router:
+                index.use_router(router)
+            if stamp is None or index.stamp != stamp:
+                index.sync(signals)
+                index.stamp = stamp
+        self._index = index
+        return index
 
     async def write_safe(self, data: Dict[str, Any]) -> None:
         self.validate_structure(data)
-        text = json.dumps(data, ensure_ascii=False, indent=2)
+        if self.group_commit:
+            await self._submit("replace", data)
+            return
+        payload = self._serialize(data)
         async with self._lock():
-            await self._backup()
+            await self._write_locked(payload, data)
+
+    def _batch(self) -> _GroupCommit:
+        queues = _BATCHES.setdefault(self._cache_key, weakref.WeakKeyDictionary())
+        loop = asyncio.get_running_loop()
+        batch = queues.get(loop)
+        if batch is None:
+            batch = queues[loop] = _GroupCommit()
+        return batch
+
+    async def _submit(self, op: str, arg: Any) -> None:
+        """Queue a mutation for the next group commit and wait until it is durable."""
+        loop = asyncio.get_running_loop()
+        batch = self._batch()
+        future: "asyncio.Future[None]" = loop.create_future()
+        batch.pending.append((self, op, arg, future))
+        if batch.flusher is None or batch.flusher.done():
+            batch.batch_full.clear()
+            batch.flusher = loop.create_task(self._run_batches(batch))
+        elif len(batch.pending) >= self.batch_size:
+            batch.batch_full.set()
+        await future
+
+    async def _run_batches(self, queue: _GroupCommit) -> None:
+        # Each batch is committed by the handler that queued its first
+        # mutation, so it uses that handler's WAL and format settings.
+        while queue.pending:
+            owner = queue.pending[0][0]
+            if len(queue.pending) < owner.batch_size:
+                try:
+                    await asyncio.wait_for(queue.batch_full.wait(), owner.batch_delay)
+                except asyncio.TimeoutError:
+                    pass
+                queue.batch_full.clear()
+            batch = [(op, arg, future) for _, op, arg, future in queue.pending[: owner.batch_size]]
+            del queue.pending[: owner.batch_size]
             try:
-                await self._atomic_write(text)
-                await self._backup()
-            except Exception as exc:
-                await self._restore_backup()
-                raise PheromoneHandlerError("Write failed") from exc
+                await owner._commit_batch(batch)
+            except Exception as exc:  # noqa: BLE001
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+    async def _commit_batch(self, batch: List[Tuple[str, Any, "asyncio.Future[None]"]]) -> None:
+        if self.wal and all(op == "add" for op, _, _ in batch):
+            async with self._lock():
+                size = await self._append([arg for _, arg, _ in batch])
+            if size >= self.checkpoint_bytes:
+                await self.checkpoint()
+            return
+        async with self.transaction() as data:
+            for op, arg, _ in batch:
+                if op == "replace":
+                    data.clear()
+                    data.update(arg, signals=list(arg["signals"]))
+                else:
+                    data.setdefault("signals", []).append(arg)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield the current document under one exclusive lock and commit it on exit."""
+        async with self._lock():
+            data = _thaw(await asyncio.to_thread(self._load)) or {"signals": []}
+            yield data
+            self.validate_structure(data)
+            await self._write_locked(self._serialize(data), data)
+
+    async def update(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply ``fn`` to the document in place as a single atomic transaction."""
+        async with self.transaction() as data:
+            return fn(data)
+
+    async def checkpoint(self) -> None:
+        """Fold the append-only log into the JSON snapshot."""
+        async with self._lock():
+            if not self.wal_path.exists():
+                return
+            data = await asyncio.to_thread(self._load) or {"signals": []}
+            await self._write_locked(self._serialize(data), data)
 
     async def add_signal(self, signal: Dict[str, Any]) -> None:
-        data = await self.read_safe() or {"signals": []}
-        data.setdefault("signals", []).append(signal)
-        await self.write_safe(data)
+        await self._add_signal(signal)
+        if completions([signal]):
+            # A completion releases its agent's workload once it is durable.
+            try:
+                await asyncio.to_thread(release_completions, [signal])
+            except WorkloadError as exc:
+                raise PheromoneHandlerError("Unable to release workload") from exc
+
+    async def _add_signal(self, signal: Dict[str, Any]) -> None:
+        if self.group_commit:
+            self.validate_structure({"signals": [signal]})
+            await self._submit("add", signal)
+            return
+        if self.wal:
+            self.validate_structure({"signals": [signal]})
+            async with self._lock():
+                size = await self._append([signal])
+            if size >= self.checkpoint_bytes:
+                await self.checkpoint()
+            return
+        async with self.transaction() as data:
+            data.setdefault("signals", []).append(signal)
 
     async def clear_signals_by_category(self, category: str) -> None:
-        data = await self.read_safe() or {"signals": []}
-        data["signals"] = [s for s in data.get("signals", []) if s.get("category") != category]
-        await self.write_safe(data)
+        async with self.transaction() as data:
+            data["signals"] = [s for s in data.get("signals", []) if s.get("category") != category]
@@ -1,61 +1,116 @@
 import asyncio
 import json
+import multiprocessing
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Iterable
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Iterable, Optional, Tuple
 
-import aiofiles
-
-from .signal_cache import SignalCache, SignalCacheError
+from .consolidation_index import ConsolidationIndex
+from .file_pool import FILE_POOL, FilePool  # noqa: F401 - re-exported
+from .near_duplicates import NearDuplicateConfig, merge_near_duplicates
+from .pheromone_codec import CodecError, dumps as encode_pheromone, is_compact, loads as decode_pheromone
+from .signal_cache import SignalCache
+from .signal_index import attached_index, pheromone_stamp
+from .workload_ledger import WorkloadError, completions, release_completions
+from .signal_table import SignalTable
+from .signal_optimizer import (
+    compact_merged_messages,
+    consolidate_duplicates,
+    merge_messages,
+    normalize_strengths,
+)
 
+from .context_manager import compress_context, validate_files, extract_decisions
 
-class FilePool:
-    """Simple async file connection pool."""
 
-    async def read(self, path: str) -> str:
-        async with aiofiles.open(path, "r") as handle:
-            return await handle.read()
+PATTERN_RX = re.compile(r"([A-Z][a-zA-Z]+ Pattern)")
 
-    async def write(self, path: str, text: str) -> None:
-        async with aiofiles.open(path, "w") as handle:
-            await handle.write(text)
+# Batches at or above SANITIZE_PROCESS_THRESHOLD contexts are sanitized in a
+# process pool; smaller ones run inline in SANITIZE_CHUNK sized slices with a
+# yield to the event loop between slices.
+SANITIZE_PROCESS_THRESHOLD = int(os.getenv("SANITIZE_PROCESS_THRESHOLD", "2000"))
+SANITIZE_CHUNK = int(os.getenv("SANITIZE_CHUNK", "256"))
+SANITIZE_WORKERS = int(os.getenv("SANITIZE_WORKERS", str(min(4, os.cpu_count() or 1))))
 
+_SANITIZE_POOL: Optional[ProcessPoolExecutor] = None
 
-FILE_POOL = FilePool()
-from .signal_optimizer import consolidate_duplicates, normalize_strengths
+# Opt-in MinHash/LSH clustering of paraphrased signals. It rewrites positions
+# across the whole list, so it always takes the full consolidation path.
+NEAR_DUPLICATES = os.getenv("NEAR_DUPLICATES", "0") == "1"
 
-from .context_manager import compress_context, validate_files, extract_decisions
+# Opt-in columnar documents: loaded (and cached) pheromones hold a SignalTable
+# instead of a list of dicts. Memory drops about 2.5x, but writers pay for it:
+# _merge_signals materialises every row (to_dicts) and the cache rebuilds the
+# table on each update, so a merge is O(n) instead of the O(1) consolidation
+# index path. Enable it for read-heavy, memory-bound deployments only.
+SIGNAL_TABLE = os.getenv("PHEROMONE_SIGNAL_TABLE", "0") == "1"
 
 
 class PheromoneError(Exception):
     """Custom exception for pheromone update issues."""
 
 
+@dataclass
+class ChunkAck:
+    """Acknowledgement for one committed chunk of a signal stream."""
+
+    sequence: int
+    signals: int
+    bytes: int
+    reason: str
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def _as_table(data: Dict[str, Any]) -> Dict[str, Any]:
+    if SIGNAL_TABLE and isinstance(data, dict) and isinstance(data.get("signals"), list):
+        return dict(data, signals=SignalTable(data["signals"]))
+    return data
+
+
+async def _read_pheromone(path: str) -> Dict[str, Any]:
+    return _as_table(decode_pheromone(await FILE_POOL.read_bytes(path)))
+
+
 async def load_pheromone(path: str, cache: SignalCache | None = None) -> Dict[str, Any]:
     """Load pheromone JSON asynchronously with caching."""
-    if cache:
-        try:
-            return await cache.get(path)
-        except SignalCacheError:
-            pass
     try:
-        text = await FILE_POOL.read(path)
-        data = json.loads(text)
-    except (OSError, json.JSONDecodeError) as exc:
+        if cache:
+            return await cache.get_or_load(path, lambda: _read_pheromone(path))
+        return await _read_pheromone(path)
+    except (OSError, ValueError, CodecError) as exc:
         raise PheromoneError("Invalid pheromone file") from exc
-    if cache:
-        await cache.set(path, data)
-    return data
 
 
-async def save_pheromone(path: str, data: Dict[str, Any], cache: SignalCache | None = None) -> None:
-    """Persist pheromone JSON asynchronously with cache write-through."""
+async def save_pheromone(
+    path: str,
+    data: Dict[str, Any],
+    cache: SignalCache | None = None,
+    compact: Optional[bool] = None,
+) -> None:
+    """Persist pheromone JSON (or the compact format) asynchronously with cache write-through."""
+    if compact is None:
+        compact = os.getenv("PHEROMONE_COMPACT", "0") == "1"
+    document = data
+    if isinstance(data.get("signals"), SignalTable):
+        document = dict(data, signals=data["signals"].to_dicts())
     try:
-        await FILE_POOL.write(path, json.dumps(data, indent=2))
+        await FILE_POOL.write_bytes(path, encode_pheromone(document, compact=compact))
     except OSError as exc:
         raise PheromoneError("Unable to save pheromone") from exc
     if cache:
-        await cache.set(path, data)
+        await cache.set(path, _as_table(data))
+    index = attached_index(str(Path(path).resolve()))
+    if index is not None:
+        # Writes that bypass PheromoneHandler (updates, evaporation) still keep
+        # its live index, and the copy saved beside the file, current.
+        index.sync(document.get("signals", []))
+        index.stamp = pheromone_stamp(path)
+        await index.save(path)
 
 
 def calculate_strength(category: str, complexity: int, urgency: float) -> float:
@@ -77,36 +132,212 @@ def sanitize_context(context: Dict[str, Any]) -> Dict[str, Any]:
     summary = context.get("architecture_summary", "")
     if summary:
         context["architecture_decisions"] = extract_decisions(summary)
-        pattern_rx = re.compile(r"([A-Z][a-zA-Z]+ Pattern)")
-        context["patterns_used"] = pattern_rx.findall(summary)
+        context["patterns_used"] = PATTERN_RX.findall(summary)
     return compress_context(context)
 
 
+def _sanitize_chunk(contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [sanitize_context(ctx) for ctx in contexts]
+
+
+def _sanitize_pool() -> ProcessPoolExecutor:
+    global _SANITIZE_POOL
+    if _SANITIZE_POOL is None:
+        # Never fork: FILE_POOL worker threads may hold locks the child would inherit.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _SANITIZE_POOL = ProcessPoolExecutor(SANITIZE_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _SANITIZE_POOL
+
+
+async def sanitize_batch(
+    contexts: List[Dict[str, Any]],
+    threshold: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Sanitize many contexts without monopolising the event loop."""
+    threshold = SANITIZE_PROCESS_THRESHOLD if threshold is None else threshold
+    chunk_size = chunk_size or SANITIZE_CHUNK
+    chunks = [contexts[i:i + chunk_size] for i in range(0, len(contexts), chunk_size)]
+    if len(contexts) >= threshold and len(chunks) > 1:
+        loop = asyncio.get_running_loop()
+        try:
+            pool = _sanitize_pool()
+            done = await asyncio.gather(*(loop.run_in_executor(pool, _sanitize_chunk, c) for c in chunks))
+            return [ctx for chunk in done for ctx in chunk]
+        except (BrokenProcessPool, OSError):
+            global _SANITIZE_POOL
+            _SANITIZE_POOL = None
+    result: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        result.extend(_sanitize_chunk(chunk))
+        await asyncio.sleep(0)
+    return result
+
+
+async def migrate_merged_messages(path: str, cache: SignalCache | None = None) -> int:
+    """Compact legacy "; "-joined messages in a pheromone file; return how many changed."""
+    try:
+        raw = await FILE_POOL.read_bytes(path)
+        pheromone = decode_pheromone(raw)
+    except (OSError, ValueError, CodecError) as exc:
+        raise PheromoneError("Invalid pheromone file") from exc
+    changed = compact_merged_messages(pheromone.get("signals", []))
+    if changed:
+        await save_pheromone(path, pheromone, cache, compact=is_compact(raw))
+    return changed
+
+
+async def _merge_signals(
+    path: str,
+    pheromone: Dict[str, Any],
+    new: List[Dict[str, Any]],
+    cache: SignalCache | None,
+    timings: Optional[Dict[str, float]] = None,
+) -> None:
+    start = time.perf_counter()
+    index = await ConsolidationIndex.load(path)
+    signals = pheromone.setdefault("signals", [])
+    if isinstance(signals, SignalTable):
+        signals = pheromone["signals"] = signals.to_dicts()
+    if not NEAR_DUPLICATES and isinstance(signals, list) and index.matches(signals):
+        index.begin(signals)
+        for sig in new:
+            index.add(signals, sig)
+        index.normalize(signals)
+    else:
+        signals = list(signals) + new
+        signals = consolidate_signals(signals)
+        signals = consolidate_duplicates(signals)
+        if NEAR_DUPLICATES:
+            signals = merge_near_duplicates(signals, NearDuplicateConfig.from_env())
+        pheromone["signals"] = normalize_strengths(signals)
+        index.rebuild(pheromone["signals"])
+    merged = time.perf_counter()
+    await save_pheromone(path, pheromone, cache)
+    try:
+        await index.save()
+    except OSError:
+        pass  # a stale index is detected by its stamp and rebuilt next time
+    done = completions(new)
+    if done:
+        try:
+            await asyncio.to_thread(release_completions, done)
+        except WorkloadError as exc:
+            raise PheromoneError("Unable to release workload") from exc
+    if timings is not None:
+        timings["consolidate"] = merged - start
+        timings["save"] = time.perf_counter() - merged
+
+
 async def update_pheromone(path: str, signal: Dict[str, Any], cache: SignalCache | None = None) -> None:
     """Update pheromone file with a sanitized signal."""
     pheromone = await load_pheromone(path, cache)
     context = sanitize_context(signal.get("context", {}))
     signal["context"] = context
-    pheromone.setdefault("signals", []).append(signal)
-    pheromone["signals"] = consolidate_signals(pheromone["signals"])
-    pheromone["signals"] = consolidate_duplicates(pheromone["signals"])
-    pheromone["signals"] = normalize_strengths(pheromone["signals"])
-    await save_pheromone(path, pheromone, cache)
+    await _merge_signals(path, pheromone, [signal], cache)
 
 
-async def batch_update_pheromone(path: str, signals: Iterable[Dict[str, Any]], cache: SignalCache | None = None) -> None:
-    """Apply a list of signals efficiently."""
+async def batch_update_pheromone(
+    path: str,
+    signals: Iterable[Dict[str, Any]],
+    cache: SignalCache | None = None,
+) -> Dict[str, float]:
+    """Apply a list of signals efficiently and return per-stage timings in seconds."""
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
     pheromone = await load_pheromone(path, cache)
-    sanitized = []
-    for sig in signals:
-        ctx = sanitize_context(sig.get("context", {}))
+    loaded = time.perf_counter()
+    sanitized = list(signals)
+    contexts = await sanitize_batch([sig.get("context", {}) for sig in sanitized])
+    for sig, ctx in zip(sanitized, contexts):
         sig["context"] = ctx
-        sanitized.append(sig)
-    pheromone.setdefault("signals", []).extend(sanitized)
-    pheromone["signals"] = consolidate_signals(pheromone["signals"])
-    pheromone["signals"] = consolidate_duplicates(pheromone["signals"])
-    pheromone["signals"] = normalize_strengths(pheromone["signals"])
-    await save_pheromone(path, pheromone, cache)
+    timings["load"] = loaded - start
+    timings["sanitize"] = time.perf_counter() - loaded
+    await _merge_signals(path, pheromone, sanitized, cache, timings)
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+async def _chunk_stream(
+    source: AsyncIterable[Dict[str, Any]],
+    queue: "asyncio.Queue[Any]",
+    max_signals: int,
+    max_bytes: int,
+    max_delay: float,
+) -> None:
+    iterator = source.__aiter__()
+    chunk: List[Dict[str, Any]] = []
+    size = 0
+    opened = 0.0
+    pending: Optional[asyncio.Future] = None
+
+    async def flush(reason: str) -> None:
+        nonlocal chunk, size
+        if chunk:
+            # put() blocks while max_pending chunks await commit: that is the backpressure.
+            await queue.put((chunk, size, reason))
+            chunk, size = [], 0
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(0.0, opened + max_delay - time.monotonic()) if chunk else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                await flush("time")
+                continue
+            finished, pending = pending, None
+            try:
+                sig = finished.result()
+            except StopAsyncIteration:
+                break
+            if not chunk:
+                opened = time.monotonic()
+            chunk.append(sig)
+            size += len(json.dumps(sig, default=str))
+            if len(chunk) >= max_signals:
+                await flush("count")
+            elif size >= max_bytes:
+                await flush("bytes")
+        await flush("end")
+        await queue.put(None)
+    except BaseException as exc:
+        if pending is not None:
+            pending.cancel()
+        if not isinstance(exc, asyncio.CancelledError):
+            await queue.put(exc)
+        raise
+
+
+async def stream_update_pheromone(
+    path: str,
+    source: AsyncIterable[Dict[str, Any]],
+    cache: SignalCache | None = None,
+    max_signals: int = 256,
+    max_bytes: int = 1 << 20,
+    max_delay: float = 1.0,
+    max_pending: int = 2,
+) -> AsyncIterator[ChunkAck]:
+    """Commit a signal stream in chunks, yielding one ChunkAck per commit."""
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_pending)
+    producer = asyncio.ensure_future(_chunk_stream(source, queue, max_signals, max_bytes, max_delay))
+    sequence = 0
+    try:
+        while True:
+            item: Optional[Tuple[List[Dict[str, Any]], int, str]] = await queue.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise PheromoneError("Signal stream failed") from item
+            chunk, size, reason = item
+            timings = await batch_update_pheromone(path, chunk, cache)
+            yield ChunkAck(sequence, len(chunk), size, reason, timings)
+            sequence += 1
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
 
 
 def consolidate_signals(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -116,7 +347,7 @@ def consolidate_signals(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         if consolidated and sig.get("context", {}).get(
             "modified_files"
         ) == consolidated[-1].get("context", {}).get("modified_files"):
-            consolidated[-1]["message"] += f"; {sig['message']}"
+            merge_messages(consolidated[-1], sig)
         else:
             consolidated.append(sig)
     return consolidated
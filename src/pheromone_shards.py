@@ -0,0 +1,150 @@
+import asyncio
+import os
+import re
+import zlib
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+
+try:
+    from src.pheromone_handler import PheromoneHandler, PheromoneHandlerError, _thaw, validate_structure
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from pheromone_handler import PheromoneHandler, PheromoneHandlerError, _thaw, validate_structure
+
+
+CATEGORIES = ("compass", "state", "need", "block", "coordinate")
+META_SHARD = "_meta"
+
+
+class ShardedPheromoneHandler:
+    """Pheromone backend that keeps each shard in its own file, lock and backup."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        shard_by: Optional[str] = None,
+        target_shards: Optional[int] = None,
+        **handler_options: Any,
+    ) -> None:
+        env_path = os.getenv("PHEROMONE_FILE", ".pheromone")
+        self.path = Path(path or env_path)
+        self.directory = self.path.with_name(self.path.name + ".shards")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shard_by = shard_by or os.getenv("PHEROMONE_SHARD_BY", "category")
+        if self.shard_by not in {"category", "target"}:
+            raise PheromoneHandlerError(f"Unknown shard key {self.shard_by}")
+        self.target_shards = target_shards or int(os.getenv("PHEROMONE_TARGET_SHARDS", "8"))
+        self._options = handler_options
+        self._handlers: Dict[str, PheromoneHandler] = {}
+
+    def shard_for(self, signal: Dict[str, Any]) -> str:
+        """Return the shard name that owns a signal."""
+        if self.shard_by == "target":
+            digest = zlib.crc32(str(signal.get("target") or "").encode("utf-8"))
+            return f"target-{digest % self.target_shards}"
+        return re.sub(r"[^\w-]", "_", str(signal.get("category") or "unknown"))
+
+    def handler(self, shard: str) -> PheromoneHandler:
+        handler = self._handlers.get(shard)
+        if handler is None:
+            handler = PheromoneHandler(str(self.directory / f"{shard}.pheromone"), **self._options)
+            self._handlers[shard] = handler
+        return handler
+
+    def shards(self) -> List[str]:
+        """Return every data shard present on disk or opened by this handler."""
+        names = {p.name[: -len(".pheromone")] for p in self.directory.glob("*.pheromone")}
+        names.update(self._handlers)
+        names.discard(META_SHARD)
+        return sorted(names)
+
+    def _known_shards(self) -> List[str]:
+        if self.shard_by == "target":
+            known = {f"target-{i}" for i in range(self.target_shards)}
+        else:
+            known = set(CATEGORIES)
+        return sorted(known.union(self.shards()))
+
+    def _partition(self, data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        parts: Dict[str, List[Dict[str, Any]]] = {}
+        for sig in data["signals"]:
+            parts.setdefault(self.shard_for(sig), []).append(sig)
+        return parts
+
+    @staticmethod
+    def _merge(meta: Optional[Dict[str, Any]], docs: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        merged = {k: v for k, v in (meta or {}).items() if k != "signals"}
+        signals = [sig for doc in docs if doc for sig in doc["signals"]]
+        signals.sort(key=lambda s: s.get("timestamp", 0))
+        merged["signals"] = signals
+        return merged
+
+    async def _read(self, view: bool) -> Optional[Dict[str, Any]]:
+        names = [META_SHARD] + self.shards()
+        if not any((self.directory / f"{n}.pheromone").exists() for n in names):
+            return None
+        reads = [
+            self.handler(n).read_view() if view else self.handler(n).read_safe()
+            for n in names
+        ]
+        meta, *docs = await asyncio.gather(*reads)
+        return self._merge(meta, docs)
+
+    async def read_view(self) -> Optional[Dict[str, Any]]:
+        """Return a merged document whose signals are read-only shard views."""
+        return await self._read(view=True)
+
+    async def read_safe(self) -> Optional[Dict[str, Any]]:
+        return await self._read(view=False)
+
+    async def write_safe(self, data: Dict[str, Any]) -> None:
+        validate_structure(data)
+        parts = self._partition(data)
+        meta = {k: v for k, v in data.items() if k != "signals"}
+        writes = [self.handler(META_SHARD).write_safe(dict(meta, signals=[]))]
+        for shard in sorted(set(self.shards()).union(parts)):
+            writes.append(self.handler(shard).write_safe({"signals": parts.get(shard, [])}))
+        await asyncio.gather(*writes)
+
+    async def add_signal(self, signal: Dict[str, Any]) -> None:
+        await self.handler(self.shard_for(signal)).add_signal(signal)
+
+    async def clear_signals_by_category(self, category: str) -> None:
+        if self.shard_by == "category":
+            shard = self.shard_for({"category": category})
+            if shard in self.shards():
+                await self.handler(shard).clear_signals_by_category(category)
+            return
+        await asyncio.gather(*(self.handler(s).clear_signals_by_category(category) for s in self.shards()))
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Lock every shard the merged document touches and rewrite only the shards that changed."""
+        async with AsyncExitStack() as stack:
+            docs: Dict[str, Dict[str, Any]] = {}
+
+            async def lock(name: str) -> None:
+                handler = self.handler(name)
+                await stack.enter_async_context(handler._lock())
+                docs[name] = _thaw(await asyncio.to_thread(handler._load)) or {"signals": []}
+
+            # Multi-shard transactions all take _meta first, so it serialises them
+            # and shards first seen on commit can still be locked before any write.
+            for name in [META_SHARD] + self._known_shards():
+                await lock(name)
+            merged = self._merge(docs[META_SHARD], [doc for name, doc in docs.items() if name != META_SHARD])
+            yield merged
+            validate_structure(merged)
+            parts = self._partition(merged)
+            for name in sorted(set(parts).difference(docs)):
+                await lock(name)
+            meta = {k: v for k, v in merged.items() if k != "signals"}
+            for name, doc in docs.items():
+                new = dict(meta, signals=[]) if name == META_SHARD else dict(doc, signals=parts.get(name, []))
+                if new != doc:
+                    handler = self.handler(name)
+                    await handler._write_locked(handler._serialize(new), new)
+
+    async def update(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        async with self.transaction() as data:
+            return fn(data)
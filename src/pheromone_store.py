@@ -0,0 +1,247 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    from src.pheromone_handler import PheromoneHandler, PheromoneHandlerError, validate_structure
+    from src.pheromone_shards import ShardedPheromoneHandler
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from pheromone_handler import PheromoneHandler, PheromoneHandlerError, validate_structure
+    from pheromone_shards import ShardedPheromoneHandler
+
+
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    signal_type TEXT,
+    category TEXT,
+    target TEXT,
+    strength REAL,
+    timestamp INTEGER,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_signals_category ON signals(category);
+CREATE INDEX IF NOT EXISTS idx_signals_target ON signals(target);
+CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals(timestamp);
+CREATE INDEX IF NOT EXISTS idx_signals_strength ON signals(strength);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class PheromoneStoreError(PheromoneHandlerError):
+    """Raised when the SQLite pheromone store fails."""
+
+
+def _row(sig: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        str(sig.get("id")),
+        sig.get("signalType"),
+        sig.get("category"),
+        sig.get("target"),
+        sig.get("strength"),
+        sig.get("timestamp"),
+        json.dumps(sig, ensure_ascii=False, separators=(",", ":")),
+    )
+
+
+class SQLitePheromoneStore:
+    """Pheromone backend on SQLite in WAL mode with indexed signal queries."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        env_path = os.getenv("PHEROMONE_DB", ".pheromone.db")
+        self.path = Path(path or env_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._mutex = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._open()
+        return self._conn
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        def call() -> Any:
+            with self._mutex:
+                conn = self._connect()
+                try:
+                    return fn(conn)
+                except sqlite3.Error as exc:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise PheromoneStoreError("SQLite operation failed") from exc
+
+        return await asyncio.to_thread(call)
+
+    @staticmethod
+    def _fetch(conn: sqlite3.Connection, sql: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        return [json.loads(body) for (body,) in conn.execute(sql, tuple(params))]
+
+    @staticmethod
+    def _load(conn: sqlite3.Connection) -> Dict[str, Any]:
+        data: Dict[str, Any] = {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+        data["signals"] = SQLitePheromoneStore._fetch(conn, "SELECT body FROM signals ORDER BY seq")
+        return data
+
+    @staticmethod
+    def _replace(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
+        conn.execute("DELETE FROM signals")
+        conn.execute("DELETE FROM meta")
+        conn.executemany(
+            "INSERT INTO signals (id, signal_type, category, target, strength, timestamp, body)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [_row(sig) for sig in data["signals"]],
+        )
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in data.items() if k != "signals"],
+        )
+
+    async def read_safe(self) -> Optional[Dict[str, Any]]:
+        if not self.path.exists():
+            return None
+        return await self._run(self._load)
+
+    read_view = read_safe
+
+    async def write_safe(self, data: Dict[str, Any]) -> None:
+        validate_structure(data)
+
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute("BEGIN IMMEDIATE")
+            self._replace(conn, data)
+            conn.execute("COMMIT")
+
+        await self._run(write)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield the whole document under the database write lock and replace it on exit."""
+        try:
+            conn = await asyncio.to_thread(self._open)
+        except sqlite3.Error as exc:
+            raise PheromoneStoreError("SQLite transaction failed") from exc
+        try:
+            def begin() -> Dict[str, Any]:
+                conn.execute("BEGIN IMMEDIATE")
+                return self._load(conn)
+
+            def commit() -> None:
+                self._replace(conn, data)
+                conn.execute("COMMIT")
+
+            try:
+                data = await asyncio.to_thread(begin)
+                yield data
+                validate_structure(data)
+                await asyncio.to_thread(commit)
+            except sqlite3.Error as exc:
+                raise PheromoneStoreError("SQLite transaction failed") from exc
+            finally:
+                if conn.in_transaction:
+                    await asyncio.to_thread(conn.execute, "ROLLBACK")
+        finally:
+            await asyncio.to_thread(conn.close)
+
+    async def update(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        async with self.transaction() as data:
+            return fn(data)
+
+    async def add_signals(self, signals: List[Dict[str, Any]]) -> None:
+        """Insert signals in one transaction without touching existing rows."""
+        validate_structure({"signals": signals})
+
+        def insert(conn: sqlite3.Connection) -> None:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO signals (id, signal_type, category, target, strength, timestamp, body)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [_row(sig) for sig in signals],
+            )
+            conn.execute("COMMIT")
+
+        await self._run(insert)
+
+    async def add_signal(self, signal: Dict[str, Any]) -> None:
+        await self.add_signals([signal])
+
+    async def clear_signals_by_category(self, category: str) -> int:
+        return await self._run(lambda conn: conn.execute("DELETE FROM signals WHERE category = ?", (category,)).rowcount)
+
+    async def delete_older_than(self, timestamp: int) -> int:
+        """Delete signals created before timestamp and return how many were removed."""
+        return await self._run(lambda conn: conn.execute("DELETE FROM signals WHERE timestamp < ?", (timestamp,)).rowcount)
+
+    async def signals_by_category(self, category: str) -> List[Dict[str, Any]]:
+        sql = "SELECT body FROM signals WHERE category = ? ORDER BY seq"
+        return await self._run(lambda conn: self._fetch(conn, sql, (category,)))
+
+    async def signals_by_target(self, target: str) -> List[Dict[str, Any]]:
+        sql = "SELECT body FROM signals WHERE target = ? ORDER BY seq"
+        return await self._run(lambda conn: self._fetch(conn, sql, (target,)))
+
+    async def signals_between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Return signals with start <= timestamp <= end in time order."""
+        sql = "SELECT body FROM signals WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp, seq"
+        return await self._run(lambda conn: self._fetch(conn, sql, (start, end)))
+
+    async def strongest(self, limit: int = 1, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the strongest signals, optionally within one category."""
+        if category is None:
+            sql, params = "SELECT body FROM signals ORDER BY strength DESC, seq LIMIT ?", (limit,)
+        else:
+            sql = "SELECT body FROM signals WHERE category = ? ORDER BY strength DESC, seq LIMIT ?"
+            params = (category, limit)  # type: ignore[assignment]
+        return await self._run(lambda conn: self._fetch(conn, sql, params))
+
+    async def count(self, category: Optional[str] = None) -> int:
+        if category is None:
+            return await self._run(lambda conn: conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0])
+        sql = "SELECT COUNT(*) FROM signals WHERE category = ?"
+        return await self._run(lambda conn: conn.execute(sql, (category,)).fetchone()[0])
+
+    async def import_json(self, path: str) -> int:
+        """Replace the store contents with a ``.pheromone`` JSON file."""
+        data = await PheromoneHandler(path).read_safe()
+        if data is None:
+            raise PheromoneStoreError(f"Unable to import {path}")
+        await self.write_safe(data)
+        return len(data["signals"])
+
+    async def export_json(self, path: str) -> int:
+        """Write the store contents to a ``.pheromone`` JSON file."""
+        data = await self.read_safe() or {"signals": []}
+        await PheromoneHandler(path).write_safe(data)
+        return len(data["signals"])
+
+    def close(self) -> None:
+        with self._mutex:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def open_pheromone_store(
+    path: Optional[str] = None,
+) -> Union[PheromoneHandler, ShardedPheromoneHandler, SQLitePheromoneStore]:
+    """Return the SQLite, sharded or single-file store that suits path."""
+    target = Path(path or os.getenv("PHEROMONE_FILE", ".pheromone"))
+    if target.suffix in SQLITE_SUFFIXES:
+        return SQLitePheromoneStore(str(target))
+    if os.getenv("PHEROMONE_SHARD_BY"):
+        return ShardedPheromoneHandler(str(target))
+    return PheromoneHandler(str(target))
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import stat
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+# Snapshot file layout:
+#   MAGIC | >I stamp length | stamp JSON | marshal payload
+# The stamp is the generation of the source (inode, size, mtime_ns of the
+# snapshot and its log); a reader only trusts the payload when the stamp
+# matches the source files it is about to read.
+MAGIC = b"PHSC\x01"
+_LENGTH = struct.Struct(">I")
+# marshal is not safe against crafted input, so snapshots are only trusted
+# when they and their directory are ours and nobody else can write them.
+_FOREIGN_WRITE = stat.S_IWGRP | stat.S_IWOTH
+
+
+class SharedCacheError(Exception):
+    """Raised when a shared snapshot cannot be written."""
+
+
+class SharedSnapshotCache:
+    """Cross-process cache of parsed pheromone documents kept in mmap-able files."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        env_dir = os.getenv("PHEROMONE_SHARED_CACHE_DIR")
+        self.directory = Path(directory or env_dir or Path(".swarm") / "cache")
+
+    def path_for(self, source: str) -> Path:
+        digest = hashlib.blake2b(source.encode("utf-8"), digest_size=10).hexdigest()
+        return self.directory / f"{digest}.snap"
+
+    @staticmethod
+    def _private(info: os.stat_result) -> bool:
+        return info.st_uid == os.geteuid() and not info.st_mode & _FOREIGN_WRITE
+
+    @staticmethod
+    def _encode_stamp(stamp: Any) -> bytes:
+        return json.dumps(stamp, separators=(",", ":")).encode("utf-8")
+
+    def load(self, source: str, stamp: Any) -> Any:
+        """Return the cached document for source when it was stored at stamp, else None."""
+        try:
+            if not self._private(os.stat(self.directory)):
+                return None
+            fd = os.open(self.path_for(source), os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return None
+        try:
+            info = os.fstat(fd)
+            if not stat.S_ISREG(info.st_mode) or not self._private(info):
+                return None
+            size = info.st_size
+            if size <= len(MAGIC) + _LENGTH.size:
+                return None
+            with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as view:
+                if view[: len(MAGIC)] != MAGIC:
+                    return None
+                (length,) = _LENGTH.unpack_from(view, len(MAGIC))
+                start = len(MAGIC) + _LENGTH.size
+                if view[start:start + length] != self._encode_stamp(stamp):
+                    return None
+                payload = memoryview(view)[start + length:]
+                try:
+                    return marshal.loads(payload)
+                except (EOFError, ValueError, TypeError):
+                    return None
+                finally:
+                    payload.release()
+        except (OSError, ValueError):
+            return None
+        finally:
+            os.close(fd)
+
+    def store(self, source: str, stamp: Any, data: Any) -> None:
+        """Atomically publish data for source, stamped with the generation it was read at."""
+        try:
+            payload = marshal.dumps(data)
+        except ValueError as exc:
+            raise SharedCacheError("Document is not marshallable") from exc
+        encoded = self._encode_stamp(stamp)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+            private = self._private(os.stat(self.directory))
+        except OSError as exc:
+            raise SharedCacheError("Unable to create shared cache directory") from exc
+        if not private:
+            raise SharedCacheError(f"{self.directory} is writable by other users")
+        fd, tmp = tempfile.mkstemp(dir=str(self.directory), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(MAGIC + _LENGTH.pack(len(encoded)) + encoded + payload)
+            os.replace(tmp, self.path_for(source))
+        except OSError as exc:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise SharedCacheError("Unable to publish shared snapshot") from exc
+
+    def discard(self, source: str) -> None:
+        try:
+            os.unlink(self.path_for(source))
+        except FileNotFoundError:
+            pass
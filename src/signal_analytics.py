@@ -1,8 +1,11 @@
-import asyncio
 import json
-from pathlib import Path
 from typing import Any, Dict, List
 
+try:
+    from src.file_pool import FILE_POOL
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from file_pool import FILE_POOL
+
 
 class AnalyticsError(Exception):
     """Raised when analytics processing fails."""
@@ -11,8 +14,7 @@ class AnalyticsError(Exception):
 async def load_analytics(path: str) -> Dict[str, Any]:
     """Load analytics data asynchronously."""
     try:
-        text = await asyncio.to_thread(Path(path).read_text)
-        return json.loads(text)
+        return json.loads(await FILE_POOL.read_bytes(path))
     except (OSError, json.JSONDecodeError) as exc:
         raise AnalyticsError("Invalid analytics file") from exc
 
@@ -20,7 +22,7 @@ async def load_analytics(path: str) -> Dict[str, Any]:
 async def save_analytics(path: str, data: Dict[str, Any]) -> None:
     """Persist analytics data."""
     try:
-        await asyncio.to_thread(Path(path).write_text, json.dumps(data, indent=2))
+        await FILE_POOL.write(path, json.dumps(data, indent=2))
     except OSError as exc:
         raise AnalyticsError("Unable to save analytics") from exc
 
@@ -1,10 +1,20 @@
 from __future__ import annotations
 import asyncio
 import os
+import sys
 import time
+import weakref
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Awaitable
 
+try:
+    from src.signal_table import SignalTable
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from signal_table import SignalTable
+
 
 class SignalCacheError(Exception):
     """Raised when cache operations fail."""
@@ -14,38 +24,446 @@ class SignalCacheError(Exception):
 class _Entry:
     data: List[Dict[str, Any]]
     timestamp: float
+    size: int = 0
+
+
+SIZE_SAMPLE = 32
+
+
+def estimate_size(value: Any, sample: int = SIZE_SAMPLE) -> int:
+    """Approximate the memory held by a JSON-like value in bytes."""
+    seen = set()
+    stack = [(value, 1.0)]
+    total = 0.0
+    while stack:
+        item, weight = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, SignalTable):
+            total += item.nbytes(lambda extras: estimate_size(extras, sample)) * weight
+            continue
+        total += sys.getsizeof(item) * weight
+        if isinstance(item, dict):
+            stack.extend((key, weight) for key in item.keys())
+            stack.extend((val, weight) for val in item.values())
+        elif isinstance(item, (list, tuple)):
+            # Long lists are measured on evenly spaced items and scaled up, so
+            # every set/load costs the same however many signals a file holds.
+            if len(item) > sample:
+                step = len(item) / sample
+                scaled = weight * step
+                stack.extend((item[int(i * step)], scaled) for i in range(sample))
+            else:
+                stack.extend((val, weight) for val in item)
+    return int(total)
+
+
+# Upper bounds in seconds; a final overflow bucket catches everything slower.
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+OPERATIONS = ("get", "set", "persist", "load")
+HIT_WINDOWS = (60, 300)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; recording only bumps preallocated counters."""
+
+    __slots__ = ("counts", "total", "maximum")
+
+    def __init__(self) -> None:
+        self.counts = array("Q", [0]) * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding quantile q."""
+        count = sum(self.counts)
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return LATENCY_BUCKETS[idx] if idx < len(LATENCY_BUCKETS) else self.maximum
+        return self.maximum
+
+    def snapshot(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        return {
+            "count": count,
+            "sum": self.total,
+            "max": self.maximum,
+            "mean": self.total / count if count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], self.counts)),
+        }
+
+
+class _HitWindow:
+    """Per-second hit/miss ring covering the longest sliding window."""
+
+    __slots__ = ("hits", "misses", "second")
+
+    def __init__(self, span: int) -> None:
+        self.hits = array("L", [0]) * span
+        self.misses = array("L", [0]) * span
+        self.second = int(time.monotonic())
+
+    def _advance(self) -> int:
+        now = int(time.monotonic())
+        span = len(self.hits)
+        if now != self.second:
+            for sec in range(self.second + 1, min(now, self.second + span) + 1):
+                self.hits[sec % span] = 0
+                self.misses[sec % span] = 0
+            self.second = now
+        return now % span
+
+    def record(self, hit: bool) -> None:
+        now = int(time.monotonic())
+        slot = now % len(self.hits) if now == self.second else self._advance()
+        if hit:
+            self.hits[slot] += 1
+        else:
+            self.misses[slot] += 1
+
+    def ratio(self, window: int) -> float:
+        now = self._advance()
+        span = len(self.hits)
+        slots = [(now - i) % span for i in range(min(window, span))]
+        hits = sum(self.hits[i] for i in slots)
+        total = hits + sum(self.misses[i] for i in slots)
+        return hits / total if total else 0.0
+
+
+async def _sweep(ref: "weakref.ref[SignalCache]", interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        cache = ref()
+        if cache is None:
+            return
+        cache.purge_expired()
+        del cache
 
 
 class SignalCache:
-    """In-memory TTL cache with write-through persistence."""
+    """In-memory LRU/TTL cache bounded by entry count and estimated bytes, with write-through persistence."""
 
-    def __init__(self, ttl: int | None = None, persist: Callable[[str, List[Dict[str, Any]]], Awaitable[None]] | None = None) -> None:
+    def __init__(
+        self,
+        ttl: int | None = None,
+        persist: Callable[[str, List[Dict[str, Any]]], Awaitable[None]] | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        sweep_interval: float | None = None,
+        stale_ttl: float | None = None,
+        negative_ttl: float | None = None,
+        write_behind: bool | None = None,
+        max_pending: int | None = None,
+        on_persist_error: Callable[[str, Exception], Any] | None = None,
+        instrument: bool | None = None,
+    ) -> None:
         self.ttl = ttl or int(os.getenv("SIGNAL_CACHE_TTL", "60"))
         self.persist = persist or (lambda _k, _v: asyncio.sleep(0))
-        self._cache: Dict[str, _Entry] = {}
-        self._metrics: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0}
+        self.max_entries = max_entries or int(os.getenv("SIGNAL_CACHE_MAX_ENTRIES", "1024"))
+        self.max_bytes = max_bytes or int(os.getenv("SIGNAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.sweep_interval = sweep_interval or float(os.getenv("SIGNAL_CACHE_SWEEP", str(self.ttl)))
+        self.stale_ttl = float(os.getenv("SIGNAL_CACHE_STALE", "0")) if stale_ttl is None else stale_ttl
+        self.negative_ttl = float(os.getenv("SIGNAL_CACHE_NEGATIVE_TTL", "5")) if negative_ttl is None else negative_ttl
+        if write_behind is None:
+            write_behind = os.getenv("SIGNAL_CACHE_WRITE_BEHIND", "").lower() in {"1", "true", "yes"}
+        self.write_behind = write_behind
+        self.max_pending = max_pending or int(os.getenv("SIGNAL_CACHE_MAX_PENDING", "256"))
+        self.on_persist_error = on_persist_error
+        if instrument is None:
+            instrument = os.getenv("SIGNAL_CACHE_INSTRUMENT", "1") != "0"
+        self.instrument = instrument
+        self._latency = {op: LatencyHistogram() for op in OPERATIONS}
+        self._key_latency: "OrderedDict[str, Dict[str, LatencyHistogram]]" = OrderedDict()
+        self._window = _HitWindow(max(HIT_WINDOWS))
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._persisting = 0
+        self._cond: asyncio.Condition | None = None
+        self._writer: asyncio.Task | None = None
+        self._missing: Dict[str, float] = {}
+        self._loads: Dict[str, asyncio.Future] = {}
+        self._bytes = 0
+        self._sweeper: asyncio.Task | None = None
+        self._metrics: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "persists": 0,
+            "coalesced_writes": 0,
+            "persist_errors": 0,
+            "persist_callback_errors": 0,
+        }
+
+    def _observe(self, op: str, key: str, start: float) -> None:
+        if not self.instrument:
+            return
+        elapsed = time.perf_counter() - start
+        self._latency[op].record(elapsed)
+        per_key = self._key_latency.get(key)
+        if per_key is None:
+            per_key = self._key_latency[key] = {}
+            # Per-key histograms are kept for at most max_entries keys.
+            while len(self._key_latency) > self.max_entries:
+                self._key_latency.popitem(last=False)
+        else:
+            self._key_latency.move_to_end(key)
+        hist = per_key.get(op)
+        if hist is None:
+            hist = per_key[op] = LatencyHistogram()
+        hist.record(elapsed)
+
+    def _count(self, name: str) -> None:
+        self._metrics[name] += 1
+        if self.instrument and name in ("hits", "stale_hits", "misses"):
+            self._window.record(name != "misses")
+
+    def _start_sweeper(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._sweeper is not None and not self._sweeper.done() and self._sweeper.get_loop() is loop:
+            return
+        self._sweeper = loop.create_task(_sweep(weakref.ref(self), self.sweep_interval))
+
+    def _drop(self, key: str) -> _Entry | None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _evict(self) -> None:
+        while self._cache and (len(self._cache) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._cache)))
+            self._metrics["evictions"] += 1
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry and return how many were removed."""
+        cutoff = time.time() - self.ttl - self.stale_ttl
+        expired = [key for key, entry in self._cache.items() if entry.timestamp <= cutoff]
+        for key in expired:
+            self._drop(key)
+        self._metrics["expirations"] += len(expired)
+        return len(expired)
 
     async def get(self, key: str) -> List[Dict[str, Any]]:
-        entry = self._cache.get(key)
-        now = time.time()
-        if entry and now - entry.timestamp < self.ttl:
-            self._metrics["hits"] += 1
-            return entry.data
-        if entry:
-            self._cache.pop(key, None)
-        self._metrics["misses"] += 1
-        raise SignalCacheError("Cache miss")
+        start = time.perf_counter()
+        try:
+            entry = self._cache.get(key)
+            now = time.time()
+            if entry and now - entry.timestamp < self.ttl:
+                self._count("hits")
+                self._cache.move_to_end(key)
+                return entry.data
+            if entry and now - entry.timestamp >= self.ttl + self.stale_ttl:
+                self._drop(key)
+                self._metrics["expirations"] += 1
+            self._count("misses")
+            raise SignalCacheError("Cache miss")
+        finally:
+            self._observe("get", key, start)
+
+    def _store(self, key: str, value: List[Dict[str, Any]]) -> None:
+        self._drop(key)
+        self._missing.pop(key, None)
+        entry = _Entry(value, time.time(), estimate_size(value))
+        self._cache[key] = entry
+        self._bytes += entry.size
+        self._evict()
+        self._start_sweeper()
+
+    def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = self._loads.get(key)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            self._metrics["coalesced"] += 1
+            return future
+        started = time.time()
+
+        async def run() -> Any:
+            load_start = time.perf_counter()
+            try:
+                value = await loader()
+            except FileNotFoundError:
+                if self.negative_ttl > 0:
+                    self._missing[key] = time.time() + self.negative_ttl
+                raise
+            finally:
+                self._observe("load", key, load_start)
+            current = self._cache.get(key)
+            if current is not None and current.timestamp > started:
+                return current.data  # a set() landed while loading; it is newer
+            self._store(key, value)
+            return value
+
+        self._metrics["loads"] += 1
+        future = asyncio.ensure_future(run())
+        self._loads[key] = future
+        future.add_done_callback(lambda f: self._loads.pop(key) if self._loads.get(key) is f else None)
+        # Background refreshes may finish with nobody awaiting them.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return future
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value or load it once for all concurrent callers."""
+        start = time.perf_counter()
+        try:
+            entry = self._cache.get(key)
+            now = time.time()
+            if entry is not None:
+                age = now - entry.timestamp
+                if age < self.ttl:
+                    self._count("hits")
+                    self._cache.move_to_end(key)
+                    return entry.data
+                if age < self.ttl + self.stale_ttl:
+                    self._count("stale_hits")
+                    self._cache.move_to_end(key)
+                    self._load(key, loader)
+                    return entry.data
+            missing_until = self._missing.get(key)
+            if missing_until is not None:
+                if missing_until > now:
+                    self._metrics["negative_hits"] += 1
+                    raise FileNotFoundError(key)
+                del self._missing[key]
+            self._count("misses")
+            return await asyncio.shield(self._load(key, loader))
+        finally:
+            self._observe("get", key, start)
 
     async def set(self, key: str, value: List[Dict[str, Any]]) -> None:
-        self._cache[key] = _Entry(value, time.time())
-        self._metrics["writes"] += 1
+        start = time.perf_counter()
+        try:
+            self._store(key, value)
+            self._metrics["writes"] += 1
+            if self.write_behind:
+                await self._enqueue(key, value)
+                return
+            try:
+                await self._persist(key, value)
+            except Exception as exc:  # noqa: BLE001
+                raise SignalCacheError("Persist failed") from exc
+        finally:
+            self._observe("set", key, start)
+
+    async def _persist(self, key: str, value: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
         try:
             await self.persist(key, value)
-        except Exception as exc:  # noqa: BLE001
-            raise SignalCacheError("Persist failed") from exc
+        finally:
+            self._observe("persist", key, start)
+        self._metrics["persists"] += 1
+
+    def _bind(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._writer is None or self._writer.get_loop() is not loop:
+            self._cond = asyncio.Condition()
+            self._persisting = 0
+            self._writer = loop.create_task(self._write_loop(self._cond))
+        elif self._writer.done():
+            # The writer died (cancelled or crashed); restart it on the same queue.
+            self._writer = loop.create_task(self._write_loop(self._cond))
+        return self._cond
+
+    async def _enqueue(self, key: str, value: List[Dict[str, Any]]) -> None:
+        cond = self._bind()
+        async with cond:
+            if key in self._pending:
+                self._pending[key] = value
+                self._metrics["coalesced_writes"] += 1
+                return
+            # Backpressure: block the writer of a new key while the queue is full.
+            await cond.wait_for(lambda: len(self._pending) < self.max_pending)
+            if key in self._pending:
+                self._metrics["coalesced_writes"] += 1
+            self._pending[key] = value
+            cond.notify_all()
+
+    async def _write_loop(self, cond: asyncio.Condition) -> None:
+        while True:
+            async with cond:
+                await cond.wait_for(lambda: bool(self._pending))
+                key = next(iter(self._pending))
+                value = self._pending.pop(key)
+                self._persisting += 1
+                cond.notify_all()
+            try:
+                await self._persist(key, value)
+            except Exception as exc:  # noqa: BLE001
+                self._metrics["persist_errors"] += 1
+                if self.on_persist_error is not None:
+                    try:
+                        self.on_persist_error(key, exc)
+                    except Exception:  # noqa: BLE001 - a failing callback must not kill the writer
+                        self._metrics["persist_callback_errors"] += 1
+            finally:
+                async with cond:
+                    self._persisting -= 1
+                    cond.notify_all()
+
+    async def flush(self) -> None:
+        """Wait until every queued write-behind persist has completed."""
+        if self._cond is None:
+            return
+        cond = self._bind()
+        async with cond:
+            await cond.wait_for(lambda: not self._pending and not self._persisting)
 
     def invalidate(self, key: str) -> None:
-        self._cache.pop(key, None)
+        self._drop(key)
+        self._missing.pop(key, None)
 
     def metrics(self) -> Dict[str, int]:
-        return dict(self._metrics)
+        out = dict(self._metrics)
+        out["entries"] = len(self._cache)
+        out["bytes"] = self._bytes
+        return out
+
+    def hit_ratio(self, window: int = HIT_WINDOWS[0]) -> float:
+        """Return the hit ratio over the last window seconds (stale hits count as hits)."""
+        return self._window.ratio(window)
+
+    def snapshot(self, per_key: bool = True) -> Dict[str, Any]:
+        """Export counters, latency histograms and windowed hit ratios."""
+        out: Dict[str, Any] = {
+            "counters": self.metrics(),
+            "latency": {op: hist.snapshot() for op, hist in self._latency.items()},
+            "hit_ratio": {f"{w}s": self.hit_ratio(w) for w in HIT_WINDOWS},
+        }
+        if per_key:
+            out["keys"] = {
+                key: {op: hist.snapshot() for op, hist in hists.items()}
+                for key, hists in self._key_latency.items()
+            }
+        return out
+
+    async def aclose(self) -> None:
+        """Flush pending writes and stop the background tasks."""
+        await self.flush()
+        for task in (self._writer, self._sweeper):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._writer = self._sweeper = None
+        self._cond = None
@@ -0,0 +1,478 @@
+import heapq
+import json
+import os
+import time
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from src.file_pool import FILE_POOL
+    from src.signal_optimizer import effective_strength
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from file_pool import FILE_POOL
+    from signal_optimizer import effective_strength
+
+
+class SignalIndexError(Exception):
+    """Raised when a signal index is queried, updated or restored incorrectly."""
+
+
+# Strength order keys are (-ceiling, seq, uid) so ascending order is strongest
+# first and ties keep insertion order, matching a stable sort of the signal list.
+# The ceiling is the strength a signal can still reach: its stored strength, or
+# the origin of its lazy decay, floored like effective_strength.
+_Rank = Tuple[float, int, str]
+_Time = Tuple[float, int, str]
+Router = Callable[[Dict[str, Any]], Optional[str]]
+
+# Live indexes keyed by resolved pheromone path. Handlers hold the strong
+# reference, so an index disappears with the last handler that asked for it.
+_ATTACHED: "weakref.WeakValueDictionary[str, SignalIndex]" = weakref.WeakValueDictionary()
+
+
+def signal_uid(sig: Dict[str, Any]) -> str:
+    """Return the identity a signal is indexed under."""
+    uid = sig.get("id")
+    if uid is not None:
+        return str(uid)
+    return json.dumps(
+        [sig.get("signalType"), sig.get("category"), sig.get("target"), sig.get("timestamp"), sig.get("message")],
+        default=str,
+    )
+
+
+def _row_keys(signals: Iterable[Dict[str, Any]], seen: Optional[Dict[str, int]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield a distinct key per row; repeats of a uid get an occurrence suffix."""
+    seen = {} if seen is None else seen
+    for sig in signals:
+        uid = signal_uid(sig)
+        count = seen.get(uid, 0)
+        seen[uid] = count + 1
+        yield (f"{uid}\x00{count}" if count else uid), sig
+
+
+def _stat_id(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def pheromone_stamp(path: str) -> Tuple[Optional[List[int]], Optional[List[int]]]:
+    """Return the generation of a pheromone file and its log, as PheromoneHandler stamps it."""
+    return _stat_id(path), _stat_id(path + ".wal")
+
+
+def attached_index(key: str) -> Optional["SignalIndex"]:
+    """Return the live index kept for a resolved pheromone path, if any."""
+    return _ATTACHED.get(key)
+
+
+def attach_index(key: str, index: "SignalIndex") -> None:
+    _ATTACHED[key] = index
+
+
+class _SortedList:
+    """Sorted sequence split into bounded sublists, so updates never shift the whole view."""
+
+    LOAD = 256
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        ordered = sorted(items)
+        self._lists = [ordered[i:i + self.LOAD] for i in range(0, len(ordered), self.LOAD)]
+        self._maxes = [sub[-1] for sub in self._lists]
+        self._len = len(ordered)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        for sub in self._lists:
+            yield from sub
+
+    def add(self, value: Any) -> None:
+        if not self._maxes:
+            self._lists.append([value])
+            self._maxes.append(value)
+        else:
+            pos = bisect_left(self._maxes, value)
+            if pos == len(self._maxes):
+                pos -= 1
+                self._lists[pos].append(value)
+                self._maxes[pos] = value
+            else:
+                insort(self._lists[pos], value)
+            sub = self._lists[pos]
+            if len(sub) > 2 * self.LOAD:
+                half = sub[self.LOAD:]
+                del sub[self.LOAD:]
+                self._maxes[pos] = sub[-1]
+                self._lists.insert(pos + 1, half)
+                self._maxes.insert(pos + 1, half[-1])
+        self._len += 1
+
+    def discard(self, value: Any) -> None:
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return
+        sub = self._lists[pos]
+        idx = bisect_left(sub, value)
+        if idx == len(sub) or sub[idx] != value:
+            return
+        del sub[idx]
+        self._len -= 1
+        if sub:
+            self._maxes[pos] = sub[-1]
+        else:
+            del self._lists[pos]
+            del self._maxes[pos]
+
+    def irange(self, lo: Any, hi: Any) -> Iterator[Any]:
+        """Yield values with lo <= value <= hi in order."""
+        pos = bisect_left(self._maxes, lo)
+        if pos == len(self._maxes):
+            return
+        start = bisect_left(self._lists[pos], lo)
+        for sub in self._lists[pos:]:
+            end = bisect_right(sub, hi)
+            yield from sub[start:end]
+            if end < len(sub):
+                return
+            start = 0
+
+
+class _Row:
+    __slots__ = ("sig", "rank", "stamp", "buckets", "agent")
+
+    def __init__(self, sig: Dict[str, Any], rank: _Rank, stamp: _Time, buckets: Tuple[str, str], agent: Optional[str]) -> None:
+        self.sig = sig
+        self.rank = rank
+        self.stamp = stamp
+        self.buckets = buckets
+        self.agent = agent
+
+
+class SignalIndex:
+    """Sorted per-category, per-target and timestamp views over a signal set, with optional routing."""
+
+    VERSION = 3
+
+    def __init__(self, router: Optional[Router] = None) -> None:
+        self.router = router
+        # Generation of the pheromone this index reflects; None when unknown.
+        self.stamp: Any = None
+        self._rows: Dict[str, _Row] = {}
+        self._all = _SortedList()
+        self._by_category: Dict[str, _SortedList] = {}
+        self._by_target: Dict[str, _SortedList] = {}
+        self._by_time = _SortedList()
+        # Max-heap of routable rows, [-ceiling, seq, uid, agent]; replaced entries
+        # stay until they surface or the heap is compacted.
+        self._routes: List[List[Any]] = []
+        self._route_entries: Dict[str, List[Any]] = {}
+        self._seq = 0
+        self._occurrences: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, uid: object) -> bool:
+        return uid in self._rows
+
+    @staticmethod
+    def _strength(sig: Dict[str, Any]) -> float:
+        value = sig.get("strength", 0)
+        strength = float(value) if isinstance(value, (int, float)) else 0.0
+        decay = sig.get("decay")
+        if decay:
+            strength = max(strength, 0.1, float(decay.get("initial", 0)))
+        return strength
+
+    @staticmethod
+    def _timestamp(sig: Dict[str, Any]) -> float:
+        value = sig.get("timestamp", 0)
+        return float(value) if isinstance(value, (int, float)) else 0.0
+
+    @staticmethod
+    def _buckets(sig: Dict[str, Any]) -> Tuple[str, str]:
+        return sig.get("category") or "unknown", sig.get("target") or "global"
+
+    def _views(self, buckets: Tuple[str, str]) -> List[_SortedList]:
+        category, target = buckets
+        return [
+            self._all,
+            self._by_category.setdefault(category, _SortedList()),
+            self._by_target.setdefault(target, _SortedList()),
+        ]
+
+    def _push_route(self, uid: str, rank: _Rank, agent: Optional[str]) -> None:
+        if agent is None:
+            return
+        entry = [rank[0], rank[1], uid, agent]
+        self._route_entries[uid] = entry
+        heapq.heappush(self._routes, entry)
+        if len(self._routes) > 2 * len(self._route_entries) + 64:
+            self._routes = list(self._route_entries.values())
+            heapq.heapify(self._routes)
+
+    def _insert(self, uid: str, sig: Dict[str, Any], seq: int, agent: Optional[str]) -> None:
+        rank = (-self._strength(sig), seq, uid)
+        row = _Row(sig, rank, (self._timestamp(sig), seq, uid), self._buckets(sig), agent)
+        self._rows[uid] = row
+        for view in self._views(row.buckets):
+            view.add(rank)
+        self._by_time.add(row.stamp)
+        self._push_route(uid, rank, agent)
+
+    def add(self, sig: Dict[str, Any], uid: Optional[str] = None) -> str:
+        """Index a signal, replacing any entry with the same uid."""
+        uid = signal_uid(sig) if uid is None else uid
+        if uid in self._rows:
+            self.remove(uid)
+        self._seq += 1
+        self._insert(uid, sig, self._seq, self.router(sig) if self.router else None)
+        return uid
+
+    def extend(self, signals: Iterable[Dict[str, Any]]) -> None:
+        """Index rows appended after the ones already indexed."""
+        for uid, sig in _row_keys(signals, self._occurrences):
+            self.add(sig, uid)
+
+    def remove(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Drop a signal by uid and return it, or None when it is not indexed."""
+        row = self._rows.pop(uid, None)
+        if row is None:
+            return None
+        for view in self._views(row.buckets):
+            view.discard(row.rank)
+        self._by_time.discard(row.stamp)
+        self._route_entries.pop(uid, None)
+        category, target = row.buckets
+        for buckets, name in ((self._by_category, category), (self._by_target, target)):
+            if not buckets.get(name):
+                buckets.pop(name, None)
+        return row.sig
+
+    def update_strength(self, uid: str, strength: float) -> None:
+        """Re-rank a signal after its strength changed, keeping its tie-break position."""
+        row = self._rows.get(uid)
+        if row is None:
+            raise SignalIndexError(f"Unknown signal {uid}")
+        rank = (-self._strength(dict(row.sig, strength=strength)), row.rank[1], uid)
+        for view in self._views(row.buckets):
+            view.discard(row.rank)
+            view.add(rank)
+        row.rank = rank
+        if uid in self._route_entries:
+            self._push_route(uid, rank, row.agent)
+
+    def use_router(self, router: Optional[Router]) -> None:
+        """Switch the routing function, recomputing every row's agent once."""
+        self.router = router
+        self._routes = []
+        self._route_entries = {}
+        for uid, row in self._rows.items():
+            row.agent = router(row.sig) if router else None
+            if row.agent is not None:
+                entry = [row.rank[0], row.rank[1], uid, row.agent]
+                self._route_entries[uid] = entry
+                self._routes.append(entry)
+        heapq.heapify(self._routes)
+
+    def sync(self, signals: Iterable[Dict[str, Any]]) -> bool:
+        """Apply adds, removals and changes; return True when anything changed."""
+        changed = False
+        seen: Dict[str, int] = {}
+        keys = set()
+        last = -1
+        for uid, sig in _row_keys(signals, seen):
+            keys.add(uid)
+            row = self._rows.get(uid)
+            if row is None:
+                self.add(sig, uid)
+                changed = True
+                last = self._seq
+                continue
+            agent = self.router(sig) if self.router else None
+            seq = row.rank[1]
+            # Ties break by seq, so seqs must follow list order; a row whose key
+            # moved (a repeated id lost an earlier copy) is re-sequenced.
+            if seq <= last:
+                self._seq += 1
+                seq = self._seq
+            elif row.sig == sig:
+                row.sig = sig
+                last = seq
+                continue
+            if seq != row.rank[1] or row.buckets != self._buckets(sig) or row.agent != agent or row.stamp[0] != self._timestamp(sig):
+                self.remove(uid)
+                self._insert(uid, sig, seq, agent)
+                changed = True
+                last = seq
+                continue
+            last = seq
+            row.sig = sig
+            strength = self._strength(sig)
+            if -row.rank[0] != strength:
+                self.update_strength(uid, strength)
+                changed = True
+        for uid in [uid for uid in self._rows if uid not in keys]:
+            self.remove(uid)
+            changed = True
+        self._occurrences = seen
+        return changed
+
+    def _view(self, category: Optional[str], target: Optional[str]) -> _SortedList:
+        if category is not None and target is not None:
+            raise SignalIndexError("Query by category or target, not both")
+        if category is not None:
+            return self._by_category.get(category, _SortedList())
+        if target is not None:
+            return self._by_target.get(target, _SortedList())
+        return self._all
+
+    def strongest(
+        self, category: Optional[str] = None, target: Optional[str] = None, now: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield signals by effective strength at now; do not modify the index while iterating."""
+        now = time.time() if now is None else now
+        # Ceilings bound effective strengths from above, so a signal is final
+        # once it beats the ceiling of everything not yet looked at.
+        pending: List[Tuple[float, int, str]] = []
+        for neg, seq, uid in self._view(category, target):
+            while pending and -pending[0][0] > -neg:
+                yield self._rows[heapq.heappop(pending)[2]].sig
+            heapq.heappush(pending, (-effective_strength(self._rows[uid].sig, now), seq, uid))
+        while pending:
+            yield self._rows[heapq.heappop(pending)[2]].sig
+
+    def top_k(
+        self, k: int, category: Optional[str] = None, target: Optional[str] = None, now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the k strongest signals, optionally within one category or target."""
+        return list(islice(self.strongest(category, target, now), k))
+
+    def best_route(self, now: Optional[float] = None) -> Optional[str]:
+        """Return the agent of the strongest routable signal at now, or None."""
+        if self.router is None:
+            raise SignalIndexError("Index was built without a router")
+        now = time.time() if now is None else now
+        heap = self._routes
+        while heap and self._route_entries.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+        best: Optional[Tuple[float, int]] = None
+        agent: Optional[str] = None
+        # Walk the heap in ceiling order without popping; stop once no ceiling
+        # left can beat the best effective strength found so far.
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            entry, pos = heapq.heappop(frontier)
+            if best is not None and -entry[0] < best[0]:
+                break
+            if self._route_entries.get(entry[2]) is entry:
+                key = (effective_strength(self._rows[entry[2]].sig, now), -entry[1])
+                if best is None or key > best:
+                    best, agent = key, entry[3]
+            for child in (2 * pos + 1, 2 * pos + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return agent
+
+    def count(self, category: Optional[str] = None, target: Optional[str] = None) -> int:
+        return len(self._view(category, target))
+
+    def counts(self, by: str = "category") -> Dict[str, int]:
+        """Return bucket sizes per category or per target."""
+        buckets = self._by_category if by == "category" else self._by_target
+        return {name: len(view) for name, view in buckets.items()}
+
+    def range(self, start: float, end: float) -> List[Dict[str, Any]]:
+        """Return signals with start <= timestamp <= end, oldest first."""
+        span = self._by_time.irange((float(start),), (float(end), float("inf")))
+        return [self._rows[uid].sig for _, _, uid in span]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.VERSION,
+            "seq": self._seq,
+            "stamp": self.stamp,
+            "routed": self.router is not None,
+            "rows": [[uid, row.rank[0], row.rank[1], row.agent] for uid, row in self._rows.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any], signals: List[Dict[str, Any]], router: Optional[Router] = None) -> "SignalIndex":
+        """Restore a saved index over signals without re-ranking or re-routing them."""
+        if state.get("version") != cls.VERSION:
+            raise SignalIndexError("Unsupported index version")
+        seen: Dict[str, int] = {}
+        by_uid = dict(_row_keys(signals, seen))
+        rows = state["rows"]
+        if len(rows) != len(by_uid):
+            raise SignalIndexError("Index does not describe these signals")
+        routed = router is not None and state.get("routed")
+        index = cls(router)
+        index._seq = state["seq"]
+        index._occurrences = seen
+        ranks: List[_Rank] = []
+        stamps: List[_Time] = []
+        for uid, neg, seq, agent in rows:
+            sig = by_uid.get(uid)
+            if sig is None or -neg != index._strength(sig):
+                raise SignalIndexError("Index is out of date")
+            rank = (neg, seq, uid)
+            row = _Row(sig, rank, (index._timestamp(sig), seq, uid), index._buckets(sig), agent if routed else None)
+            index._rows[uid] = row
+            ranks.append(rank)
+            stamps.append(row.stamp)
+            if row.agent is not None:
+                entry = [neg, seq, uid, row.agent]
+                index._route_entries[uid] = entry
+                index._routes.append(entry)
+        heapq.heapify(index._routes)
+        index._all = _SortedList(ranks)
+        index._by_time = _SortedList(stamps)
+        grouped: Dict[str, Dict[str, List[_Rank]]] = {"category": {}, "target": {}}
+        for rank in ranks:
+            category, target = index._rows[rank[2]].buckets
+            grouped["category"].setdefault(category, []).append(rank)
+            grouped["target"].setdefault(target, []).append(rank)
+        index._by_category = {name: _SortedList(view) for name, view in grouped["category"].items()}
+        index._by_target = {name: _SortedList(view) for name, view in grouped["target"].items()}
+        if router is not None and not routed:
+            index.use_router(router)
+        return index
+
+    @classmethod
+    def build(cls, signals: Iterable[Dict[str, Any]], router: Optional[Router] = None) -> "SignalIndex":
+        index = cls(router)
+        index.extend(signals)
+        return index
+
+    @staticmethod
+    def path_for(pheromone_path: str) -> str:
+        return str(pheromone_path) + ".index"
+
+    @classmethod
+    async def load(cls, pheromone_path: str, signals: List[Dict[str, Any]], router: Optional[Router] = None) -> "SignalIndex":
+        """Reload the index saved next to a pheromone file; a rebuilt (stale) index has no stamp."""
+        try:
+            state = json.loads(await FILE_POOL.read_bytes(cls.path_for(pheromone_path)))
+            # Rows appended to the log after the save extend the saved prefix.
+            if state.get("stamp") is None or state["stamp"][0] != _stat_id(str(pheromone_path)):
+                raise SignalIndexError("Index is stale")
+            saved = len(state["rows"])
+            index = cls.from_dict(state, signals[:saved], router)
+            index.extend(signals[saved:])
+            index.stamp = tuple(state["stamp"])
+            return index
+        except (OSError, ValueError, KeyError, TypeError, IndexError, SignalIndexError):
+            return cls.build(signals, router)
+
+    async def save(self, pheromone_path: str) -> None:
+        """Persist the index next to the pheromone file, stamped with the generation it reflects."""
+        await FILE_POOL.write(self.path_for(pheromone_path), json.dumps(self.to_dict(), separators=(",", ":")))
+
@@ -1,11 +1,104 @@
+import hashlib
+import os
+import time
 from collections import defaultdict
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from .signal_table import SignalTable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
 
 
 class OptimizationError(Exception):
     """Raised when signal optimization fails."""
 
 
+# Consolidated signals keep a bounded "merged" record instead of an ever
+# growing "; "-joined message: occurrence count, first/last timestamp, the
+# most recent distinct messages and short digests of messages already seen.
+MERGE_RECENT = int(os.getenv("MERGE_RECENT_MESSAGES", "5"))
+MERGE_DIGESTS = int(os.getenv("MERGE_DIGESTS", "64"))
+# Lazy decay: a signal carrying {"decay": {"initial", "created", "rate"}}
+# loses `rate` of its strength per DECAY_PERIOD seconds, evaluated
+# continuously at read time instead of being rewritten on every tick.
+DECAY_PERIOD = float(os.getenv("DECAY_PERIOD_SECONDS", "3600"))
+
+# Signal lists at least this long evaporate through NumPy when it is installed.
+VECTOR_THRESHOLD = int(os.getenv("EVAPORATION_VECTOR_THRESHOLD", "10000"))
+
+
+def message_digest(message: str) -> str:
+    return hashlib.blake2b(message.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def merge_record(sig: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the merge record of a signal, describing a plain signal as one occurrence."""
+    merged = sig.get("merged")
+    if merged is not None:
+        return merged
+    message = sig.get("message", "")
+    return {
+        "count": 1,
+        "first": sig.get("timestamp"),
+        "last": sig.get("timestamp"),
+        "recent": [message],
+        "digests": [message_digest(message)],
+    }
+
+
+def _remember(merged: Dict[str, Any], message: str, digest: Optional[str] = None) -> None:
+    digest = digest or message_digest(message)
+    recent = merged["recent"]
+    if digest in merged["digests"]:
+        if message in recent:
+            recent.remove(message)
+    else:
+        merged["digests"].append(digest)
+        del merged["digests"][:-MERGE_DIGESTS]
+    recent.append(message)
+    del recent[:-MERGE_RECENT]
+
+
+def merge_messages(base: Dict[str, Any], sig: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold the messages of sig into base's bounded merge record in place."""
+    merged = base["merged"] = merge_record(base)
+    other = merge_record(sig)
+    merged["count"] += other["count"]
+    if merged.get("first") is None:
+        merged["first"] = other.get("first")
+    if other.get("last") is not None:
+        merged["last"] = other["last"]
+    known = set(merged["digests"])
+    for digest in other["digests"]:
+        if digest not in known:
+            merged["digests"].append(digest)
+    del merged["digests"][:-MERGE_DIGESTS]
+    for message in other["recent"]:
+        _remember(merged, message)
+    base["message"] = "; ".join(merged["recent"])
+    return base
+
+
+def compact_merged_messages(signals: List[Dict[str, Any]]) -> int:
+    """Convert legacy "; "-joined messages into merge records; return how many changed."""
+    changed = 0
+    for sig in signals:
+        message = sig.get("message")
+        if "merged" in sig or not isinstance(message, str) or "; " not in message:
+            continue
+        parts = message.split("; ")
+        merged = {"count": len(parts), "first": None, "last": sig.get("timestamp"), "recent": [], "digests": []}
+        for part in parts:
+            _remember(merged, part)
+        sig["merged"] = merged
+        sig["message"] = "; ".join(merged["recent"])
+        changed += 1
+    return changed
+
+
 def cluster_by_context(signals: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """Group signals by context id or target using defaultdict."""
     clusters: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
@@ -15,24 +108,42 @@ def cluster_by_context(signals: List[Dict[str, Any]]) -> Dict[str, List[Dict[str
     return dict(clusters)
 
 
+def duplicate_key(sig: Dict[str, Any]) -> tuple:
+    """Return the identity under which consolidate_duplicates merges signals."""
+    return (
+        sig.get("signalType"),
+        sig.get("target"),
+        sig.get("category"),
+        sig.get("context", {}).get("id"),
+    )
+
+
+def merge_duplicate(base: Dict[str, Any], sig: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+    """Fold a duplicate signal into base in place."""
+    merge_messages(base, sig)
+    now = time.time() if now is None else now
+    strength = max(effective_strength(base, now), effective_strength(sig, now))
+    base["strength"] = strength
+    # A reinforced signal restarts lazy decay from its current merged strength;
+    # the stored strengths are decay origins and would revive faded signals.
+    decay = base.get("decay") or sig.get("decay")
+    if decay:
+        base["decay"] = {**decay, "initial": strength, "created": now}
+    return base
+
+
 def consolidate_duplicates(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Merge duplicates using hash-based grouping."""
     groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
     for sig in signals:
-        key = (
-            sig.get("signalType"),
-            sig.get("target"),
-            sig.get("category"),
-            sig.get("context", {}).get("id"),
-        )
-        groups[key].append(sig)
+        groups[duplicate_key(sig)].append(sig)
 
     result: List[Dict[str, Any]] = []
     for grp in groups.values():
         base = grp[0]
         if len(grp) > 1:
-            base["message"] = "; ".join(s.get("message", "") for s in grp)
-            base["strength"] = max(s.get("strength", 0) for s in grp)
+            for sig in grp[1:]:
+                merge_duplicate(base, sig)
         result.append(base)
     return result
 
@@ -46,6 +157,8 @@ def normalize_strengths(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         return signals
     for sig in signals:
         sig["strength"] = round((sig.get("strength", 0) / max_val) * 10, 2)
+        if "decay" in sig:
+            sig["decay"]["initial"] = sig["strength"]
     return signals
 
 
@@ -59,6 +172,66 @@ def build_signal_index(signals: List[Dict[str, Any]]) -> Dict[str, Dict[str, Lis
     return {c: dict(t) for c, t in index.items()}
 
 
+def effective_strength(sig: Dict[str, Any], now: Optional[float] = None) -> float:
+    """Return a signal's strength at time now, applying lazy decay when it is stamped."""
+    decay = sig.get("decay")
+    if not decay:
+        return sig.get("strength", 0)
+    elapsed = max(0.0, (time.time() if now is None else now) - decay["created"])
+    period = decay.get("period", DECAY_PERIOD)
+    return max(0.1, decay["initial"] * (1 - decay["rate"]) ** (elapsed / period))
+
+
+def _lazy_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    lazy = config.get("lazyDecay", config.get("coreConfig", {}).get("lazyDecay", False))
+    if isinstance(lazy, dict):
+        return lazy if lazy.get("enabled", True) else {}
+    return {"enabled": True} if lazy else {}
+
+
+def stamp_decay(
+    signals: List[Dict[str, Any]],
+    rates: Dict[str, float],
+    base: float,
+    multiplier: float,
+    period: float,
+    now: Optional[float] = None,
+) -> int:
+    """Give unstamped signals a lazy decay record; return how many were stamped."""
+    now = time.time() if now is None else now
+    stamped = 0
+    for sig in signals:
+        if "decay" in sig:
+            continue
+        rate = rates.get(sig.get("category"), base)
+        urgency = sig.get("context", {}).get("urgency", 0)
+        decay = {"initial": sig.get("strength", 0), "created": now, "rate": rate * (1 - urgency * multiplier)}
+        if period != DECAY_PERIOD:
+            decay["period"] = period
+        sig["decay"] = decay
+        stamped += 1
+    return stamped
+
+
+def prune_decayed(signals: List[Dict[str, Any]], threshold: float, now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Drop signals whose effective strength fell under threshold; used at compaction."""
+    now = time.time() if now is None else now
+    return [sig for sig in signals if effective_strength(sig, now) >= threshold]
+
+
+async def compact_decayed(path: str, config: Dict[str, Any], load_cb, save_cb) -> int:
+    """Prune lazily decayed signals and persist only if any were removed."""
+    data = await load_cb(path)
+    prun = config.get("coreConfig", {}).get("signalPruneThreshold", 0.1)
+    signals = list(data.get("signals", []))
+    kept = prune_decayed(signals, prun)
+    if len(kept) == len(signals):
+        return 0
+    data["signals"] = kept
+    await save_cb(path, data)
+    return len(signals) - len(kept)
+
+
 async def adaptive_evaporation(
     path: str,
     config: Dict[str, Any],
@@ -70,15 +243,101 @@ async def adaptive_evaporation(
     rates = config.get("coreConfig", {}).get("evaporationRates", {})
     adaptive = config.get("adaptiveEvaporation", {"base": 0.05, "urgencyMultiplier": 1})
     prun = config.get("coreConfig", {}).get("signalPruneThreshold", 0.1)
+    lazy = _lazy_config(config)
+    if lazy:
+        # Strengths are derived at read time; only new or faded signals need a write.
+        signals = data.get("signals", [])
+        stamped = stamp_decay(
+            signals,
+            rates,
+            adaptive.get("base", 0.05),
+            adaptive.get("urgencyMultiplier", 1),
+            lazy.get("periodSeconds", DECAY_PERIOD),
+        )
+        kept = prune_decayed(signals, prun)
+        if len(kept) != len(signals):
+            data["signals"] = kept
+        if stamped or len(kept) != len(signals):
+            await save_cb(path, data)
+        return
+    table = data.get("signals")
+    if isinstance(table, SignalTable):
+        table.evaporate(rates, adaptive.get("base", 0.05), adaptive.get("urgencyMultiplier", 1), prun)
+        await save_cb(path, data)
+        return
+    signals = data.get("signals", [])
+    base = adaptive.get("base", 0.05)
+    multiplier = adaptive.get("urgencyMultiplier", 1)
+    updated = None
+    if np is not None and len(signals) >= VECTOR_THRESHOLD:
+        updated = evaporate_vectorized(signals, rates, base, multiplier, prun)
+    if updated is None:
+        updated = evaporate_scalar(signals, rates, base, multiplier, prun)
+    data["signals"] = updated
+    await save_cb(path, data)
+
+
+def evaporate_scalar(
+    signals: List[Dict[str, Any]],
+    rates: Dict[str, float],
+    base: float,
+    multiplier: float,
+    prune: float,
+) -> List[Dict[str, Any]]:
+    """Decay strengths one signal at a time and drop those under the prune threshold."""
     updated: List[Dict[str, Any]] = []
-    for sig in data.get("signals", []):
-        cat = sig.get("category")
-        base = rates.get(cat, adaptive.get("base", 0.05))
+    for sig in signals:
+        rate = rates.get(sig.get("category"), base)
         urgency = sig.get("context", {}).get("urgency", 0)
-        decay = base * (1 - urgency * adaptive.get("urgencyMultiplier", 1))
+        decay = rate * (1 - urgency * multiplier)
         sig["strength"] = max(0.1, round(sig.get("strength", 0) * (1 - decay), 2))
-        if sig["strength"] >= prun:
+        if sig["strength"] >= prune:
             updated.append(sig)
-    data["signals"] = updated
-    await save_cb(path, data)
+    return updated
+
+
+def evaporate_vectorized(
+    signals: List[Dict[str, Any]],
+    rates: Dict[str, float],
+    base: float,
+    multiplier: float,
+    prune: float,
+) -> Optional[List[Dict[str, Any]]]:
+    """NumPy twin of evaporate_scalar; returns None when the signals need the scalar path."""
+    if np is None:
+        return None
+    count = len(signals)
+    try:
+        rate = np.fromiter((rates.get(sig.get("category"), base) for sig in signals), np.float64, count)
+        urgency = np.fromiter((sig.get("context", {}).get("urgency", 0) for sig in signals), np.float64, count)
+        strength = np.fromiter((sig.get("strength", 0) for sig in signals), np.float64, count)
+    except (TypeError, ValueError, AttributeError):
+        return None
+    # Same operation order as the scalar path so every intermediate rounds identically.
+    raw = strength * (1 - rate * (1 - urgency * multiplier))
+    values = np.round(raw, 2)
+    # np.round scales by 100 and rounds half to even; Python's round() is
+    # correctly rounded on the decimal value, so redo near-ties in Python.
+    scaled = raw * 100
+    for idx in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        values[idx] = round(float(raw[idx]), 2)
+    values = np.maximum(0.1, values)
+    keep = (values >= prune).tolist()
+    values = values.tolist()
+    if isinstance(multiplier, int) and (isinstance(base, int) or any(isinstance(r, int) for r in rates.values())):
+        # All-integer inputs stay integers in the scalar path (e.g. a zero rate).
+        for idx, sig in enumerate(signals):
+            if (
+                isinstance(sig.get("strength", 0), int)
+                and isinstance(rates.get(sig.get("category"), base), int)
+                and isinstance(sig.get("context", {}).get("urgency", 0), int)
+                and values[idx] > 0.1
+            ):
+                values[idx] = int(values[idx])
+    updated: List[Dict[str, Any]] = []
+    for sig, value, kept in zip(signals, values, keep):
+        sig["strength"] = value
+        if kept:
+            updated.append(sig)
+    return updated
 
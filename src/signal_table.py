@@ -0,0 +1,231 @@
+import sys
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Numeric columns keep a type flag per row so ints round-trip as ints:
+# 1 = int, 0 = float, -1 = key absent (value lives in the extras dict or nowhere).
+NUMERIC_COLUMNS = ("strength", "timestamp")
+STRING_COLUMNS = ("category", "signalType", "target")
+_ABSENT = -1
+
+
+class SignalTableError(Exception):
+    """Raised when a signal table operation fails."""
+
+
+class SignalRow(MutableMapping):
+    """Dict-like view of one table row; reads and writes go to the columns."""
+
+    __slots__ = ("_table", "_idx")
+
+    def __init__(self, table: "SignalTable", idx: int) -> None:
+        self._table = table
+        self._idx = idx
+
+    def __getitem__(self, key: str) -> Any:
+        return self._table._get(self._idx, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._table._set(self._idx, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._table._delete(self._idx, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table._keys(self._idx))
+
+    def __len__(self) -> int:
+        return len(self._table._keys(self._idx))
+
+    def __repr__(self) -> str:
+        return f"SignalRow({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self._table._get(self._idx, key) for key in self._table._keys(self._idx)}
+
+
+class SignalTable:
+    """Columnar signal storage: numeric arrays, interned string codes and lazy rows."""
+
+    def __init__(self, signals: Iterable[Dict[str, Any]] = ()) -> None:
+        self._numbers = {col: array("d") for col in NUMERIC_COLUMNS}
+        self._kinds = {col: array("b") for col in NUMERIC_COLUMNS}
+        self._codes = {col: array("i") for col in STRING_COLUMNS}
+        self._pools: Dict[str, List[str]] = {col: [] for col in STRING_COLUMNS}
+        self._lookup: Dict[str, Dict[str, int]] = {col: {} for col in STRING_COLUMNS}
+        self._extra: List[Dict[str, Any]] = []
+        for sig in signals:
+            self.append(sig)
+
+    @property
+    def strength(self) -> array:
+        return self._numbers["strength"]
+
+    @property
+    def timestamp(self) -> array:
+        return self._numbers["timestamp"]
+
+    def __len__(self) -> int:
+        return len(self._extra)
+
+    def __iter__(self) -> Iterator[SignalRow]:
+        return (SignalRow(self, i) for i in range(len(self._extra)))
+
+    def __getitem__(self, idx: int) -> SignalRow:
+        if idx < 0:
+            idx += len(self._extra)
+        if not 0 <= idx < len(self._extra):
+            raise IndexError("signal table index out of range")
+        return SignalRow(self, idx)
+
+    def nbytes(self, measure: Callable[[Any], int] = sys.getsizeof) -> int:
+        """Return the bytes held by the column arrays, string pools and extras; ``measure`` sizes the extras list."""
+        total = sys.getsizeof(self)
+        for group in (self._numbers, self._kinds, self._codes):
+            total += sys.getsizeof(group) + sum(sys.getsizeof(arr) for arr in group.values())
+        for col in STRING_COLUMNS:
+            pool = self._pools[col]
+            total += sys.getsizeof(pool) + sum(map(sys.getsizeof, pool)) + sys.getsizeof(self._lookup[col])
+        return total + measure(self._extra)
+
+    def _intern(self, col: str, value: str) -> int:
+        code = self._lookup[col].get(value)
+        if code is None:
+            code = self._lookup[col][value] = len(self._pools[col])
+            self._pools[col].append(value)
+        return code
+
+    def append(self, signal: Dict[str, Any]) -> None:
+        extra = {}
+        for key, value in signal.items():
+            if key not in NUMERIC_COLUMNS and key not in STRING_COLUMNS:
+                extra[key] = value
+        self._extra.append(extra)
+        idx = len(self._extra) - 1
+        for col in NUMERIC_COLUMNS:
+            self._numbers[col].append(0.0)
+            self._kinds[col].append(_ABSENT)
+        for col in STRING_COLUMNS:
+            self._codes[col].append(_ABSENT)
+        for col in NUMERIC_COLUMNS + STRING_COLUMNS:
+            if col in signal:
+                self._set(idx, col, signal[col])
+
+    def _get(self, idx: int, key: str) -> Any:
+        if key in self._kinds:
+            kind = self._kinds[key][idx]
+            if kind == _ABSENT:
+                return self._extra[idx][key]
+            value = self._numbers[key][idx]
+            return int(value) if kind else value
+        if key in self._codes:
+            code = self._codes[key][idx]
+            if code == _ABSENT:
+                return self._extra[idx][key]
+            return self._pools[key][code]
+        return self._extra[idx][key]
+
+    def _set(self, idx: int, key: str, value: Any) -> None:
+        if key in self._kinds:
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and (
+                isinstance(value, float) or abs(value) < 2**53
+            ):
+                self._numbers[key][idx] = value
+                self._kinds[key][idx] = isinstance(value, int)
+                self._extra[idx].pop(key, None)
+                return
+            self._kinds[key][idx] = _ABSENT
+        elif key in self._codes:
+            if isinstance(value, str):
+                self._codes[key][idx] = self._intern(key, value)
+                self._extra[idx].pop(key, None)
+                return
+            self._codes[key][idx] = _ABSENT
+        self._extra[idx][key] = value
+
+    def _delete(self, idx: int, key: str) -> None:
+        if key in self._kinds and self._kinds[key][idx] != _ABSENT:
+            self._kinds[key][idx] = _ABSENT
+        elif key in self._codes and self._codes[key][idx] != _ABSENT:
+            self._codes[key][idx] = _ABSENT
+        else:
+            del self._extra[idx][key]
+
+    def _keys(self, idx: int) -> List[str]:
+        keys = [col for col in NUMERIC_COLUMNS if self._kinds[col][idx] != _ABSENT]
+        keys.extend(col for col in STRING_COLUMNS if self._codes[col][idx] != _ABSENT)
+        keys.extend(self._extra[idx])
+        return keys
+
+    def column(self, name: str) -> List[Optional[str]]:
+        """Return a string column decoded to values, None where absent."""
+        pool = self._pools[name]
+        return [pool[c] if c != _ABSENT else None for c in self._codes[name]]
+
+    def codes(self, name: str) -> Sequence[int]:
+        """Return the raw interned codes of a string column."""
+        return self._codes[name]
+
+    def code_for(self, name: str, value: str) -> int:
+        return self._lookup[name].get(value, _ABSENT)
+
+    def counts(self, name: str) -> Dict[str, int]:
+        """Count rows per value of a string column."""
+        tally = [0] * len(self._pools[name])
+        for code in self._codes[name]:
+            if code != _ABSENT:
+                tally[code] += 1
+        return {value: n for value, n in zip(self._pools[name], tally) if n}
+
+    def order_by(self, name: str, reverse: bool = False) -> List[int]:
+        """Return row indices sorted by a numeric column; absent values sort as 0."""
+        values = self._numbers[name]
+        kinds = self._kinds[name]
+        key = (lambda i: values[i] if kinds[i] != _ABSENT else 0)
+        return sorted(range(len(self._extra)), key=key, reverse=reverse)
+
+    def keep(self, indices: Iterable[int]) -> None:
+        """Retain only the given rows, in the given order."""
+        rows = list(indices)
+        for col in NUMERIC_COLUMNS:
+            self._numbers[col] = array("d", (self._numbers[col][i] for i in rows))
+            self._kinds[col] = array("b", (self._kinds[col][i] for i in rows))
+        for col in STRING_COLUMNS:
+            self._codes[col] = array("i", (self._codes[col][i] for i in rows))
+        self._extra = [self._extra[i] for i in rows]
+
+    def evaporate(self, rates: Dict[str, float], base: float, urgency_multiplier: float, prune: float) -> None:
+        """Decay strengths in place and drop rows under the prune threshold."""
+        strength = self._numbers["strength"]
+        kinds = self._kinds["strength"]
+        pool = self._pools["category"]
+        cat_rates = [rates.get(cat, base) for cat in pool]
+        codes = self._codes["category"]
+        keep = []
+        for i, extra in enumerate(self._extra):
+            code = codes[i]
+            if code != _ABSENT:
+                rate = cat_rates[code]
+            else:
+                rate = rates.get(extra.get("category"), base)
+            urgency = extra.get("context", {}).get("urgency", 0)
+            decay = rate * (1 - urgency * urgency_multiplier)
+            current = strength[i] if kinds[i] != _ABSENT else extra.get("strength", 0)
+            value = max(0.1, round(current * (1 - decay), 2))
+            strength[i] = value
+            kinds[i] = 0
+            extra.pop("strength", None)
+            if value >= prune:
+                keep.append(i)
+        if len(keep) != len(self._extra):
+            self.keep(keep)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [SignalRow(self, i).to_dict() for i in range(len(self._extra))]
+
+    @classmethod
+    def from_signals(cls, signals: Iterable[Dict[str, Any]]) -> "SignalTable":
+        if isinstance(signals, SignalTable):
+            return signals
+        return cls(signals)
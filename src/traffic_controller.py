@@ -2,20 +2,28 @@ import asyncio
 import json
 import os
 import time
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 
 try:
     from src.pheromone_handler import PheromoneHandler, PheromoneHandlerError
+    from src.pheromone_store import open_pheromone_store
+    from src.signal_index import SignalIndex
+    from src.signal_optimizer import effective_strength
+    from src.file_pool import FILE_POOL
+    from src.workload_ledger import WorkloadError, WorkloadLedger, release_completions, shared_ledger
 except ImportError:  # pragma: no cover - fallback for direct execution
     from pheromone_handler import PheromoneHandler, PheromoneHandlerError
+    from pheromone_store import open_pheromone_store
+    from signal_index import SignalIndex
+    from signal_optimizer import effective_strength
+    from file_pool import FILE_POOL
+    from workload_ledger import WorkloadError, WorkloadLedger, release_completions, shared_ledger
 
 
 class RoutingError(Exception):
     """Custom exception for routing failures."""
 
 
-WORKLOAD_CACHE: Dict[str, int] = {}
 METRICS_FILE = os.getenv("METRICS_FILE", ".traffic_metrics.json")
 CONTEXT_FILE = os.getenv("CONTEXT_FILE", ".traffic_context.json")
 
@@ -23,7 +31,7 @@ CONTEXT_FILE = os.getenv("CONTEXT_FILE", ".traffic_context.json")
 async def load_json_file(path: str) -> Dict[str, Any]:
     """Asynchronously load a JSON file."""
     try:
-        return json.loads(await asyncio.to_thread(Path(path).read_text))
+        return json.loads(await FILE_POOL.read_bytes(path))
     except (OSError, json.JSONDecodeError) as exc:
         raise RoutingError(f"Unable to load {path}") from exc
 
@@ -31,7 +39,7 @@ async def load_json_file(path: str) -> Dict[str, Any]:
 async def save_json_file(path: str, data: Dict[str, Any]) -> None:
     """Persist data as JSON asynchronously."""
     try:
-        await asyncio.to_thread(Path(path).write_text, json.dumps(data))
+        await FILE_POOL.write(path, json.dumps(data))
     except OSError as exc:
         raise RoutingError(f"Unable to save {path}") from exc
 
@@ -62,15 +70,27 @@ async def save_context_cache(cache: Dict[str, str]) -> None:
     await save_json_file(CONTEXT_FILE, cache)
 
 
-def least_busy_agent(candidates: List[str]) -> str:
+def workload_ledger() -> WorkloadLedger:
+    """Return the process-wide ledger backed by WORKLOAD_FILE."""
+    return shared_ledger()
+
+
+def least_busy_agent(candidates: List[str], ledger: Optional[WorkloadLedger] = None) -> str:
     """Return least busy agent from candidates and update workload."""
     if not candidates:
         raise RoutingError("No candidates provided")
-    for agent in candidates:
-        WORKLOAD_CACHE.setdefault(agent, 0)
-    chosen = min(candidates, key=lambda a: WORKLOAD_CACHE[a])
-    WORKLOAD_CACHE[chosen] += 1
-    return chosen
+    try:
+        return (ledger or workload_ledger()).acquire(candidates)
+    except WorkloadError as exc:
+        raise RoutingError("Unable to update workload") from exc
+
+
+def record_completions(signals: Iterable[Mapping[str, Any]], ledger: Optional[WorkloadLedger] = None) -> int:
+    """Release workload for task_completed signals that name their source agent."""
+    try:
+        return release_completions(signals, ledger)
+    except WorkloadError as exc:
+        raise RoutingError("Unable to update workload") from exc
 
 
 async def add_coordination_signal(handler: PheromoneHandler, agent: str) -> None:
@@ -90,8 +110,6 @@ async def add_coordination_signal(handler: PheromoneHandler, agent: str) -> None
         raise RoutingError("Failed to update pheromone") from exc
 
 
-
-
 async def load_config(config_path: str) -> Dict[str, Any]:
     """Load swarm configuration."""
     return await load_json_file(config_path)
@@ -100,9 +118,9 @@ async def load_config(config_path: str) -> Dict[str, Any]:
 async def load_pheromone(config: Dict[str, Any]) -> Dict[str, Any]:
     """Load pheromone using PheromoneHandler."""
     path = config.get("pheromoneFile", ".pheromone")
-    handler = PheromoneHandler(path)
+    handler = open_pheromone_store(path)
     try:
-        data = await handler.read_safe()
+        data = await handler.read_view()
     except PheromoneHandlerError as exc:
         raise RoutingError("Failed to read pheromone") from exc
     return data or {"signals": []}
@@ -125,30 +143,59 @@ def analyze_signal(signal: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-async def determine_route(pheromone: Dict[str, Any], handler: Optional[PheromoneHandler] | None = None) -> str:
-    """Return next agent and record coordination."""
-    signals = sorted(
-        pheromone.get("signals", []),
-        key=lambda s: s.get("strength", 0),
-        reverse=True,
-    )
-    for sig in signals:
-        agent = analyze_signal(sig)
-        if agent:
-            if handler:
-                await add_coordination_signal(handler, agent)
-            return least_busy_agent([agent])
+async def _record_route(
+    agent: str,
+    handler: Optional[PheromoneHandler],
+    instances: Optional[Mapping[str, List[str]]],
+) -> str:
+    candidates = list((instances or {}).get(agent) or [agent])
+    chosen = await asyncio.to_thread(least_busy_agent, candidates)
+    if handler:
+        await add_coordination_signal(handler, chosen)
+    return chosen
+
+
+async def determine_route(
+    pheromone: Dict[str, Any],
+    handler: Optional[PheromoneHandler] | None = None,
+    index: Optional[SignalIndex] = None,
+    instances: Optional[Mapping[str, List[str]]] = None,
+) -> str:
+    """Return next agent, or its least busy instance, and record coordination."""
+    now = time.time()
+    if index is not None and index.router is not None:
+        # Agents were worked out when signals were indexed; only decay is evaluated here.
+        agent = index.best_route(now)
+    else:
+        if index is not None:
+            signals: Iterable[Dict[str, Any]] = index.strongest(now=now)
+        else:
+            signals = sorted(pheromone.get("signals", []), key=lambda s: effective_strength(s, now), reverse=True)
+        agent = next((found for found in map(analyze_signal, signals) if found), None)
+    if agent:
+        return await _record_route(agent, handler, instances)
     fallback = "orchestrator-pheromone-scribe"
     if handler:
         await add_coordination_signal(handler, fallback)
     return fallback
 
 
+async def route_store(handler: Any, instances: Optional[Mapping[str, List[str]]] = None) -> str:
+    """Route from the store's live signal index, or rank its document when it keeps none."""
+    try:
+        if isinstance(handler, PheromoneHandler):
+            index = await handler.signal_index(analyze_signal)
+            return await determine_route({}, handler, index=index, instances=instances)
+        pheromone = await handler.read_view() or {"signals": []}
+    except PheromoneHandlerError as exc:
+        raise RoutingError("Failed to read pheromone") from exc
+    return await determine_route(pheromone, handler, instances=instances)
+
+
 async def main() -> None:
     config = await load_config(".swarmConfig")
-    pheromone = await load_pheromone(config)
-    handler = PheromoneHandler(config.get("pheromoneFile", ".pheromone"))
-    next_agent = await determine_route(pheromone, handler)
+    handler = open_pheromone_store(config.get("pheromoneFile", ".pheromone"))
+    next_agent = await route_store(handler, config.get("agentInstances"))
     print(next_agent)
 
 
@@ -0,0 +1,189 @@
+import fcntl
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+WORKLOAD_FILE = os.getenv("WORKLOAD_FILE", str(Path(".swarm") / "workload.json"))
+# In-flight counts halve every WORKLOAD_HALF_LIFE seconds so work whose
+# completion signal never arrives stops counting against an agent.
+WORKLOAD_HALF_LIFE = float(os.getenv("WORKLOAD_HALF_LIFE", "1800"))
+WORKLOAD_STRATEGY = os.getenv("WORKLOAD_STRATEGY", "least")
+WORKLOAD_SEEN = int(os.getenv("WORKLOAD_SEEN", "4096"))
+
+STRATEGIES = ("least", "p2c")
+
+_SHARED: Optional["WorkloadLedger"] = None
+
+
+class WorkloadError(Exception):
+    """Raised when the workload ledger cannot be read, updated or queried."""
+
+
+class WorkloadLedger:
+    """Persistent, flock-protected in-flight task counts per agent."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        half_life: Optional[float] = None,
+        strategy: Optional[str] = None,
+        weights: Optional[Mapping[str, float]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.path = Path(path or WORKLOAD_FILE)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.half_life = WORKLOAD_HALF_LIFE if half_life is None else half_life
+        self.strategy = strategy or WORKLOAD_STRATEGY
+        if self.strategy not in STRATEGIES:
+            raise WorkloadError(f"Unknown strategy {self.strategy}")
+        self.weights = dict(weights or {})
+        self._rng = random.Random(seed)
+        self._mutex = threading.Lock()
+
+    def _update(self, apply: Callable[[Dict[str, Any]], Tuple[Any, bool]]) -> Any:
+        """Run apply on the ledger under the lock, saving only when it reports a change."""
+        with self._mutex:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError as exc:
+                raise WorkloadError("Unable to open workload lock") from exc
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                state = self._read()
+                result, changed = apply(state)
+                if changed:
+                    self._write(state)
+                return result
+            finally:
+                os.close(fd)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            state = json.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            state = {}
+        except (OSError, ValueError) as exc:
+            raise WorkloadError(f"Unable to load {self.path}") from exc
+        state.setdefault("agents", {})
+        state.setdefault("seen", [])
+        state.setdefault("horizon", 0)
+        return state
+
+    def _write(self, state: Dict[str, Any]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as out:
+                json.dump(state, out, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise WorkloadError(f"Unable to save {self.path}") from exc
+
+    def _decayed(self, entry: Optional[Dict[str, float]], now: float) -> float:
+        if not entry:
+            return 0.0
+        load = entry.get("load", 0.0)
+        if self.half_life > 0:
+            load *= 0.5 ** (max(0.0, now - entry.get("updated", now)) / self.half_life)
+        return load
+
+    def _set(self, state: Dict[str, Any], agent: str, load: float, now: float) -> None:
+        state["agents"][agent] = {"load": round(max(0.0, load), 6), "updated": now}
+
+    def _pick(self, candidates: List[str], loads: Dict[str, float]) -> str:
+        def score(agent: str) -> float:
+            return loads[agent] / max(self.weights.get(agent, 1.0), 1e-9)
+
+        pool = candidates
+        if self.strategy == "p2c" and len(candidates) > 2:
+            pool = sorted(self._rng.sample(range(len(candidates)), 2))
+            pool = [candidates[i] for i in pool]
+        return min(pool, key=score)
+
+    def acquire(self, candidates: List[str], now: Optional[float] = None) -> str:
+        """Choose the least loaded candidate and count one more task against it."""
+        if not candidates:
+            raise WorkloadError("No candidates provided")
+        now = time.time() if now is None else now
+
+        def apply(state: Dict[str, Any]) -> Tuple[str, bool]:
+            loads = {agent: self._decayed(state["agents"].get(agent), now) for agent in candidates}
+            chosen = self._pick(candidates, loads)
+            self._set(state, chosen, loads[chosen] + 1, now)
+            return chosen, True
+
+        return self._update(apply)
+
+    def complete(self, agent: str, completion_id: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """Count one task of agent as done; a repeated completion_id is ignored."""
+        signal = {"source": agent, "id": completion_id, "timestamp": now}
+        return self.record_completions([signal], now) == 1
+
+    def record_completions(self, signals: Iterable[Mapping[str, Any]], now: Optional[float] = None) -> int:
+        """Apply completion signals not seen before and return how many were applied."""
+        pending = [sig for sig in signals if sig.get("source")]
+        if not pending:
+            return 0
+        now = time.time() if now is None else now
+
+        def apply(state: Dict[str, Any]) -> Tuple[int, bool]:
+            # Seen (source, id) pairs are bounded; completions older than the newest
+            # evicted one are treated as seen, so a long-lived signal never counts
+            # twice. Ids are only unique per agent (task_completed-<epoch ms>).
+            seen = {(entry[0], entry[1]) for entry in state["seen"] if len(entry) == 3}
+            applied = 0
+            for sig in pending:
+                agent = sig["source"]
+                completion_id = sig.get("id")
+                if completion_id is not None:
+                    stamp = sig.get("timestamp") or now
+                    if (agent, completion_id) in seen or stamp <= state["horizon"]:
+                        continue
+                    seen.add((agent, completion_id))
+                    state["seen"].append([agent, completion_id, stamp])
+                self._set(state, agent, self._decayed(state["agents"].get(agent), now) - 1, now)
+                applied += 1
+            evicted = state["seen"][:-WORKLOAD_SEEN]
+            if evicted:
+                state["horizon"] = max([state["horizon"]] + [entry[-1] for entry in evicted])
+                del state["seen"][:-WORKLOAD_SEEN]
+            return applied, applied > 0
+
+        return self._update(apply)
+
+    def loads(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Return the current decayed in-flight count for every known agent."""
+        now = time.time() if now is None else now
+        return self._update(
+            lambda state: ({agent: self._decayed(entry, now) for agent, entry in state["agents"].items()}, False)
+        )
+
+
+def completions(signals: Iterable[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+    """Return the task_completed signals that name the agent that finished."""
+    return [s for s in signals if s.get("signalType") == "task_completed" and s.get("source")]
+
+
+def shared_ledger() -> WorkloadLedger:
+    """Return the process-wide ledger backed by WORKLOAD_FILE."""
+    global _SHARED
+    if _SHARED is None:
+        _SHARED = WorkloadLedger()
+    return _SHARED
+
+
+def release_completions(signals: Iterable[Mapping[str, Any]], ledger: Optional[WorkloadLedger] = None) -> int:
+    """Release workload for the completions among signals; the shared ledger by default."""
+    done = completions(signals)
+    if not done:
+        return 0
+    return (ledger or shared_ledger()).record_completions(done)
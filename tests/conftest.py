@@ -0,0 +1,37 @@
+from pathlib import Path
+import sys
+from typing import Any, Callable, Dict
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import src.workload_ledger as workload_ledger
+
+
+def _make_signal(idx: int, category: str = "need", target: str = "a", strength: float = 5.0) -> Dict[str, Any]:
+    return {
+        "id": str(idx),
+        "signalType": "t",
+        "category": category,
+        "target": target,
+        "strength": strength,
+        "message": f"m{idx}",
+        "timestamp": idx,
+    }
+
+
+@pytest.fixture
+def make_signal() -> Callable[..., Dict[str, Any]]:
+    """Factory for well-formed signals with predictable ids, messages and timestamps."""
+    return _make_signal
+
+
+@pytest.fixture(autouse=True)
+def isolated_workload(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> workload_ledger.WorkloadLedger:
+    """Route every test's workload accounting to a ledger under tmp_path."""
+    path = str(tmp_path / "workload.json")
+    monkeypatch.setenv("WORKLOAD_FILE", path)
+    ledger = workload_ledger.WorkloadLedger(path)
+    monkeypatch.setattr(workload_ledger, "_SHARED", ledger)
+    return ledger
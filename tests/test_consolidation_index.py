@@ -0,0 +1,84 @@
+import copy
+import json
+import random
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.consolidation_index import ConsolidationIndex
+from src.pheromone_helpers import (
+    batch_update_pheromone,
+    consolidate_signals,
+    load_pheromone,
+    sanitize_context,
+    update_pheromone,
+)
+from src.signal_optimizer import consolidate_duplicates, normalize_strengths
+
+
+def _signals(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "signalType": rng.choice(["task_completed", "blocked"]),
+            "category": rng.choice(["state", "need"]),
+            "target": rng.choice(["a", "b", "c"]),
+            "strength": rng.choice([3, 7.5, 12, 40]),
+            "message": f"m{i}",
+            "timestamp": i,
+            "context": {"modified_files": [rng.choice(["src/x.py", "src/y.py"])]},
+        }
+        for i in range(count)
+    ]
+
+
+def _full(out: list, batch: list) -> list:
+    for sig in batch:
+        sig["context"] = sanitize_context(sig.get("context", {}))
+    return normalize_strengths(consolidate_duplicates(consolidate_signals(out + batch)))
+
+
+@pytest.mark.asyncio
+async def test_incremental_matches_full_pipeline(tmp_path: Path) -> None:
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+    incoming = _signals(60)
+    expected: list = []
+    for sig in copy.deepcopy(incoming[:20]):
+        expected = _full(expected, [sig])
+    expected = _full(expected, copy.deepcopy(incoming[20:]))
+    for sig in incoming[:20]:
+        await update_pheromone(str(p), sig)
+    await batch_update_pheromone(str(p), incoming[20:])
+    data = await load_pheromone(str(p))
+    assert data["signals"] == expected
+
+
+@pytest.mark.asyncio
+async def test_index_persists_and_is_reused(tmp_path: Path) -> None:
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+    for sig in _signals(5):
+        await update_pheromone(str(p), sig)
+    index = await ConsolidationIndex.load(str(p))
+    data = await load_pheromone(str(p))
+    assert index.matches(data["signals"]) == index.stable
+    assert index.count == len(data["signals"])
+
+
+@pytest.mark.asyncio
+async def test_external_write_forces_rebuild(tmp_path: Path) -> None:
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+    await update_pheromone(str(p), _signals(1)[0])
+    stored = await load_pheromone(str(p))
+    stored["signals"].append(dict(stored["signals"][0], message="copy"))
+    p.write_text(json.dumps(stored))
+    index = await ConsolidationIndex.load(str(p))
+    assert not index.matches(stored["signals"])
+    await update_pheromone(str(p), _signals(2, seed=3)[1])
+    data = await load_pheromone(str(p))
+    assert len({json.dumps([s["signalType"], s["target"], s["category"]]) for s in data["signals"]}) == len(data["signals"])
@@ -68,3 +68,24 @@ async def test_monitor_check_once_resets_deadlock(tmp_path) -> None:
     await monitor.check_once()
     data = await PheromoneHandler(str(file)).read_safe()
     assert any(s.get("target") == "orchestrator-pheromone-scribe" for s in data["signals"])
+
+
+@pytest.mark.asyncio
+async def test_dashboard_counts_rows_and_ranks_by_effective_strength(tmp_path, capsys, make_signal) -> None:
+    now = time.time()
+    decay = {"initial": 9, "created": now - 36000, "rate": 0.5}
+    faded = dict(make_signal(1, strength=9), id="a", decay=decay)
+    twin = dict(make_signal(2, category="block", strength=4), id="a")
+    live = dict(make_signal(3, strength=3), id="b")
+    monitor = CoordinationMonitor(str(tmp_path / "pher.json"), stall_min=1, expiry_min=5)
+    signals = [faded, twin, live]
+    await monitor.handler.write_safe({"signals": signals})
+    await monitor.display_dashboard(signals)
+    out = capsys.readouterr().out
+    assert "Active signals: {'need': 2, 'block': 1}" in out
+    assert "Strongest signals: [('a', 4), ('b', 3), ('a', 0.1)]" in out
+    assert (tmp_path / "pher.json.index").exists()
+    index = monitor.index
+    await monitor.handler.add_signal(make_signal(4, category="state"))
+    assert await monitor.refresh_index(signals) is index
+    assert index.counts("category") == {"need": 2, "block": 1, "state": 1}
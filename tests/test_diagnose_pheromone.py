@@ -4,6 +4,7 @@ import sys
 import pytest
 
 from diagnose_pheromone import diagnose, DiagnosticError, main
+from src.pheromone_codec import encode, is_compact, loads
 
 
 @pytest.mark.asyncio
@@ -58,3 +59,26 @@ def test_main_error(tmp_path: Path, capsys, monkeypatch: pytest.MonkeyPatch) ->
     main()
     captured = capsys.readouterr()
     assert "does not exist" in captured.out
+
+
+def test_main_compact_messages(tmp_path: Path, capsys, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = tmp_path / "pheromone.json"
+    p.write_text(json.dumps({"signals": [{"message": "a; b; a"}]}))
+    monkeypatch.setattr(sys, "argv", ["prog", str(p), "--compact-messages"])
+    main()
+    assert "Compacted 1" in capsys.readouterr().out
+    assert json.loads(p.read_text())["signals"][0]["message"] == "b; a"
+
+
+def test_compact_files_are_diagnosed_and_migrated_in_place(tmp_path: Path, capsys, monkeypatch: pytest.MonkeyPatch) -> None:
+    p = tmp_path / "pheromone"
+    p.write_bytes(encode({"signals": [{"message": "a; b; a"}]}))
+    monkeypatch.setattr(sys, "argv", ["prog", str(p), "--compact-messages"])
+    main()
+    assert "Compact structure valid" in capsys.readouterr().out
+    assert is_compact(p.read_bytes())
+    assert loads(p.read_bytes())["signals"][0]["message"] == "b; a"
+    p.write_bytes(p.read_bytes()[:-4])
+    monkeypatch.setattr(sys, "argv", ["prog", str(p)])
+    main()
+    assert "Compact format error" in capsys.readouterr().out
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.file_pool import FilePool
+
+
+@pytest.mark.asyncio
+async def test_coalesced_reads_and_handle_reuse(tmp_path: Path) -> None:
+    pool = FilePool(max_workers=2, max_handles=2)
+    path = tmp_path / "a.json"
+    path.write_text('{"a": 1}')
+    results = await asyncio.gather(*(pool.read(str(path)) for _ in range(10)))
+    assert results == ['{"a": 1}'] * 10
+    stats = pool.stats()
+    assert stats["reads"] + stats["coalesced"] == 10 and stats["coalesced"] >= 1
+    await pool.read(str(path))
+    assert pool.stats()["open_handles"] == 1
+    for name in "bcd":
+        (tmp_path / name).write_text(name)
+        assert await pool.read(str(tmp_path / name)) == name
+    assert pool.stats()["open_handles"] == 2
+    assert pool.stats()["in_flight"] == 0 and pool.stats()["queued"] == 0
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_write_replaces_and_invalidates(tmp_path: Path) -> None:
+    pool = FilePool()
+    path = tmp_path / "p.json"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+    assert await pool.read(str(path)) == "old"
+    await pool.write(str(path), "new")
+    assert await pool.read(str(path)) == "new"
+    assert path.stat().st_mode & 0o777 == 0o640
+    tmp = tmp_path / "swap"
+    tmp.write_text("external")
+    os.replace(tmp, path)
+    assert await pool.read(str(path)) == "external"
+    with pytest.raises(FileNotFoundError):
+        await pool.read(str(tmp_path / "missing"))
+    assert pool.stats()["bytes_written"] == 3
+    pool.close()
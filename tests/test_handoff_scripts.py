@@ -12,7 +12,8 @@ from scripts.handoff_scripts import (
     debug_complete_handoff,
 )
 from src.pheromone_handler import PheromoneHandler
-from src.traffic_controller import determine_route
+from src.traffic_controller import determine_route, load_pheromone, route_store
+from src.pheromone_store import open_pheromone_store
 
 
 @pytest.mark.asyncio
@@ -34,3 +35,13 @@ async def test_handoff_sequence(tmp_path: Path) -> None:
     await debug_complete_handoff("tester-tdd-master", str(pher))
     agent = await determine_route(await handler.read_safe() or {}, handler)
     assert agent == "tester-tdd-master"
+
+
+@pytest.mark.asyncio
+async def test_handoffs_use_the_sharded_store(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PHEROMONE_SHARD_BY", "category")
+    pher = str(tmp_path / "pher.json")
+    await code_complete_handoff(pher)
+    data = await load_pheromone({"pheromoneFile": pher})
+    assert sorted(s["category"] for s in data["signals"]) == ["need", "state"]
+    assert await route_store(open_pheromone_store(pher)) == "tester-tdd-master"
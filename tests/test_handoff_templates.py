@@ -10,3 +10,8 @@ def test_signal_templates() -> None:
     assert s3["category"] == "coordinate"
     s4 = error_signal("err")
     assert s4["strength"] >= 8.5
+
+
+def test_task_completion_names_source() -> None:
+    assert "source" not in task_completion("done")
+    assert task_completion("done", source="coder-test-driven")["source"] == "coder-test-driven"
@@ -0,0 +1,110 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.near_duplicates import (
+    MinHasher,
+    NearDuplicateConfig,
+    NearDuplicateError,
+    find_near_duplicates,
+    merge_near_duplicates,
+    shingles,
+)
+
+
+def _sig(message: str, files=None, strength: float = 5.0, category: str = "need", ts: int = 0, target: str = "a") -> dict:
+    return {
+        "category": category,
+        "target": target,
+        "message": message,
+        "strength": strength,
+        "timestamp": ts,
+        "context": {"modified_files": files or []},
+    }
+
+
+def test_signatures_are_stable_and_estimate_jaccard() -> None:
+    hasher = MinHasher(128, seed=7)
+    left = shingles("the parser fails on nested blocks in config files")
+    right = shingles("the parser fails on nested blocks in yaml files")
+    assert hasher.signature(left) == MinHasher(128, seed=7).signature(left)
+    exact = len(left & right) / len(left | right)
+    sig_l, sig_r = hasher.signature(left), hasher.signature(right)
+    estimate = sum(a == b for a, b in zip(sig_l, sig_r)) / 128
+    assert abs(estimate - exact) < 0.2
+    assert hasher.signature([]) is None
+
+
+def test_clusters_paraphrases_and_overlapping_files() -> None:
+    signals = [
+        _sig("Need tests for the payment gateway retry logic module", ["pay.py", "retry.py"]),
+        _sig("Write a report on quarterly revenue for stakeholders", ["report.md"]),
+        _sig("Need tests for the payment gateway retry logic code", ["pay.py", "retry.py"]),
+        _sig("Need tests for the payment gateway retry logic module", ["pay.py", "retry.py"], category="block"),
+        _sig("unrelated", ["pay.py", "retry.py", "db.py"]),
+        _sig("Need tests for the payment gateway retry logic module", ["pay.py", "retry.py"], target="b"),
+    ]
+    assert find_near_duplicates(signals) == [[0, 2]]
+    loose = NearDuplicateConfig(threshold=0.3, same_category=False)
+    assert [0, 2, 3, 5] in find_near_duplicates(signals, loose)
+
+
+def test_signatures_are_cached_between_passes(monkeypatch: pytest.MonkeyPatch) -> None:
+    signals = [_sig(f"Cache entry {i} needs an eviction policy review", [f"c{i}.py"]) for i in range(20)]
+    find_near_duplicates(signals)
+    calls = []
+    original = MinHasher.signature
+    monkeypatch.setattr(MinHasher, "signature", lambda self, tokens: calls.append(1) or original(self, tokens))
+    find_near_duplicates(signals + [_sig("A brand new signal about logging", ["log.py"])])
+    assert len(calls) == 2
+
+
+def test_merge_policies() -> None:
+    def batch():
+        return [
+            _sig("Refactor the cache layer to drop global state", ["a.py"], strength=3, ts=1),
+            _sig("Refactor the cache layer to drop global state now", ["a.py", "b.py"], strength=8, ts=2),
+            _sig("Refactor the cache layer to drop global state soon", ["a.py"], strength=4, ts=3),
+        ]
+
+    config = NearDuplicateConfig(threshold=0.4)
+    strongest = merge_near_duplicates(batch(), config)
+    assert len(strongest) == 1
+    assert strongest[0]["strength"] == 8
+    assert strongest[0]["merged"]["count"] == 3
+    assert strongest[0]["context"]["modified_files"] == ["a.py", "b.py"]
+
+    config.policy = "latest"
+    assert merge_near_duplicates(batch(), config)[0]["timestamp"] == 3
+    config.policy = "bogus"
+    with pytest.raises(NearDuplicateError):
+        merge_near_duplicates(batch(), config)
+    with pytest.raises(NearDuplicateError):
+        find_near_duplicates(batch(), NearDuplicateConfig(num_perm=10, bands=3))
+
+
+@pytest.mark.asyncio
+async def test_batch_update_folds_near_duplicates_when_enabled(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import json
+
+    import src.pheromone_helpers as helpers
+
+    monkeypatch.setattr(helpers, "NEAR_DUPLICATES", True)
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+    signals = [
+        {"signalType": "t", "category": "need", "strength": 2, "message": "Add retries to the upload client for flaky networks",
+         "context": {"modified_files": ["src/up.py", "src/net.py"]}},
+        {"signalType": "u", "category": "need", "strength": 6, "message": "Write a design doc for sharding",
+         "context": {"modified_files": ["docs/shard.md"]}},
+        {"signalType": "t", "category": "need", "strength": 4, "message": "Add retries to the upload client for flaky network links",
+         "context": {"modified_files": ["src/net.py", "src/up.py"]}},
+    ]
+    await helpers.batch_update_pheromone(str(p), signals)
+    data = await helpers.load_pheromone(str(p))
+    merged = [s for s in data["signals"] if s["signalType"] == "t"]
+    assert len(data["signals"]) == 2 and len(merged) == 1
+    assert merged[0]["strength"] == 4 and merged[0]["merged"]["count"] == 2
@@ -0,0 +1,62 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.pheromone_codec import CodecError, decode, encode, is_compact, loads, main
+from src.pheromone_handler import PheromoneHandler
+from src.pheromone_helpers import load_pheromone, save_pheromone
+
+
+def _doc(n: int) -> dict:
+    return {
+        "signals": [
+            {
+                "id": f"sig-{i}",
+                "signalType": "work_request",
+                "category": "need",
+                "strength": 7.25 if i % 2 else 7,
+                "target": "coder-test-driven",
+                "message": f"implement feature {i}",
+                "timestamp": 1700000000 + i,
+                "context": {"urgency": -0.5, "done": i % 2 == 0, "files": ["@src/a.py"], "note": None},
+            }
+            for i in range(n)
+        ],
+        "metadata": {"created": 1, "big": 2**70},
+    }
+
+
+def test_roundtrip_and_size() -> None:
+    doc = _doc(200)
+    raw = encode(doc)
+    assert is_compact(raw)
+    assert decode(raw) == doc
+    assert loads(json.dumps(doc).encode()) == doc
+    assert len(raw) * 3 < len(json.dumps(doc, indent=2))
+    with pytest.raises(CodecError):
+        decode(raw[:-3])
+
+
+@pytest.mark.asyncio
+async def test_compact_files_are_autodetected(tmp_path: Path) -> None:
+    path = tmp_path / "p"
+    handler = PheromoneHandler(str(path), compact=True)
+    await handler.write_safe(_doc(3))
+    assert is_compact(path.read_bytes())
+    assert (await PheromoneHandler(str(path)).read_safe()) == _doc(3)
+    assert (await load_pheromone(str(path)))["metadata"]["big"] == 2**70
+    await save_pheromone(str(path), _doc(1))
+    assert not is_compact(path.read_bytes())
+
+
+def test_cli_conversion(tmp_path: Path) -> None:
+    src = tmp_path / "p.json"
+    src.write_text(json.dumps(_doc(2)))
+    assert main(["to-binary", str(src), str(tmp_path / "p.bin")]) == 0
+    assert main(["to-json", str(tmp_path / "p.bin"), str(tmp_path / "back.json")]) == 0
+    assert json.loads((tmp_path / "back.json").read_text()) == _doc(2)
+    assert main(["to-json", str(tmp_path / "missing"), str(tmp_path / "x")]) == 1
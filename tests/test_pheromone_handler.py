@@ -1,8 +1,15 @@
+import asyncio
+import fcntl
 import json
+import os
+import threading
+import time
 from pathlib import Path
 import pytest
 
+import src.pheromone_handler as ph
 from src.pheromone_handler import PheromoneHandler, PheromoneHandlerError
+from src.shared_cache import SharedCacheError, SharedSnapshotCache
 
 
 @pytest.mark.asyncio
@@ -52,3 +59,262 @@ async def test_validate_failure(tmp_path: Path) -> None:
     bad = {"signals": [{}]}
     with pytest.raises(PheromoneHandlerError):
         await handler.write_safe(bad)
+
+
+@pytest.mark.asyncio
+async def test_wal_append_and_replay(tmp_path: Path, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    handler = PheromoneHandler(str(p), wal=True)
+    await handler.write_safe({"signals": [make_signal(0)]})
+    snapshot = p.read_text()
+    await handler.add_signal(make_signal(1))
+    await handler.add_signal(make_signal(2))
+    assert p.read_text() == snapshot
+    data = await handler.read_safe()
+    assert [s["id"] for s in data["signals"]] == ["0", "1", "2"]
+    await handler.checkpoint()
+    assert not handler.wal_path.exists()
+    assert len(json.loads(p.read_text())["signals"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_wal_torn_tail_and_auto_checkpoint(tmp_path: Path, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    handler = PheromoneHandler(str(p), wal=True, checkpoint_bytes=10**6)
+    await handler.add_signal(make_signal(1))
+    with open(handler.wal_path, "ab") as log:
+        log.write(b"\x00\x00\x01\x00garbage")
+    assert len((await handler.read_safe())["signals"]) == 1
+    await handler.add_signal(make_signal(2))
+    assert len((await handler.read_safe())["signals"]) == 2
+    handler.checkpoint_bytes = 1
+    await handler.add_signal(make_signal(3))
+    assert not handler.wal_path.exists()
+    assert len(json.loads(p.read_text())["signals"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_wal_appends_without_rereading_the_log(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    handler = PheromoneHandler(str(p), wal=True, checkpoint_bytes=10**6)
+    await handler.add_signal(make_signal(1))
+    scans = []
+    original = PheromoneHandler._scan_log
+    monkeypatch.setattr(PheromoneHandler, "_scan_log", staticmethod(lambda raw, parse=True: scans.append(len(raw)) or original(raw, parse)))
+    for idx in range(2, 6):
+        await handler.add_signal(make_signal(idx))
+    assert scans == []
+    # A log touched by another writer is verified once before appending again.
+    with open(handler.wal_path, "ab") as log:
+        log.write(b"torn")
+    await handler.add_signal(make_signal(6))
+    await handler.add_signal(make_signal(7))
+    assert len(scans) == 1
+    monkeypatch.undo()
+    assert [s["id"] for s in (await handler.read_safe())["signals"]] == [str(i) for i in range(1, 8)]
+
+
+@pytest.mark.asyncio
+async def test_group_commit_batches_concurrent_writers(tmp_path: Path, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    handler = PheromoneHandler(str(p), group_commit=True, batch_size=8, batch_delay=0.01)
+    commits = []
+    original = handler._write_locked
+
+    async def counting(text: str, data: dict) -> None:
+        commits.append(text)
+        await original(text, data)
+
+    handler._write_locked = counting
+    await asyncio.gather(*(handler.add_signal(make_signal(i)) for i in range(20)))
+    data = await handler.read_safe()
+    assert sorted(int(s["id"]) for s in data["signals"]) == list(range(20))
+    assert len(commits) <= 3
+    await handler.write_safe({"signals": []})
+    assert (await handler.read_safe())["signals"] == []
+
+
+@pytest.mark.asyncio
+async def test_group_commit_is_shared_across_handlers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    commits = []
+    original = PheromoneHandler._write_locked
+
+    async def counting(self: PheromoneHandler, text: bytes, data: dict) -> None:
+        commits.append(text)
+        await original(self, text, data)
+
+    monkeypatch.setattr(PheromoneHandler, "_write_locked", counting)
+    handlers = [PheromoneHandler(str(p), group_commit=True, batch_size=32, batch_delay=0.01) for _ in range(10)]
+    await asyncio.gather(*(h.add_signal(make_signal(i)) for i, h in enumerate(handlers)))
+    assert len(commits) == 1
+    assert len((await handlers[0].read_safe())["signals"]) == 10
+
+
+@pytest.mark.asyncio
+async def test_transaction_and_update(tmp_path: Path, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    handler = PheromoneHandler(str(p))
+    async with handler.transaction() as data:
+        data["signals"].extend([make_signal(1), make_signal(2, "block")])
+    removed = await handler.update(lambda d: d["signals"].pop())
+    assert removed["category"] == "block"
+    with pytest.raises(RuntimeError):
+        async with handler.transaction() as data:
+            data["signals"].clear()
+            raise RuntimeError("abort")
+    assert [s["id"] for s in (await handler.read_safe())["signals"]] == ["1"]
+
+
+@pytest.mark.asyncio
+async def test_readers_share_lock_and_writers_serialize(tmp_path: Path, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    handler = PheromoneHandler(str(p))
+    other = PheromoneHandler(str(p))
+    assert handler._file_lock is other._file_lock
+    async with handler._lock(shared=True):
+        assert await asyncio.wait_for(other.read_safe(), 1) is None
+        writer = asyncio.ensure_future(other.add_signal(make_signal(0)))
+        await asyncio.sleep(0.05)
+        assert not writer.done()
+    await writer
+    await asyncio.gather(*(handler.add_signal(make_signal(i)) for i in range(1, 31)))
+    data = await other.read_safe()
+    assert len(data["signals"]) == 31
+
+
+@pytest.mark.asyncio
+async def test_cancelled_lock_wait_does_not_leak_flock(tmp_path: Path) -> None:
+    handler = PheromoneHandler(str(tmp_path / "pheromone.json"))
+    holder = os.open(handler.lock_path, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(holder, fcntl.LOCK_EX)
+    waiter = asyncio.ensure_future(handler.read_safe())
+    await asyncio.sleep(0.05)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    fcntl.flock(holder, fcntl.LOCK_UN)
+    await asyncio.sleep(0.05)
+    fcntl.flock(holder, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    fcntl.flock(holder, fcntl.LOCK_UN)
+    os.close(holder)
+    assert await asyncio.wait_for(handler.read_safe(), 1) is None
+
+
+def test_locks_exclude_event_loops_in_other_threads(tmp_path: Path) -> None:
+    handler = PheromoneHandler(str(tmp_path / "pheromone.json"))
+    active, peak = [0], [0]
+
+    async def hold() -> None:
+        async with handler._lock():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            active[0] -= 1
+
+    def run() -> None:
+        for _ in range(5):
+            asyncio.run(hold())
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_views(tmp_path: Path, make_signal) -> None:
+    p = tmp_path / "pheromone.json"
+    handler = PheromoneHandler(str(p))
+    await handler.write_safe({"signals": [make_signal(1)]})
+    view = await handler.read_view()
+    assert await handler.read_view() is view
+    with pytest.raises(TypeError):
+        view["signals"].append(make_signal(2))
+    with pytest.raises(TypeError):
+        view["signals"][0]["strength"] = 1.0
+    copy = await handler.read_safe()
+    copy["signals"].append(make_signal(2))
+    assert len((await handler.read_view())["signals"]) == 1
+    await handler.add_signal(make_signal(3))
+    assert [s["id"] for s in (await handler.read_view())["signals"]] == ["1", "3"]
+    p.write_text(json.dumps({"signals": []}) + "\n")
+    assert (await handler.read_view())["signals"] == []
+    assert json.loads(json.dumps(view)) == {"signals": [make_signal(1)]}
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_serves_other_processes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    path = tmp_path / "p.json"
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("PHEROMONE_SHARED_CACHE_DIR", str(cache_dir))
+    writer = PheromoneHandler(str(path), shared_cache=True)
+    await writer.write_safe({"signals": [make_signal(1)]})
+    assert list(cache_dir.glob("*.snap"))
+
+    # A fresh process has an empty in-memory snapshot cache and must not need to parse.
+    ph._SNAPSHOTS.clear()
+    reader = PheromoneHandler(str(path), shared_cache=True)
+    monkeypatch.setattr(reader, "_parse", lambda raw: pytest.fail("parsed despite shared snapshot"))
+    data = await reader.read_safe()
+    assert data["signals"][0]["id"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_published_off_the_event_loop(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    monkeypatch.setenv("PHEROMONE_SHARED_CACHE_DIR", str(tmp_path / "cache"))
+    handler = PheromoneHandler(str(tmp_path / "p.json"), shared_cache=True)
+    threads = []
+    original = handler._publish
+    monkeypatch.setattr(handler, "_publish", lambda *args: threads.append(threading.current_thread()) or original(*args))
+    await handler.write_safe({"signals": [make_signal(1)]})
+    assert threads and threading.main_thread() not in threads
+
+@pytest.mark.asyncio
+async def test_shared_cache_ignores_stale_generation(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    path = tmp_path / "p.json"
+    monkeypatch.setenv("PHEROMONE_SHARED_CACHE_DIR", str(tmp_path / "cache"))
+    handler = PheromoneHandler(str(path), shared_cache=True)
+    await handler.write_safe({"signals": [make_signal(1)]})
+    path.write_text(json.dumps({"signals": [make_signal(2)]}))
+    ph._SNAPSHOTS.clear()
+    data = await PheromoneHandler(str(path), shared_cache=True).read_safe()
+    assert data["signals"][0]["id"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_ignores_snapshots_others_can_write(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    path = tmp_path / "p.json"
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("PHEROMONE_SHARED_CACHE_DIR", str(cache_dir))
+    await PheromoneHandler(str(path), shared_cache=True).write_safe({"signals": [make_signal(1)]})
+    (snap,) = cache_dir.glob("*.snap")
+
+    for target in (snap, cache_dir):
+        target.chmod(0o777 if target.is_dir() else 0o666)
+        ph._SNAPSHOTS.clear()
+        reader = PheromoneHandler(str(path), shared_cache=True)
+        parsed = []
+        original = reader._parse
+        monkeypatch.setattr(reader, "_parse", lambda raw: parsed.append(1) or original(raw))
+        data = await reader.read_safe()
+        assert parsed and data["signals"][0]["id"] == "1"
+        target.chmod(0o700 if target.is_dir() else 0o600)
+
+    cache_dir.chmod(0o777)
+    with pytest.raises(SharedCacheError):
+        SharedSnapshotCache(str(cache_dir)).store(str(path), [1], {"signals": []})
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_keeps_recent_paths_only(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    monkeypatch.setattr(ph, "_SNAPSHOTS", ph._SnapshotCache(2))
+    handlers = [PheromoneHandler(str(tmp_path / f"p{i}.json")) for i in range(3)]
+    for i, handler in enumerate(handlers):
+        await handler.write_safe({"signals": [make_signal(i)]})
+    assert len(ph._SNAPSHOTS) == 2
+    assert ph._SNAPSHOTS.get(handlers[0]._cache_key) is None
+    assert (await handlers[0].read_safe())["signals"][0]["id"] == "0"
+    assert ph._SNAPSHOTS.get(handlers[1]._cache_key) is None
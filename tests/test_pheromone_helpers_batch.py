@@ -1,3 +1,4 @@
+import asyncio
 import json
 from pathlib import Path
 import sys
@@ -6,8 +7,15 @@ import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import src.pheromone_helpers as helpers
 from src.signal_cache import SignalCache
-from src.pheromone_helpers import batch_update_pheromone, load_pheromone
+from src.pheromone_helpers import (
+    batch_update_pheromone,
+    load_pheromone,
+    sanitize_batch,
+    sanitize_context,
+    stream_update_pheromone,
+)
 
 
 @pytest.mark.asyncio
@@ -23,3 +31,84 @@ async def test_batch_update(tmp_path: Path) -> None:
     data = await load_pheromone(str(p), cache)
     assert len(data["signals"]) == 1
     assert cache.metrics()["writes"] >= 1
+
+
+def _contexts(n: int) -> list:
+    return [
+        {
+            "modified_files": [f"src/m{i}.py", "bad path"],
+            "architecture_summary": "Decided to use Observer Pattern\n* keep Facade Pattern",
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sanitize_batch_matches_serial() -> None:
+    expected = [sanitize_context(ctx) for ctx in _contexts(40)]
+    assert await sanitize_batch(_contexts(40), threshold=10**9, chunk_size=7) == expected
+    assert await sanitize_batch(_contexts(40), threshold=1, chunk_size=7) == expected
+    pool = helpers._SANITIZE_POOL
+    assert pool is not None and pool._mp_context.get_start_method() != "fork"
+
+
+@pytest.mark.asyncio
+async def test_batch_update_reports_timings(tmp_path: Path) -> None:
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+    signals = [{"signalType": "t", "category": "need", "strength": 1, "message": "m", "context": ctx} for ctx in _contexts(3)]
+    timings = await batch_update_pheromone(str(p), signals)
+    assert {"load", "sanitize", "consolidate", "save", "total"} <= set(timings)
+    data = await load_pheromone(str(p))
+    assert data["signals"][0]["context"]["patterns_used"] == ["Observer Pattern", "Facade Pattern"]
+
+
+@pytest.mark.asyncio
+async def test_stream_update_commits_in_chunks(tmp_path: Path) -> None:
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+
+    async def source():
+        for i in range(10):
+            yield {"signalType": "t", "category": "need", "target": str(i), "strength": 1, "message": "m",
+                   "context": {"modified_files": [f"f{i}.py"]}}
+
+    acks = [ack async for ack in stream_update_pheromone(str(p), source(), max_signals=4)]
+    assert [a.signals for a in acks] == [4, 4, 2]
+    assert [a.reason for a in acks] == ["count", "count", "end"]
+    data = await load_pheromone(str(p))
+    assert len(data["signals"]) == 10
+
+
+@pytest.mark.asyncio
+async def test_stream_update_flushes_on_time(tmp_path: Path) -> None:
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+
+    async def source():
+        for i in range(2):
+            yield {"signalType": "t", "category": "need", "target": str(i), "strength": 1, "message": "m"}
+            await asyncio.sleep(0.05)
+
+    acks = [ack async for ack in stream_update_pheromone(str(p), source(), max_signals=100, max_delay=0.01)]
+    assert [(a.reason, a.signals) for a in acks] == [("time", 1), ("time", 1)]
+
+
+@pytest.mark.asyncio
+async def test_stream_update_applies_backpressure(tmp_path: Path) -> None:
+    p = tmp_path / "p.json"
+    p.write_text(json.dumps({"signals": []}))
+    produced = []
+
+    async def source():
+        for i in range(50):
+            produced.append(i)
+            yield {"signalType": "t", "category": "need", "target": str(i), "strength": 1, "message": "m"}
+
+    stream = stream_update_pheromone(str(p), source(), max_signals=1, max_pending=1)
+    await stream.__anext__()
+    await asyncio.sleep(0.05)
+    # one chunk being acknowledged, one queued and one waiting to be queued
+    assert len(produced) <= 4
+    rest = [ack async for ack in stream]
+    assert len(rest) == 49
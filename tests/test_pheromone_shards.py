@@ -0,0 +1,62 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.pheromone_shards import ShardedPheromoneHandler
+from src.pheromone_store import open_pheromone_store
+
+
+@pytest.mark.asyncio
+async def test_category_shards_and_merged_view(tmp_path: Path, make_signal) -> None:
+    handler = ShardedPheromoneHandler(str(tmp_path / "p"))
+    assert await handler.read_safe() is None
+    await asyncio.gather(
+        handler.add_signal(make_signal(2, "need")),
+        handler.add_signal(make_signal(1, "coordinate")),
+        handler.add_signal(make_signal(3, "block")),
+    )
+    assert handler.shards() == ["block", "coordinate", "need"]
+    assert (handler.directory / "need.pheromone.backup").exists()
+    data = await handler.read_view()
+    assert [s["id"] for s in data["signals"]] == ["1", "2", "3"]
+    await handler.clear_signals_by_category("need")
+    assert [s["id"] for s in (await handler.read_safe())["signals"]] == ["1", "3"]
+    await handler.write_safe({"signals": [make_signal(4, "state")], "metadata": {"v": 1}})
+    data = await handler.read_safe()
+    assert [s["id"] for s in data["signals"]] == ["4"]
+    assert data["metadata"] == {"v": 1}
+
+
+@pytest.mark.asyncio
+async def test_target_shards_transaction(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    monkeypatch.setenv("PHEROMONE_SHARD_BY", "target")
+    handler = open_pheromone_store(str(tmp_path / "p"))
+    assert isinstance(handler, ShardedPheromoneHandler)
+    handler.target_shards = 4
+    async with handler.transaction() as data:
+        data["signals"].extend(make_signal(i, "need", f"agent-{i}") for i in range(6))
+        data["signals"].append(make_signal(9, "novel"))
+    await handler.update(lambda d: d["signals"].pop(0))
+    data = await handler.read_safe()
+    assert [s["id"] for s in data["signals"]] == ["1", "2", "3", "4", "5", "9"]
+    assert all(name.startswith("target-") for name in handler.shards())
+
+
+@pytest.mark.asyncio
+async def test_transaction_rewrites_only_changed_shards(tmp_path: Path, make_signal) -> None:
+    handler = ShardedPheromoneHandler(str(tmp_path / "p"))
+    await handler.add_signal(make_signal(1, "need"))
+    await handler.add_signal(make_signal(2, "block"))
+    block = handler.directory / "block.pheromone"
+    before = block.stat().st_mtime_ns
+    async with handler.transaction() as data:
+        data["signals"].append(make_signal(3, "need"))
+        data["signals"].append(make_signal(4, "novel"))
+    assert block.stat().st_mtime_ns == before
+    assert not (handler.directory / "compass.pheromone").exists()
+    assert sorted(p.name for p in handler.directory.glob("*.pheromone")) == ["block.pheromone", "need.pheromone", "novel.pheromone"]
+    assert [s["id"] for s in (await handler.read_safe())["signals"]] == ["1", "2", "3", "4"]
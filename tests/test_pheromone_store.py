@@ -0,0 +1,52 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.pheromone_handler import PheromoneHandler, PheromoneHandlerError
+from src.pheromone_store import SQLitePheromoneStore, open_pheromone_store
+
+
+@pytest.mark.asyncio
+async def test_store_interface_and_queries(tmp_path: Path, make_signal) -> None:
+    store = SQLitePheromoneStore(str(tmp_path / "p.db"))
+    assert await store.read_safe() is None
+    await store.write_safe({"signals": [make_signal(1), make_signal(2, "block", "b", 9.0)], "metadata": {"v": 1}})
+    await store.add_signal(make_signal(3, "need", "b", 7.0))
+    data = await store.read_safe()
+    assert [s["id"] for s in data["signals"]] == ["1", "2", "3"]
+    assert data["metadata"] == {"v": 1}
+    assert [s["id"] for s in await store.signals_by_category("need")] == ["1", "3"]
+    assert [s["id"] for s in await store.signals_by_target("b")] == ["2", "3"]
+    assert [s["id"] for s in await store.signals_between(2, 3)] == ["2", "3"]
+    assert (await store.strongest(1))[0]["id"] == "2"
+    assert (await store.strongest(1, category="need"))[0]["id"] == "3"
+    assert await store.delete_older_than(2) == 1
+    assert await store.clear_signals_by_category("block") == 1
+    assert await store.count() == 1
+    with pytest.raises(PheromoneHandlerError):
+        await store.add_signal({"id": "x"})
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_store_transaction_and_json_roundtrip(tmp_path: Path, make_signal) -> None:
+    src = tmp_path / "src.pheromone"
+    await PheromoneHandler(str(src)).write_safe({"signals": [make_signal(1), make_signal(2)]})
+    store = open_pheromone_store(str(tmp_path / "p.sqlite"))
+    assert isinstance(store, SQLitePheromoneStore)
+    assert await store.import_json(str(src)) == 2
+    async with store.transaction() as data:
+        data["signals"].append(make_signal(3))
+    with pytest.raises(RuntimeError):
+        async with store.transaction() as data:
+            data["signals"].clear()
+            raise RuntimeError("abort")
+    out = tmp_path / "out.pheromone"
+    assert await store.export_json(str(out)) == 3
+    assert [s["id"] for s in json.loads(out.read_text())["signals"]] == ["1", "2", "3"]
+    assert isinstance(open_pheromone_store(str(out)), PheromoneHandler)
+    store.close()
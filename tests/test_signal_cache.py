@@ -7,7 +7,8 @@ import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from src.signal_cache import SignalCache, SignalCacheError
+from src.signal_cache import SignalCache, SignalCacheError, estimate_size
+from src.signal_table import SignalTable
 
 
 @pytest.mark.asyncio
@@ -48,3 +49,238 @@ async def test_cache_invalidate() -> None:
     cache.invalidate("y")
     with pytest.raises(SignalCacheError):
         await cache.get("y")
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used() -> None:
+    cache = SignalCache(ttl=10, max_entries=2)
+    await cache.set("a", ["1"])
+    await cache.set("b", ["2"])
+    await cache.get("a")
+    await cache.set("c", ["3"])
+    assert await cache.get("a") == ["1"]
+    with pytest.raises(SignalCacheError):
+        await cache.get("b")
+    metrics = cache.metrics()
+    assert metrics["evictions"] == 1
+    assert metrics["entries"] == 2
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_bounded_by_bytes() -> None:
+    cache = SignalCache(ttl=10, max_bytes=2000)
+    for i in range(20):
+        await cache.set(str(i), [{"message": "x" * 200}])
+    metrics = cache.metrics()
+    assert metrics["bytes"] <= 2000
+    assert metrics["evictions"] == 20 - metrics["entries"]
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_sweeper_removes_expired() -> None:
+    cache = SignalCache(ttl=1, sweep_interval=0.05)
+    await cache.set("k", ["v"])
+    cache._cache["k"].timestamp -= 5
+    await asyncio.sleep(0.15)
+    assert cache.metrics()["entries"] == 0
+    assert cache.metrics()["expirations"] == 1
+    await cache.aclose()
+
+
+def test_estimate_size_samples_long_lists() -> None:
+    doc = {"signals": [{"id": f"s{i}", "message": f"message {i} " * 4, "strength": i / 3} for i in range(5000)]}
+    exact = estimate_size(doc, sample=len(doc["signals"]))
+    sampled = estimate_size(doc)
+    assert abs(sampled - exact) / exact < 0.1
+
+
+def test_estimate_size_measures_signal_tables(make_signal) -> None:
+    signals = [make_signal(i, target=f"agent-{i % 7}") for i in range(5000)]
+    table = SignalTable(signals)
+    size = estimate_size({"signals": table})
+    assert size > table.nbytes(lambda extras: 0) > 5000 * 30
+    assert size < estimate_size({"signals": signals})
+
+
+def test_sweeper_restarts_on_a_new_event_loop() -> None:
+    cache = SignalCache(ttl=1, sweep_interval=0.05)
+    idle = asyncio.new_event_loop()
+    idle.run_until_complete(cache.set("a", ["v"]))
+    first = cache._sweeper
+
+    async def expire() -> None:
+        await cache.set("b", ["v"])
+        cache._cache["b"].timestamp -= 5
+        await asyncio.sleep(0.15)
+
+    try:
+        asyncio.run(expire())
+    finally:
+        first.cancel()
+        idle.run_until_complete(asyncio.gather(first, return_exceptions=True))
+        idle.close()
+    assert "b" not in cache._cache
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_single_flight() -> None:
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["v"]
+
+    cache = SignalCache(ttl=10)
+    results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(20)))
+    assert results == [["v"]] * 20
+    assert len(calls) == 1
+    assert cache.metrics()["coalesced"] == 19
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_serves_stale_while_revalidating() -> None:
+    version = [0]
+
+    async def loader():
+        version[0] += 1
+        await asyncio.sleep(0.01)
+        return [version[0]]
+
+    cache = SignalCache(ttl=1, stale_ttl=30)
+    assert await cache.get_or_load("k", loader) == [1]
+    cache._cache["k"].timestamp -= 2
+    assert await cache.get_or_load("k", loader) == [1]
+    await asyncio.sleep(0.05)
+    assert await cache.get_or_load("k", loader) == [2]
+    assert cache.metrics()["stale_hits"] == 1
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_caches_missing_files() -> None:
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        raise FileNotFoundError("gone")
+
+    cache = SignalCache(ttl=10, negative_ttl=10)
+    for _ in range(3):
+        with pytest.raises(FileNotFoundError):
+            await cache.get_or_load("k", loader)
+    assert len(calls) == 1
+    assert cache.metrics()["negative_hits"] == 2
+    await cache.set("k", ["now exists"])
+    assert await cache.get_or_load("k", loader) == ["now exists"]
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_and_flushes() -> None:
+    persisted = []
+    gate = asyncio.Event()
+
+    async def persist(key, value):
+        await gate.wait()
+        persisted.append((key, value))
+
+    cache = SignalCache(ttl=10, persist=persist, write_behind=True)
+    await cache.set("a", [1])
+    await asyncio.sleep(0)
+    for i in range(2, 6):
+        await cache.set("a", [i])
+    assert await cache.get("a") == [5]
+    gate.set()
+    await cache.flush()
+    assert persisted == [("a", [1]), ("a", [5])]
+    assert cache.metrics()["coalesced_writes"] == 3
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_backpressure_and_errors() -> None:
+    errors = []
+    gate = asyncio.Event()
+
+    async def persist(key, value):
+        await gate.wait()
+        if key == "bad":
+            raise OSError("disk full")
+
+    cache = SignalCache(ttl=10, persist=persist, write_behind=True, max_pending=1,
+                        on_persist_error=lambda k, e: errors.append(k))
+    await cache.set("bad", [0])
+    await asyncio.sleep(0)
+    await cache.set("b", [1])
+    blocked = asyncio.ensure_future(cache.set("c", [2]))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    gate.set()
+    await blocked
+    await cache.aclose()
+    assert errors == ["bad"]
+    assert cache.metrics()["persist_errors"] == 1
+    assert cache.metrics()["persists"] == 2
+
+
+@pytest.mark.asyncio
+async def test_write_behind_survives_failing_callback_and_dead_writer() -> None:
+    persisted = []
+
+    async def persist(key, value):
+        if key == "bad":
+            raise OSError("disk full")
+        persisted.append(key)
+
+    def on_error(key, exc):
+        raise RuntimeError("callback bug")
+
+    cache = SignalCache(ttl=10, persist=persist, write_behind=True, on_persist_error=on_error)
+    await cache.set("bad", [0])
+    await cache.set("b", [1])
+    await asyncio.wait_for(cache.flush(), 1)
+    assert persisted == ["b"]
+    assert cache.metrics()["persist_callback_errors"] == 1
+    cache._writer.cancel()
+    await asyncio.sleep(0)
+    await cache.set("c", [2])
+    await asyncio.wait_for(cache.aclose(), 1)
+    assert persisted == ["b", "c"]
+
+@pytest.mark.asyncio
+async def test_cache_latency_snapshot() -> None:
+    async def persist(key, value):
+        await asyncio.sleep(0.003)
+
+    cache = SignalCache(ttl=10, persist=persist)
+    await cache.set("k", ["v"])
+    for _ in range(3):
+        await cache.get("k")
+    with pytest.raises(SignalCacheError):
+        await cache.get("missing")
+    snap = cache.snapshot()
+    assert snap["latency"]["get"]["count"] == 4
+    assert snap["latency"]["persist"]["count"] == 1
+    assert snap["latency"]["persist"]["p50"] >= 0.0025
+    assert sum(snap["latency"]["set"]["buckets"].values()) == 1
+    assert snap["keys"]["k"]["get"]["count"] == 3
+    assert snap["hit_ratio"]["60s"] == 0.75
+    await cache.aclose()
+
+
+def test_latency_histogram_buckets() -> None:
+    from src.signal_cache import LatencyHistogram
+
+    hist = LatencyHistogram()
+    for value in (0.00001, 0.002, 0.002, 10.0):
+        hist.record(value)
+    snap = hist.snapshot()
+    assert snap["buckets"]["5e-05"] == 1
+    assert snap["buckets"]["0.0025"] == 2
+    assert snap["buckets"]["+Inf"] == 1
+    assert snap["max"] == 10.0
+    assert hist.quantile(0.5) == 0.0025
@@ -0,0 +1,116 @@
+import gc
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.pheromone_handler import PheromoneHandler
+from src.pheromone_helpers import load_pheromone, save_pheromone
+from src.signal_index import SignalIndex, SignalIndexError
+from src.traffic_controller import analyze_signal, determine_route
+
+
+def test_top_k_counts_and_range(make_signal) -> None:
+    signals = [make_signal(1, "need", strength=3), make_signal(2, "block", "x", 9), make_signal(3, "need", strength=7), make_signal(4, "need", strength=7)]
+    index = SignalIndex.build(signals)
+    assert [s["id"] for s in index.top_k(3)] == ["2", "3", "4"]
+    assert [s["id"] for s in index.top_k(5, category="need")] == ["3", "4", "1"]
+    assert index.count(target="x") == 1
+    assert index.counts() == {"need": 3, "block": 1}
+    assert [s["id"] for s in index.range(2, 3)] == ["2", "3"]
+    with pytest.raises(SignalIndexError):
+        index.top_k(1, category="need", target="t")
+
+
+def test_incremental_updates_match_rebuild(make_signal) -> None:
+    signals = [make_signal(i, "need" if i % 2 else "block", strength=float(i % 7)) for i in range(50)]
+    index = SignalIndex.build(signals)
+    signals = [dict(s, strength=round(s["strength"] * 0.9, 2)) for s in signals if s["id"] != "10"]
+    signals.append(make_signal(99, "state", strength=8))
+    assert index.sync(signals)
+    assert not index.sync(signals)
+    rebuilt = SignalIndex.build(signals)
+    assert [s["id"] for s in index.top_k(60)] == [s["id"] for s in rebuilt.top_k(60)]
+    assert index.counts() == rebuilt.counts()
+    index.update_strength("99", 0.5)
+    ranked = [s["id"] for s in index.top_k(60)]
+    assert ranked.index("99") > ranked.index("1")
+    assert index.top_k(1, category="state")[0]["id"] == "99"
+
+
+def test_repeated_ids_are_indexed_per_row(make_signal) -> None:
+    signals = [make_signal(1, strength=2), make_signal(1, "block", strength=9), make_signal(2, strength=5)]
+    index = SignalIndex.build(signals)
+    assert len(index) == 3
+    assert index.counts() == {"need": 2, "block": 1}
+    assert [s["strength"] for s in index.top_k(3)] == [9, 5, 2]
+    assert not index.sync(signals)
+    assert index.sync(signals[1:])
+    assert index.counts() == {"block": 1, "need": 1}
+
+
+def test_ranks_by_effective_strength(make_signal) -> None:
+    now = 10000.0
+    faded = dict(make_signal(1, strength=9), decay={"initial": 9, "created": now - 600, "rate": 0.5, "period": 60})
+    signals = [faded, make_signal(2, strength=3), make_signal(3, strength=1)]
+    index = SignalIndex.build(signals)
+    assert [s["id"] for s in index.top_k(3, now=now)] == ["2", "3", "1"]
+    assert [s["id"] for s in index.top_k(3, now=now - 600)] == ["1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_determine_route_with_index(make_signal) -> None:
+    signals = [make_signal(1, "need", strength=2), make_signal(2, "block", strength=9)]
+    index = SignalIndex.build(signals)
+    assert await determine_route({"signals": signals}, index=index) == "debugger-targeted"
+
+
+@pytest.mark.asyncio
+async def test_handler_keeps_index_current_and_saved(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_signal) -> None:
+    path = str(tmp_path / "pher.json")
+    handler = PheromoneHandler(path, wal=True)
+    await handler.write_safe({"signals": [make_signal(1, strength=2), make_signal(2, "block", strength=6)]})
+    index = await handler.signal_index(analyze_signal)
+    await handler.add_signal(make_signal(3, "compass", strength=8))
+    assert len(index) == 3 and index.stamp == handler._stamp()
+    await handler.clear_signals_by_category("compass")
+    assert index.counts() == {"need": 1, "block": 1}
+    data = await load_pheromone(path)
+    data["signals"][1]["strength"] = 1.0
+    await save_pheromone(path, data)
+    assert [s["id"] for s in index.top_k(2)] == ["1", "2"]
+    assert await handler.signal_index() is index
+    assert Path(SignalIndex.path_for(path)).exists()
+    await handler.add_signal(make_signal(4, "need", strength=9))
+    del handler, index
+    gc.collect()
+
+    def rebuild(*_args, **_kwargs):
+        raise AssertionError("saved index should be restored")
+
+    monkeypatch.setattr(SignalIndex, "build", classmethod(rebuild))
+    index = await PheromoneHandler(path, wal=True).signal_index(analyze_signal)
+    assert [s["id"] for s in index.top_k(3)] == ["4", "1", "2"]
+    assert index.best_route() == "coder-test-driven"
+
+
+def test_best_route_uses_agents_computed_at_insert(make_signal) -> None:
+    routed = []
+
+    def router(sig):
+        routed.append(sig["id"])
+        return analyze_signal(sig)
+
+    now = 10000.0
+    faded = dict(make_signal(1, "block", strength=9), decay={"initial": 9, "created": now - 600, "rate": 0.5, "period": 60})
+    signals = [faded, make_signal(2, "state", strength=7), make_signal(3, "need", strength=3)]
+    index = SignalIndex.build(signals, router)
+    assert index.best_route(now) == "coder-test-driven"
+    assert index.best_route(now - 600) == "debugger-targeted"
+    index.remove("3")
+    assert index.best_route(now) == "debugger-targeted"
+    assert routed == ["1", "2", "3"]
+    with pytest.raises(SignalIndexError):
+        SignalIndex.build(signals).best_route(now)
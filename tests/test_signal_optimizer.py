@@ -1,3 +1,4 @@
+import copy
 import json
 from pathlib import Path
 import sys
@@ -5,8 +6,17 @@ import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import src.signal_optimizer as so
+from scripts.benchmark_evaporation import RATES, generate_signals
 from src.signal_optimizer import (
+    MERGE_RECENT,
+    compact_decayed,
+    compact_merged_messages,
     consolidate_duplicates,
+    effective_strength,
+    evaporate_scalar,
+    evaporate_vectorized,
+    merge_duplicate,
     normalize_strengths,
     adaptive_evaporation,
 )
@@ -38,6 +48,26 @@ def test_consolidate_duplicates():
     assert result[0]["strength"] == 6
 
 
+def test_consolidate_duplicates_bounds_message():
+    signals = [
+        {"signalType": "a", "target": "x", "strength": 1, "message": f"m{i % 3 if i < 50 else i}", "timestamp": i}
+        for i in range(100)
+    ]
+    [sig] = consolidate_duplicates(signals)
+    assert sig["merged"]["count"] == 100
+    assert sig["merged"]["first"] == 0 and sig["merged"]["last"] == 99
+    assert len(sig["merged"]["recent"]) == MERGE_RECENT
+    assert sig["message"].split("; ")[-1] == "m99"
+
+
+def test_compact_merged_messages():
+    signals = [{"message": "a; b; a; " + "; ".join(f"x{i}" for i in range(20)), "timestamp": 5}, {"message": "plain"}]
+    assert compact_merged_messages(signals) == 1
+    assert signals[0]["merged"]["count"] == 23
+    assert len(signals[0]["message"].split("; ")) == MERGE_RECENT
+    assert signals[1] == {"message": "plain"}
+
+
 def test_normalize_strengths():
     signals = [{"strength": 5}, {"strength": 20}]
     out = normalize_strengths(signals)
@@ -55,3 +85,85 @@ async def test_adaptive_evaporation(tmp_path):
     await adaptive_evaporation(str(file), cfg, load_pheromone, save_pheromone)
     data = await load_pheromone(str(file))
     assert data["signals"][0]["strength"] < 10
+
+
+def test_vectorized_evaporation_matches_scalar():
+    pytest.importorskip("numpy")
+    signals = generate_signals(5000) + [{"category": "need", "strength": 3, "context": {"urgency": 0}}]
+    signals += [{"category": "need", "strength": k / 1000, "context": {}} for k in range(2000)]
+    for rates, base in ((RATES, 0.05), ({"need": 0}, 0)):
+        expected = evaporate_scalar(copy.deepcopy(signals), rates, base, 1, 0.1)
+        actual = evaporate_vectorized(copy.deepcopy(signals), rates, base, 1, 0.1)
+        assert actual == expected
+        assert [type(s["strength"]) for s in actual] == [type(s["strength"]) for s in expected]
+
+
+@pytest.mark.asyncio
+async def test_adaptive_evaporation_uses_vector_path(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(so, "VECTOR_THRESHOLD", 2)
+    calls = []
+    original = so.evaporate_vectorized
+    monkeypatch.setattr(so, "evaporate_vectorized", lambda *a: calls.append(1) or original(*a))
+    file = tmp_path / "p.json"
+    file.write_text(json.dumps({"signals": [{"category": "need", "strength": 10, "context": {}}] * 3}))
+    await adaptive_evaporation(str(file), {"coreConfig": {"evaporationRates": {"need": 0.1}}}, load_pheromone, save_pheromone)
+    data = await load_pheromone(str(file))
+    assert calls and [s["strength"] for s in data["signals"]] == [9.0, 9.0, 9.0]
+
+
+@pytest.mark.asyncio
+async def test_lazy_decay_stamps_once_then_stays_idle(tmp_path):
+    file = tmp_path / "p.json"
+    file.write_text(json.dumps({"signals": [{"category": "need", "strength": 10, "context": {}}]}))
+    cfg = {"coreConfig": {"evaporationRates": {"need": 0.1}}, "lazyDecay": {"periodSeconds": 60}}
+    saves = []
+
+    async def save(path, data):
+        saves.append(path)
+        await save_pheromone(path, data)
+
+    await adaptive_evaporation(str(file), cfg, load_pheromone, save)
+    await adaptive_evaporation(str(file), cfg, load_pheromone, save)
+    assert len(saves) == 1
+    sig = (await load_pheromone(str(file)))["signals"][0]
+    assert sig["strength"] == 10
+    created = sig["decay"]["created"]
+    assert effective_strength(sig, created) == 10
+    # Two periods at 10% per period, independent of how often ticks ran.
+    assert effective_strength(sig, created + 120) == pytest.approx(8.1)
+
+
+@pytest.mark.asyncio
+async def test_compact_decayed_prunes_weak_signals(tmp_path):
+    file = tmp_path / "p.json"
+    old = {"category": "need", "strength": 1, "decay": {"initial": 1, "created": 0, "rate": 0.5}}
+    fresh = {"category": "need", "strength": 5}
+    file.write_text(json.dumps({"signals": [old, fresh]}))
+    cfg = {"coreConfig": {"signalPruneThreshold": 0.5}}
+    assert await compact_decayed(str(file), cfg, load_pheromone, save_pheromone) == 1
+    assert (await load_pheromone(str(file)))["signals"] == [fresh]
+    assert await compact_decayed(str(file), cfg, load_pheromone, save_pheromone) == 0
+
+
+@pytest.mark.asyncio
+async def test_lazy_decay_prunes_faded_signals_on_schedule(tmp_path):
+    file = tmp_path / "p.json"
+    faded = {"category": "need", "strength": 9, "decay": {"initial": 9, "created": 0, "rate": 0.5}}
+    fresh = {"category": "need", "strength": 5, "context": {}}
+    file.write_text(json.dumps({"signals": [faded, fresh]}))
+    cfg = {"coreConfig": {"signalPruneThreshold": 0.5}, "lazyDecay": True}
+    await adaptive_evaporation(str(file), cfg, load_pheromone, save_pheromone)
+    signals = (await load_pheromone(str(file)))["signals"]
+    assert [s["strength"] for s in signals] == [5]
+    assert "decay" in signals[0]
+
+
+def test_merge_duplicate_uses_decayed_strength():
+    now = 10000.0
+    faded = {"message": "a", "strength": 9, "decay": {"initial": 9, "created": now - 600, "rate": 0.5, "period": 60}}
+    weak = {"message": "b", "strength": 2}
+    merged = merge_duplicate(faded, weak, now)
+    assert merged["strength"] == 2
+    assert merged["decay"] == {"initial": 2, "created": now, "rate": 0.5, "period": 60}
+    assert effective_strength(merged, now) == 2
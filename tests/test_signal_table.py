@@ -0,0 +1,84 @@
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from coordination_monitor import cleanup_expired_signals, detect_coordination_deadlock, suggest_next_action
+import src.pheromone_helpers as helpers
+from src.pheromone_helpers import load_pheromone, save_pheromone, update_pheromone
+from src.signal_cache import SignalCache
+from src.signal_optimizer import adaptive_evaporation, build_signal_index
+from src.signal_table import SignalTable
+from src.traffic_controller import determine_route
+
+
+def _signals() -> list:
+    now = int(time.time())
+    return [
+        {"id": "1", "signalType": "req", "category": "need", "strength": 5, "message": "write tests",
+         "timestamp": now, "context": {"urgency": 0.5}},
+        {"id": "2", "signalType": "bug", "category": "block", "strength": 9.5, "message": "crash",
+         "timestamp": now - 10, "target": "debugger-targeted"},
+        {"id": "3", "signalType": "route", "category": "coordinate", "strength": 0.11, "message": "x",
+         "timestamp": now - 1000, "target": None},
+    ]
+
+
+def test_rows_roundtrip_and_mutate() -> None:
+    signals = _signals()
+    table = SignalTable(copy.deepcopy(signals))
+    assert len(table) == 3
+    assert table.to_dicts() == signals
+    row = table[1]
+    assert row["category"] == "block" and row.get("missing", "d") == "d"
+    row["strength"] = 3
+    assert table.strength[1] == 3.0 and row["strength"] == 3 and isinstance(row["strength"], int)
+    assert table[2]["target"] is None
+    assert table.counts("category") == {"need": 1, "block": 1, "coordinate": 1}
+    assert table.order_by("strength", reverse=True) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_table_used_by_router_monitor_and_optimizer(tmp_path: Path) -> None:
+    table = SignalTable(_signals())
+    assert await determine_route({"signals": table}) == "debugger-targeted"
+    assert suggest_next_action(table) == "tester-tdd-master"
+    assert not detect_coordination_deadlock(table, 60)
+    assert len(cleanup_expired_signals(table, 60)) == 2
+    assert set(build_signal_index(table)) == {"need", "block", "coordinate"}
+
+    cfg = {"coreConfig": {"evaporationRates": {"need": 0.1}, "signalPruneThreshold": 0.1},
+           "adaptiveEvaporation": {"base": 0.2, "urgencyMultiplier": 1}}
+    path = tmp_path / "p.json"
+    path.write_text(json.dumps({"signals": _signals()}))
+    await adaptive_evaporation(str(path), cfg, load_pheromone, save_pheromone)
+    expected = json.loads(path.read_text())["signals"]
+
+    async def load_table(p: str) -> dict:
+        return {"signals": SignalTable(json.loads(json.dumps(_signals())))}
+
+    await adaptive_evaporation(str(path), cfg, load_table, save_pheromone)
+    got = json.loads(path.read_text())["signals"]
+    assert [(s["id"], s["strength"]) for s in got] == [(s["id"], s["strength"]) for s in expected]
+
+
+@pytest.mark.asyncio
+async def test_load_path_builds_tables_when_enabled(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(helpers, "SIGNAL_TABLE", True)
+    path = tmp_path / "p.json"
+    path.write_text(json.dumps({"signals": _signals()}))
+    cache = SignalCache()
+    data = await load_pheromone(str(path), cache)
+    assert isinstance(data["signals"], SignalTable)
+    cfg = {"coreConfig": {"signalPruneThreshold": 0.5}, "adaptiveEvaporation": {"base": 0.1, "urgencyMultiplier": 1}}
+    await adaptive_evaporation(str(path), cfg, lambda p: load_pheromone(p, cache), lambda p, d: save_pheromone(p, d, cache))
+    assert [s["id"] for s in json.loads(path.read_text())["signals"]] == ["1", "2"]
+    await update_pheromone(str(path), {"id": "4", "category": "need", "strength": 2, "message": "m", "context": {}}, cache)
+    cached = await load_pheromone(str(path), cache)
+    assert isinstance(cached["signals"], SignalTable)
+    assert [row["id"] for row in cached["signals"]] == [s["id"] for s in json.loads(path.read_text())["signals"]]
@@ -1,5 +1,6 @@
 import json
 import asyncio
+import time
 from pathlib import Path
 import sys
 import pytest
@@ -14,7 +15,9 @@ from src.traffic_controller import (
     add_coordination_signal,
     RoutingError,
     PheromoneHandler,
+    route_store,
 )
+from src.signal_index import SignalIndex
 
 
 @pytest.mark.asyncio
@@ -80,3 +83,23 @@ async def test_priority_block(tmp_path: Path) -> None:
     agent = await determine_route(pheromone, handler)
     assert agent == "debugger-targeted"
 
+
+@pytest.mark.asyncio
+async def test_determine_route_uses_effective_strength() -> None:
+    now = time.time()
+    faded = {"category": "block", "strength": 9, "decay": {"initial": 9, "created": now - 36000, "rate": 0.5}}
+    live = {"category": "compass", "strength": 3}
+    assert await determine_route({"signals": [faded, live]}) == "concept-to-blueprint-translator"
+    index = SignalIndex.build([faded, live])
+    assert await determine_route({"signals": [faded, live]}, index=index) == "concept-to-blueprint-translator"
+
+
+@pytest.mark.asyncio
+async def test_route_store_routes_from_the_handler_index(tmp_path: Path, make_signal) -> None:
+    handler = PheromoneHandler(str(tmp_path / "pher.json"))
+    await handler.write_safe({"signals": [make_signal(1, "need", strength=2), make_signal(2, "block", strength=9)]})
+    assert await route_store(handler) == "debugger-targeted"
+    index = await handler.signal_index()
+    assert index.router is not None and len(index) == 3
+    await handler.clear_signals_by_category("block")
+    assert await route_store(handler) == "coder-test-driven"
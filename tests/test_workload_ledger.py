@@ -0,0 +1,104 @@
+import json
+from multiprocessing import Process
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import src.traffic_controller as tc
+import src.workload_ledger as wl
+from scripts.handoff_scripts import code_complete_handoff
+from src.handoff_templates import task_completion
+from src.pheromone_handler import PheromoneHandler
+from src.pheromone_helpers import update_pheromone
+from src.workload_ledger import WorkloadError, WorkloadLedger
+
+
+def _route(path: str, count: int) -> None:
+    ledger = WorkloadLedger(path)
+    for _ in range(count):
+        ledger.acquire(["a", "b"])
+
+
+def test_least_loaded_spreads_and_persists(tmp_path: Path) -> None:
+    path = str(tmp_path / "workload.json")
+    ledger = WorkloadLedger(path, weights={"b": 2.0})
+    picks = [ledger.acquire(["a", "b"], now=100) for _ in range(6)]
+    assert picks.count("b") == 4
+    assert WorkloadLedger(path).loads(now=100) == {"a": 2.0, "b": 4.0}
+    assert WorkloadLedger(path, half_life=10).loads(now=110) == {"a": 1.0, "b": 2.0}
+    with pytest.raises(WorkloadError):
+        WorkloadLedger(path, strategy="random")
+    p2c = WorkloadLedger(str(tmp_path / "p2c.json"), strategy="p2c", seed=1)
+    picks = [p2c.acquire(["a", "b", "c", "d"]) for _ in range(40)]
+    assert max(picks.count(agent) for agent in "abcd") <= 12
+
+
+def test_processes_share_one_ledger(tmp_path: Path) -> None:
+    path = str(tmp_path / "workload.json")
+    workers = [Process(target=_route, args=(path, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    state = json.loads(Path(path).read_text())
+    assert sum(entry["load"] for entry in state["agents"].values()) == pytest.approx(100, rel=0.01)
+
+
+def test_completions_release_once(tmp_path: Path) -> None:
+    ledger = WorkloadLedger(str(tmp_path / "workload.json"), half_life=0)
+    ledger.acquire(["coder-test-driven"])
+    ledger.acquire(["coder-test-driven"])
+    done = task_completion("Code implemented", source="coder-test-driven")
+    assert ledger.record_completions([done, done]) == 1
+    assert ledger.record_completions([done]) == 0
+    assert ledger.loads()["coder-test-driven"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_completions_are_recorded_when_written(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    ledger = WorkloadLedger(str(tmp_path / "workload.json"), half_life=0)
+    monkeypatch.setattr(wl, "_SHARED", ledger)
+    need = {"id": "n", "category": "need", "strength": 5, "message": "build it"}
+    assert await tc.determine_route({"signals": [need]}) == "coder-test-driven"
+    assert await tc.determine_route({"signals": [need]}) == "coder-test-driven"
+    assert ledger.loads()["coder-test-driven"] == 2.0
+    await code_complete_handoff(str(tmp_path / "pher.json"))
+    assert ledger.loads()["coder-test-driven"] == 1.0
+    # Routing never rescans the table for completions.
+    monkeypatch.setattr(ledger, "record_completions", lambda *a: pytest.fail("scanned on route"))
+    done = task_completion("Code implemented", source="coder-test-driven")
+    await tc.determine_route({"signals": [need, done]})
+    assert ledger.loads()["coder-test-driven"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_determine_route_spreads_over_instances(tmp_path: Path, isolated_workload: WorkloadLedger) -> None:
+    need = {"id": "n", "category": "need", "strength": 5, "message": "build it"}
+    instances = {"coder-test-driven": ["coder-1", "coder-2"]}
+    picks = [await tc.determine_route({"signals": [need]}, instances=instances) for _ in range(4)]
+    assert sorted(picks) == ["coder-1", "coder-1", "coder-2", "coder-2"]
+    assert set(isolated_workload.loads()) == {"coder-1", "coder-2"}
+
+
+def test_completion_ids_are_scoped_by_source(tmp_path: Path) -> None:
+    ledger = WorkloadLedger(str(tmp_path / "workload.json"), half_life=0)
+    ledger.acquire(["a"])
+    ledger.acquire(["b"])
+    done = {"signalType": "task_completed", "id": "task_completed-1000", "timestamp": 1000}
+    assert ledger.record_completions([dict(done, source="a"), dict(done, source="b")]) == 2
+    assert ledger.record_completions([dict(done, source="a")]) == 0
+    assert ledger.loads() == {"a": 0.0, "b": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_write_paths_release_completions(tmp_path: Path, isolated_workload: WorkloadLedger) -> None:
+    for _ in range(3):
+        isolated_workload.acquire(["coder-test-driven"])
+    await PheromoneHandler(str(tmp_path / "pher.json")).add_signal(task_completion("Code implemented", source="coder-test-driven"))
+    path = tmp_path / "helpers.json"
+    path.write_text('{"signals": []}')
+    await update_pheromone(str(path), dict(task_completion("Fixed", source="coder-test-driven"), id="other"))
+    assert isolated_workload.loads()["coder-test-driven"] == pytest.approx(1.0, abs=0.01)
@@ -1,13 +1,15 @@
 import asyncio
-import json
 import os
 import time
 from pathlib import Path
 from typing import Any, Dict
 
 import yaml
+from src.pheromone_codec import CodecError, loads as decode_pheromone
 from src.pheromone_handler import PheromoneHandler, PheromoneHandlerError
-from src.traffic_controller import determine_route, RoutingError
+from src.pheromone_store import open_pheromone_store
+from src.signal_index import SignalIndex
+from src.traffic_controller import analyze_signal, determine_route, RoutingError
 
 
 class SystemHealthError(Exception):
@@ -15,14 +17,19 @@ class SystemHealthError(Exception):
 
 
 async def check_config_files() -> None:
-    """Ensure core configuration files exist and are valid JSON."""
-    for name in [".swarmConfig", os.getenv("PHEROMONE_FILE", ".pheromone")]:
+    """Ensure core configuration files exist and are valid JSON or compact pheromone."""
+    names = [".swarmConfig"]
+    pheromone = os.getenv("PHEROMONE_FILE", ".pheromone")
+    if isinstance(open_pheromone_store(pheromone), PheromoneHandler):
+        # Sharded and SQLite stores have no single file; test_pheromone_ops reads them.
+        names.append(pheromone)
+    for name in names:
         path = Path(name)
         if not path.exists():
             raise SystemHealthError(f"{name} missing")
         try:
-            await asyncio.to_thread(json.load, open(path))
-        except json.JSONDecodeError as exc:
+            await asyncio.to_thread(decode_pheromone, path.read_bytes())
+        except (ValueError, CodecError) as exc:
             raise SystemHealthError(f"{name} invalid") from exc
 
 
@@ -40,7 +47,7 @@ async def check_roomodes(path: str = ".roomodes") -> None:
 
 async def test_pheromone_ops() -> None:
     """Read and immediately rewrite pheromone to ensure file operations work."""
-    handler = PheromoneHandler(os.getenv("PHEROMONE_FILE", ".pheromone"))
+    handler = open_pheromone_store(os.getenv("PHEROMONE_FILE", ".pheromone"))
     try:
         data = await handler.read_safe()
         if data is None:
@@ -61,7 +68,7 @@ async def verify_routing() -> None:
         "timestamp": int(time.time()),
     }
     data = {"signals": [signal]}
-    agent = await determine_route(data)
+    agent = await determine_route(data, index=SignalIndex.build(data["signals"], analyze_signal))
     if agent != "tester-tdd-master":
         raise SystemHealthError("routing incorrect")
 